@@ -2,5 +2,6 @@
 # -*- coding: UTF-8 -*-
 
 __all__ = [
-    'mediawiki_cmd'
+    'mediawiki_cmd', 'pandoc_server', 'md_converter', 'pic_tool', 'xls_tool', 'wiki_table', 'wiki_session',
+    'wiki_scheduler', 'text_tool'
 ]
@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+markdown转mediawiki的原生转换引擎(无需pandoc)
+@module md_converter
+@file md_converter.py
+"""
+
+import os
+import sys
+import re
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'md_converter'  # 模块名
+__DESCRIPT__ = u'markdown转mediawiki的原生转换引擎'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2019.12.09'  # 发布日期
+
+
+class MdToWikiConverter(object):
+    """
+    markdown转mediawiki的流式转换器
+    按行单次扫描markdown文本, 直接输出wiki文本, 图片通过回调函数处理(复制/下载及重命名)
+
+    使用方法:
+        _converter = MdToWikiConverter(out_fun=f.write, pic_fun=deal_pic)
+        for _line in f_in:
+            _converter.feed(_line)
+        _converter.close()
+    """
+
+    #############################
+    # 块级元素的匹配规则
+    #############################
+    _RE_ATX_HEAD = re.compile(r'^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$')
+    _RE_SETEXT_H1 = re.compile(r'^ {0,3}=+[ \t]*$')
+    _RE_SETEXT_H2 = re.compile(r'^ {0,3}-+[ \t]*$')
+    _RE_HR = re.compile(r'^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$')
+    _RE_FENCE = re.compile(r'^(\s*)(`{3,}|~{3,})\s*([^`\s]*)[^`]*$')
+    _RE_LIST_ITEM = re.compile(r'^(\s*)([*+-]|\d{1,9}[.)])[ \t]+(.*)$')
+    _RE_QUOTE = re.compile(r'^ {0,3}> ?(.*)$')
+    _RE_TABLE_DELIMITER = re.compile(r'^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$')
+
+    #############################
+    # 行内元素的匹配规则
+    #############################
+    _RE_CODE_SPAN = re.compile(r'(`+)(.+?)\1')
+    # 链接地址, 与CommonMark一致允许成对的括号(最多嵌套两层)
+    _LINK_DEST = r'<?((?:[^()\s<>]|\((?:[^()\s<>]|\([^()\s<>]*\))*\))*)>?'
+    _RE_IMAGE = re.compile(r'!\[([^\]]*)\]\(\s*' + _LINK_DEST + r'(?:\s+["\'].*?["\'])?\s*\)')
+    _RE_HTML_IMG = re.compile(r'<img\s[^>]*?/?>', re.IGNORECASE)
+    _RE_HTML_ATTR = re.compile(r'([\w-]+)\s*=\s*("[^"]*"|\'[^\']*\'|[^\s>]+)')
+    _RE_LINK = re.compile(r'\[([^\]]*)\]\(\s*' + _LINK_DEST + r'(?:\s+["\'].*?["\'])?\s*\)')
+    _RE_AUTO_LINK = re.compile(r'<((?:https?|ftp)://[^>\s]+|mailto:[^>\s]+)>')
+    _RE_BOLD_ITALIC = re.compile(r'(\*\*\*|___)(?=\S)(.+?)(?<=\S)\1')
+    _RE_BOLD = re.compile(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1')
+    _RE_ITALIC_STAR = re.compile(r'\*(?=\S)(.+?)(?<=\S)\*')
+    _RE_ITALIC_UNDERLINE = re.compile(r'(?<![\w])_(?=\S)(.+?)(?<=\S)_(?![\w])')
+    _RE_STRIKE = re.compile(r'~~(?=\S)(.+?)(?<=\S)~~')
+    _RE_PLACEHOLDER = re.compile('\x00(\\d+)\x00')
+    # 会被wiki解析的文本(模板、内部链接、外部链接、表格、签名、魔术字及连续单引号)
+    _RE_WIKI_SPECIAL = re.compile(
+        r'\{\{+|\}\}+|\[\[+|\]\]+|\{\||\|\}|~{3,}|__[A-Z]+__|\'{2,}|'
+        r'\[(?=(?:https?|ftp)://|//|mailto:)'
+    )
+    # html标签及注释
+    _RE_HTML_TAG = re.compile(r'<!--.*?-->|</?([A-Za-z][A-Za-z0-9]*)\b[^>]*>')
+    # wiki允许直接使用的html标签(与pandoc一致原样输出), 其他标签(如扩展标签)按原样显示
+    _WIKI_HTML_TAGS = frozenset((
+        'abbr', 'b', 'bdi', 'bdo', 'big', 'blockquote', 'br', 'caption', 'center', 'cite', 'code',
+        'data', 'dd', 'del', 'dfn', 'div', 'dl', 'dt', 'em', 'font', 'h1', 'h2', 'h3', 'h4', 'h5',
+        'h6', 'hr', 'i', 'ins', 'kbd', 'li', 'mark', 'ol', 'p', 'pre', 'q', 'rb', 'rp', 'rt', 'rtc',
+        'ruby', 's', 'samp', 'small', 'span', 'strike', 'strong', 'sub', 'sup', 'table', 'td', 'th',
+        'time', 'tr', 'tt', 'u', 'ul', 'var', 'wbr'
+    ))
+    # 行首会被wiki解析为列表、缩进、定义、标题或分隔线的字符
+    _RE_LINE_START_SPECIAL = re.compile(r'^(?:[*#:;]+|=+|-{4,})')
+
+    _EXTERNAL_LINK_PREFIX = ('http://', 'https://', 'ftp://', 'mailto:', '//')
+
+    #############################
+    # 构造函数
+    #############################
+    def __init__(self, out_fun=None, pic_fun=None):
+        """
+        构造函数
+
+        @param {function} out_fun=None - 输出wiki文本的函数, 格式为fun(text), 如果不传则缓存在内部通过get_text获取
+        @param {function} pic_fun=None - 图片处理函数, 格式为fun(src, alt), 返回图片的wiki文本;
+            如果不传则按原路径生成'[[Image:src|alt]]'
+        """
+        self._buffer = None
+        if out_fun is None:
+            self._buffer = list()
+            out_fun = self._buffer.append
+        self._out_fun = out_fun
+        self._pic_fun = pic_fun
+
+        # 处理状态
+        self._has_block = False  # 是否已经输出过块, 用于块之间的空行处理
+        self._para_lines = list()  # 当前段落的行
+        self._fence = None  # 当前代码块的围栏标记
+        self._fence_indent = 0  # 当前代码块的缩进
+        self._code_lang = ''  # 当前代码块的语言
+        self._code_lines = list()  # 当前代码块的行
+        self._indent_code = False  # 是否处于缩进代码块中
+        self._list_stack = list()  # 列表层级, 每个元素为(缩进, 列表符号)
+        self._list_item = None  # 当前列表项的段落文本清单
+        self._list_blank = False  # 列表中是否遇到了空行
+        self._quote_lines = list()  # 引用块的行
+        self._table = None  # 当前表格已输出的行数, None代表不在表格中
+
+    #############################
+    # 公共函数
+    #############################
+    @classmethod
+    def convert(cls, md_text, pic_fun=None):
+        """
+        将markdown文本一次性转换为wiki文本
+
+        @param {string} md_text - markdown文本
+        @param {function} pic_fun=None - 图片处理函数, 格式为fun(src, alt)
+
+        @return {string} - 转换后的wiki文本
+        """
+        _converter = cls(pic_fun=pic_fun)
+        for _line in md_text.splitlines():
+            _converter.feed(_line)
+        _converter.close()
+        return _converter.get_text()
+
+    def get_text(self):
+        """
+        获取已转换的wiki文本(仅在未传入out_fun的情况下有效)
+
+        @return {string} - wiki文本
+        """
+        return ''.join(self._buffer)
+
+    def feed(self, line):
+        """
+        送入一行markdown文本进行处理
+
+        @param {string} line - 行文本(可以带换行符)
+        """
+        _line = line.rstrip('\r\n').expandtabs(4)
+
+        # 代码块内
+        if self._fence is not None:
+            if _line.strip().startswith(self._fence) and _line.strip().strip(self._fence[0]) == '':
+                self._flush_code()
+            else:
+                # 去掉围栏的缩进
+                _n = len(_line) - len(_line.lstrip(' '))
+                self._code_lines.append(_line[min(_n, self._fence_indent):])
+            return
+
+        if self._indent_code:
+            if _line.startswith('    ') or _line.strip() == '':
+                self._code_lines.append(_line[4:])
+                return
+            self._flush_code()
+
+        # 表格内
+        if self._table is not None:
+            if _line.strip() != '' and '|' in _line:
+                self._out_table_row(_line, '|')
+                return
+            self._flush_table()
+
+        # 引用块
+        _match = self._RE_QUOTE.match(_line)
+        if _match is not None:
+            self._flush_para()
+            self._flush_list()
+            self._quote_lines.append(_match.group(1))
+            return
+        elif len(self._quote_lines) > 0:
+            if _line.strip() != '' and len(self._para_lines) == 0:
+                # 延续行
+                self._quote_lines.append(_line)
+                return
+            self._flush_quote()
+
+        # 空行
+        if _line.strip() == '':
+            self._flush_para()
+            if self._list_item is not None:
+                self._list_blank = True
+            return
+
+        # 围栏代码块开始
+        _match = self._RE_FENCE.match(_line)
+        if _match is not None:
+            self._flush_para()
+            self._flush_list()
+            self._fence = _match.group(2)
+            self._fence_indent = len(_match.group(1))
+            self._code_lang = _match.group(3)
+            return
+
+        # 列表
+        _match = self._RE_LIST_ITEM.match(_line)
+        if _match is not None and not self._RE_HR.match(_line):
+            self._flush_para()
+            self._deal_list_item(len(_match.group(1)), _match.group(2), _match.group(3))
+            return
+
+        if self._list_item is not None:
+            if _line.startswith(' ') and (not self._list_blank or _line.startswith('  ')):
+                # 列表项的延续行, 空行后的缩进行为列表项的新段落
+                if self._list_blank:
+                    self._list_item.append(_line.strip())
+                else:
+                    self._list_item[-1] = '%s %s' % (self._list_item[-1], _line.strip())
+                self._list_blank = False
+                return
+            if not self._list_blank:
+                # 懒惰延续行
+                self._list_item[-1] = '%s %s' % (self._list_item[-1], _line.strip())
+                return
+            self._flush_list()
+
+        # 缩进代码块(段落中的缩进行视为延续行)
+        if _line.startswith('    ') and len(self._para_lines) == 0:
+            self._indent_code = True
+            self._code_lines.append(_line[4:])
+            return
+
+        # 标题
+        _match = self._RE_ATX_HEAD.match(_line)
+        if _match is not None:
+            self._flush_para()
+            self._out_head(len(_match.group(1)), _match.group(2) or '')
+            return
+
+        if len(self._para_lines) > 0:
+            # setext格式标题
+            if self._RE_SETEXT_H1.match(_line):
+                _text = ' '.join(self._para_lines)
+                self._para_lines = list()
+                self._out_head(1, _text)
+                return
+            if self._RE_SETEXT_H2.match(_line):
+                _text = ' '.join(self._para_lines)
+                self._para_lines = list()
+                self._out_head(2, _text)
+                return
+
+            # 表格分隔行
+            if len(self._para_lines) == 1 and '|' in self._para_lines[0] and \
+                    self._RE_TABLE_DELIMITER.match(_line) and '-' in _line:
+                _head = self._para_lines[0]
+                self._para_lines = list()
+                self._table = 0
+                self._out_block('{| class="wikitable"\n')
+                self._out_table_row(_head, '!')
+                return
+
+        # 分隔线
+        if self._RE_HR.match(_line):
+            self._flush_para()
+            self._out_block('-----\n')
+            return
+
+        # 普通段落
+        self._para_lines.append(_line)
+
+    def close(self):
+        """
+        结束处理, 输出所有缓存的内容
+        """
+        if self._fence is not None or self._indent_code:
+            self._flush_code()
+        self._flush_table()
+        self._flush_quote()
+        self._flush_para()
+        self._flush_list()
+
+    def convert_inline(self, text):
+        """
+        转换行内元素
+
+        @param {string} text - 要转换的文本
+
+        @return {string} - 转换后的文本
+        """
+        _holders = list()
+
+        def _hold(value):
+            _holders.append(value)
+            return '\x00%d\x00' % (len(_holders) - 1)
+
+        # 行内代码, 内容不再进行处理
+        _text = self._RE_CODE_SPAN.sub(
+            lambda m: _hold('<code>%s</code>' % self._escape_html(m.group(2).strip())), text
+        )
+        # 图片
+        _text = self._RE_IMAGE.sub(lambda m: _hold(self._deal_pic(m.group(2), m.group(1))), _text)
+        _text = self._RE_HTML_IMG.sub(lambda m: _hold(self._deal_html_img(m.group())), _text)
+        # 链接
+        _text = self._RE_LINK.sub(lambda m: _hold(self._deal_link(m.group(2), m.group(1))), _text)
+        _text = self._RE_AUTO_LINK.sub(lambda m: _hold(m.group(1)), _text)
+        # wiki允许的html标签原样输出, 其他标签及wiki的特殊文本按原样显示
+        _text = self._RE_HTML_TAG.sub(lambda m: _hold(self._deal_html_tag(m)), _text)
+        _text = self._RE_WIKI_SPECIAL.sub(lambda m: _hold('<nowiki>%s</nowiki>' % m.group()), _text)
+        # 强调
+        _text = self._RE_BOLD_ITALIC.sub(r"'''''\2'''''", _text)
+        _text = self._RE_BOLD.sub(r"'''\2'''", _text)
+        _text = self._RE_ITALIC_STAR.sub(r"''\1''", _text)
+        _text = self._RE_ITALIC_UNDERLINE.sub(r"''\1''", _text)
+        _text = self._RE_STRIKE.sub(r'<s>\1</s>', _text)
+
+        # 还原占位符(占位符内可能嵌套占位符)
+        while self._RE_PLACEHOLDER.search(_text) is not None:
+            _text = self._RE_PLACEHOLDER.sub(lambda m: _holders[int(m.group(1))], _text)
+        return _text
+
+    #############################
+    # 内部函数
+    #############################
+    def _out_block(self, text):
+        """
+        输出一个块, 块与块之间用空行分隔
+
+        @param {string} text - 块的wiki文本
+        """
+        if self._has_block:
+            self._out_fun('\n')
+        self._has_block = True
+        self._out_fun(text)
+
+    def _out_head(self, level, text):
+        """
+        输出标题
+
+        @param {int} level - 标题级别
+        @param {string} text - 标题文本
+        """
+        _sign = '=' * level
+        self._out_block('%s %s %s\n' % (_sign, self.convert_inline(text.strip()), _sign))
+
+    def _flush_para(self):
+        """
+        输出当前段落
+        """
+        if len(self._para_lines) == 0:
+            return
+
+        _lines = list()
+        for _line in self._para_lines:
+            if _line.endswith('  ') or _line.endswith('\\'):
+                # 强制换行
+                _lines.append(self.convert_inline(_line.rstrip(' \\')) + '<br />')
+            else:
+                _lines.append(self.convert_inline(_line.strip()))
+        self._para_lines = list()
+        self._out_block('<br />\n'.join([
+            self._escape_line_start(_line) for _line in ' '.join(_lines).split('<br /> ')
+        ]) + '\n')
+
+    def _deal_html_tag(self, match):
+        """
+        处理html标签, wiki允许的标签及注释原样输出, 其他标签按原样显示
+
+        @param {re.Match} match - html标签的匹配对象
+
+        @return {string} - 处理后的wiki文本
+        """
+        if match.group(1) is None or match.group(1).lower() in self._WIKI_HTML_TAGS:
+            return match.group()
+        return '<nowiki>%s</nowiki>' % match.group()
+
+    def _escape_line_start(self, line):
+        """
+        转义行首会被wiki解析的字符
+
+        @param {string} line - 已转换的行文本
+
+        @return {string} - 转义后的行文本
+        """
+        return self._RE_LINE_START_SPECIAL.sub(lambda m: '<nowiki>%s</nowiki>' % m.group(), line)
+
+    def _flush_code(self):
+        """
+        输出当前代码块
+        """
+        # 去掉结尾的空行
+        while len(self._code_lines) > 0 and self._code_lines[-1].strip() == '':
+            self._code_lines.pop()
+
+        _code = '\n'.join(self._code_lines)
+        if self._code_lang != '':
+            self._out_block('<syntaxhighlight lang="%s">%s\n</syntaxhighlight>\n' % (self._code_lang, _code))
+        else:
+            self._out_block('<pre>%s\n</pre>\n' % self._escape_html(_code))
+
+        self._fence = None
+        self._fence_indent = 0
+        self._code_lang = ''
+        self._code_lines = list()
+        self._indent_code = False
+
+    def _deal_list_item(self, indent, sign, text):
+        """
+        处理列表项
+
+        @param {int} indent - 缩进
+        @param {string} sign - 列表标记
+        @param {string} text - 列表项文本
+        """
+        self._out_list_item()
+        _sign = '*' if sign in ('*', '+', '-') else '#'
+        if len(self._list_stack) > 0 and self._list_blank and indent <= self._list_stack[0][0] \
+                and _sign != self._list_stack[0][1]:
+            # 空行后不同类型的列表, 作为新的列表处理
+            self._flush_list()
+
+        if len(self._list_stack) == 0:
+            if self._has_block:
+                self._out_fun('\n')
+            self._has_block = True
+            self._list_stack.append((indent, _sign))
+        else:
+            while len(self._list_stack) > 1 and indent < self._list_stack[-1][0]:
+                self._list_stack.pop()
+            if indent > self._list_stack[-1][0] + 1:
+                # 子列表
+                self._list_stack.append((indent, _sign))
+            else:
+                self._list_stack[-1] = (self._list_stack[-1][0], _sign)
+
+        self._list_item = [text.strip()]
+        self._list_blank = False
+
+    def _out_list_item(self):
+        """
+        输出当前列表项
+        """
+        if self._list_item is None:
+            return
+
+        self._out_fun('%s %s\n' % (
+            ''.join([_item[1] for _item in self._list_stack]),
+            '<br /><br />'.join([self.convert_inline(_para) for _para in self._list_item])
+        ))
+        self._list_item = None
+
+    def _flush_list(self):
+        """
+        结束当前列表
+        """
+        self._out_list_item()
+        self._list_stack = list()
+        self._list_blank = False
+
+    def _flush_quote(self):
+        """
+        输出引用块
+        """
+        if len(self._quote_lines) == 0:
+            return
+
+        _sub_converter = MdToWikiConverter(pic_fun=self._pic_fun)
+        for _line in self._quote_lines:
+            _sub_converter.feed(_line)
+        _sub_converter.close()
+        self._quote_lines = list()
+        self._out_block('<blockquote>%s</blockquote>\n' % _sub_converter.get_text())
+
+    def _out_table_row(self, line, cell_sign):
+        """
+        输出表格行
+
+        @param {string} line - markdown表格行
+        @param {string} cell_sign - 单元格的标记, 表头为'!', 数据为'|'
+        """
+        _line = line.strip()
+        if _line.startswith('|'):
+            _line = _line[1:]
+        if _line.endswith('|') and not _line.endswith('\\|'):
+            _line = _line[:-1]
+
+        _cells = [_cell.strip().replace('\\|', '|') for _cell in re.split(r'(?<!\\)\|', _line)]
+        self._out_fun('|-\n%s\n' % '\n'.join(
+            ['%s %s' % (cell_sign, self.convert_inline(_cell)) for _cell in _cells]
+        ))
+        self._table += 1
+
+    def _flush_table(self):
+        """
+        结束当前表格
+        """
+        if self._table is None:
+            return
+        self._out_fun('|}\n')
+        self._table = None
+
+    def _deal_pic(self, src, alt):
+        """
+        处理图片
+
+        @param {string} src - 图片路径
+        @param {string} alt - 图片说明
+
+        @return {string} - 图片的wiki文本
+        """
+        if self._pic_fun is not None:
+            return self._pic_fun(src, alt)
+
+        if alt == '':
+            return '[[Image:%s]]' % (src, )
+        else:
+            return '[[Image:%s|%s]]' % (src, alt)
+
+    def _deal_html_img(self, html):
+        """
+        处理html格式的图片标签
+
+        @param {string} html - 图片标签
+
+        @return {string} - 图片的wiki文本
+        """
+        _attrs = dict()
+        for _match in self._RE_HTML_ATTR.finditer(html):
+            _attrs[_match.group(1).lower()] = _match.group(2).strip('\'"')
+
+        if _attrs.get('src', '') == '':
+            return html
+        return self._deal_pic(_attrs['src'], _attrs.get('alt', ''))
+
+    def _deal_link(self, url, text):
+        """
+        处理链接
+
+        @param {string} url - 链接地址
+        @param {string} text - 链接文本
+
+        @return {string} - 链接的wiki文本
+        """
+        _text = self.convert_inline(text)
+        if url.startswith(self._EXTERNAL_LINK_PREFIX):
+            if _text == '' or _text == url:
+                return url
+            return '[%s %s]' % (url, _text)
+
+        # 内部链接
+        if _text == '' or _text == url:
+            return '[[%s]]' % url
+        return '[[%s|%s]]' % (url, _text)
+
+    def _escape_html(self, text):
+        """
+        转义html特殊字符
+
+        @param {string} text - 要转义的文本
+
+        @return {string} - 转义后的文本
+        """
+        return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
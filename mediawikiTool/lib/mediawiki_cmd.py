@@ -16,40 +16,174 @@ import os
 import sys
 import re
 import shutil
-import requests
 import traceback
 import platform
 import subprocess
 import time
+import signal
+import threading
 import datetime
-import copy
+import functools
 import json
+import atexit
+import zipfile
+import hashlib
+import itertools
+import multiprocessing.util
+import concurrent.futures
 try:
     import chardet
 except:
     pass
 import mwclient
-import xlrd
 from prompt_toolkit.shortcuts import ProgressBar
 from HiveNetLib.base_tools.run_tool import RunTool
 from HiveNetLib.prompt_plus import PromptPlus
 from HiveNetLib.base_tools.file_tool import FileTool
 from HiveNetLib.base_tools.string_tool import StringTool
-from HiveNetLib.simple_i18n import _
+from HiveNetLib.simple_i18n import _, get_global_i18n, set_global_i18n
 from HiveNetLib.simple_console.base_cmd import CmdBaseFW
 from HiveNetLib.generic import CResult
 # 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
 sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+from mediawikiTool.lib.pandoc_server import PandocServer, PandocServerUnavailable, PandocServerTimeout
+from mediawikiTool.lib.md_converter import MdToWikiConverter
+from mediawikiTool.lib.pic_tool import PicFetcher, PicCache
+from mediawikiTool.lib.xls_tool import XlsSheetPlan, SUPPORT_FILE_EXTS, open_row_reader
+from mediawikiTool.lib.text_tool import detect_file_encoding
+from mediawikiTool.lib.wiki_session import WikiSessionCache, WikiSiteMetaCache
+from mediawikiTool.lib.wiki_scheduler import WikiRequestScheduler
+from mediawikiTool.lib.wiki_table import WikiTableWriter, WikiJsonDataWriter, DATA_MODULE_NAME, DATA_MODULE_TEXT
 
 
 __MOUDLE__ = 'mediawiki_cmd'  # 模块名
 __DESCRIPT__ = u'mediawiki工具命令模块'  # 模块描述
-__VERSION__ = '0.5.1'  # 版本
+__VERSION__ = '0.6.0'  # 版本, 转换输出有变化时需要修改, 增量转换时版本不同的文件将重新转换
 __AUTHOR__ = u'黎慧剑'  # 作者
 __PUBLISH__ = '2019.12.09'  # 发布日期
 
 
+# 进程内共享对象(pandoc服务、图片获取工具、图片缓存)的创建锁
+_SHARED_LOCK = threading.RLock()
+
+
+class ConvertContext(object):
+    """
+    单个文件转换任务的上下文
+    保存转换参数、图片处理状态及输出提示对象, 在转换流程中逐级传递, 使同一个MediaWikiCmd对象可以同时执行多个转换
+    """
+
+    def __init__(self, para, prompt_obj):
+        """
+        构造函数
+
+        @param {dict} para - 转换参数字典(in、out、name、real_name、pic_dir等)
+        @param {PromptPlus} prompt_obj - 输出提示信息的对象
+        """
+        self.para = para
+        self.prompt_obj = prompt_obj
+        self.pic_list = dict()  # 已处理的图片, key为文本中的图片路径, value为wiki图片名
+        self.pic_num = 0  # 按顺序命名的图片序号
+        self.pic_tasks = list()  # 待复制或下载的图片清单, 每个任务为(图片路径, wiki图片名)
+        self.pre_deal_name = False  # 文件名是否包含()和[]需要预处理
+
+
+class BufferPrompt(object):
+    """
+    缓存输出信息的提示对象
+    在工作进程中代替PromptPlus使用, 将prompt_print的信息缓存后返回主进程打印
+    """
+
+    def __init__(self):
+        """
+        构造函数
+        """
+        self.print_list = list()
+
+    def prompt_print(self, *args, sep=' ', end='\n', **kwargs):
+        """
+        缓存要打印的信息, 参数与print一致
+
+        @param {*args} - 要打印的对象
+        @param {string} sep=' ' - 对象之间的分隔符
+        @param {string} end='\\n' - 结尾字符
+        """
+        self.print_list.append('%s%s' % (sep.join([str(_arg) for _arg in args]), end))
+
+
+def _filestowiki_worker_init(console_global_para, i18n_obj):
+    """
+    filestowiki并行转换工作进程的初始化函数
+
+    @param {dict} console_global_para - 控制台全局参数
+    @param {SimpleI18N} i18n_obj - 主进程的多语言对象
+    """
+    RunTool.set_global_var('CONSOLE_GLOBAL_PARA', console_global_para)
+    if i18n_obj is not None:
+        set_global_i18n(i18n_obj)
+
+    # 每个工作进程使用自己的pandoc服务, 进程退出时关闭
+    RunTool.set_global_var('PANDOC_SERVER', None)
+    multiprocessing.util.Finalize(None, _stop_pandoc_server, exitpriority=10)
+
+    # 图片获取的连接会话及缓存索引不与主进程共享
+    RunTool.set_global_var('PIC_FETCHER', None)
+    RunTool.set_global_var('PIC_CACHE', None)
+
+
+def _stop_pandoc_server():
+    """
+    关闭当前进程的pandoc服务
+    """
+    _server = RunTool.get_global_var('PANDOC_SERVER')
+    if _server is not None:
+        _server.stop()
+
+
+def _filestowiki_worker(cmd, cmd_para):
+    """
+    filestowiki并行转换的工作函数, 每个文件使用独立的MediaWikiCmd对象转换
+
+    @param {string} cmd - 转换命令
+    @param {string} cmd_para - 转换命令参数
+
+    @return {tuple} - (返回码, 打印信息清单, 耗时秒数, 输出的页面文件清单)
+    """
+    _prompt_obj = BufferPrompt()
+    _start = time.time()
+    _page_files = None
+    try:
+        _result = MediaWikiCmd()._cmd_dealfun(cmd=cmd, cmd_para=cmd_para, prompt_obj=_prompt_obj)
+        _code = _result.code
+        _page_files = getattr(_result, 'page_files', None)
+    except Exception as e:
+        _prompt_obj.prompt_print('%s (%s):\n%s' % (_('execution exception'), str(e), traceback.format_exc()))
+        _code = '20999'
+    return (_code, _prompt_obj.print_list, time.time() - _start, _page_files)
+
+
+def _xlstowiki_sheet_worker(file, read_para, sheet_name, sheet_para, out_para):
+    """
+    xlstowiki并行转换sheet页的工作函数, 每个任务独立打开Excel文件
+
+    @param {string} file - Excel文件路径
+    @param {dict} read_para - 打开文件的参数(stream, encoding)
+    @param {string} sheet_name - 要转换的sheet页名
+    @param {dict} sheet_para - sheet页的转换参数
+    @param {dict} out_para - 输出参数
+
+    @return {tuple} - (sheet页转换后的wiki文本, 输出的其他页面文件名清单)
+    """
+    _reader = open_row_reader(file, **read_para)
+    try:
+        _writer = WikiTableWriter()
+        _page_files = MediaWikiCmd()._convert_xls_sheet(_reader, sheet_name, sheet_para, _writer, out_para)
+        return (_writer.get_text(), _page_files)
+    finally:
+        _reader.close()
+
+
 class MediaWikiCmd(CmdBaseFW):
     """
     MediaWiki的离线处理命令
@@ -91,7 +225,6 @@ class MediaWikiCmd(CmdBaseFW):
             print_str属性要求框架进行打印处理
         """
         # 获取真实执行的函数
-        self._prompt_obj = prompt_obj  # 传递到对象内部处理
         _real_dealfun = None  # 真实调用的函数
         if 'ignore_case' in kwargs.keys() and kwargs['ignore_case']:
             # 区分大小写
@@ -127,79 +260,94 @@ class MediaWikiCmd(CmdBaseFW):
         """
         _ok_result = CResult(code='00000')
         try:
-            if not self._para_dict_check(cmd=cmd, cmd_para=cmd_para, prompt_obj=prompt_obj):
+            _ctx = self._get_convert_context(cmd_para, prompt_obj)
+            if _ctx is None:
                 return _ok_result
 
             # 展示处理信息
             prompt_obj.prompt_print(
                 '%s ( %s ):' % (
                     _('convert info'),
-                    _('change stander pic name' if self._para_dict['stdpic']
+                    _('change stander pic name' if _ctx.para['stdpic']
                       else 'use source pic name')
                 )
             )
-            prompt_obj.prompt_print('  %s: %s' % (_('source file'), self._para_dict['in']))
-            prompt_obj.prompt_print('  %s: %s' % (_('out path'), self._para_dict['out']))
-            prompt_obj.prompt_print('  %s: %s' % (_('wiki page title'), self._para_dict['real_name']))
-            prompt_obj.prompt_print('  %s: %s' % (_('copy pic path'), self._para_dict['pic_dir']))
+            prompt_obj.prompt_print('  %s: %s' % (_('source file'), _ctx.para['in']))
+            prompt_obj.prompt_print('  %s: %s' % (_('out path'), _ctx.para['out']))
+            prompt_obj.prompt_print('  %s: %s' % (_('wiki page title'), _ctx.para['real_name']))
+            prompt_obj.prompt_print('  %s: %s' % (_('copy pic path'), _ctx.para['pic_dir']))
+            prompt_obj.prompt_print('  %s: %s' % (_('convert engine'), _ctx.para['engine']))
             prompt_obj.prompt_print('')
             prompt_obj.prompt_print('%s  =================>' % (_('begin convert'), ))
             prompt_obj.prompt_print('')
 
             # 删除原有复制图片
-            self._create_pic_dir()
+            self._create_pic_dir(_ctx)
 
             # 预处理markdown文件
             prompt_obj.prompt_print('\n%s %s: ' % (_('begin'), _('copy pic file')))
-            _md_text = FileTool.get_file_text(self._para_dict['in'], encoding=None)
+            if _ctx.para['engine'] == 'native':
+                # 使用原生引擎逐行读取并转换, 图片获取完成后再生成正式文件
+                _ctx.pre_deal_name = False
+                _out_file = os.path.join(_ctx.para['out'], _ctx.para['real_name'] + '.txt')
+                try:
+                    with open(_ctx.para['in'], 'r', encoding=detect_file_encoding(_ctx.para['in'])) as _in_f, \
+                            open(_out_file + '.tmp', 'w', encoding='utf-8') as _out_f:
+                        _converter = MdToWikiConverter(
+                            out_fun=_out_f.write, pic_fun=functools.partial(self._deal_pic_src, _ctx)
+                        )
+                        for _line in _in_f:
+                            _converter.feed(_line.rstrip('\r\n'))
+                        _converter.close()
+
+                    # 并发获取图片
+                    self._fetch_pics(_ctx)
+                    self._remove_stale_pics(_ctx)
+                    os.replace(_out_file + '.tmp', _out_file)
+                finally:
+                    # 转换失败时删除临时文件, 避免被后续的批量转换处理
+                    if os.path.exists(_out_file + '.tmp'):
+                        os.remove(_out_file + '.tmp')
+
+                prompt_obj.prompt_print('\n=================>  %s %s' % (_('convert'), _('done')))
+                return _ok_result
+
+            _md_text = FileTool.get_file_text(_ctx.para['in'], encoding=None)
 
             # 增加文件名中有()和[]的处理规则的影响支持
-            self._para_dict['pre_deal_name'] = False
-            if len(re.findall(r'[\(|\)|\[|\]]', self._para_dict['real_name'])) > 0:
-                self._para_dict['pre_deal_name'] = True
-                _md_text = _md_text.replace(self._para_dict['real_name'], '{{__PRE_DEAL_NAME__}}')
+            _ctx.pre_deal_name = False
+            if len(re.findall(r'[\(|\)|\[|\]]', _ctx.para['real_name'])) > 0:
+                _ctx.pre_deal_name = True
+                _md_text = _md_text.replace(_ctx.para['real_name'], '{{__PRE_DEAL_NAME__}}')
 
             _temp_text = re.sub(
                 r'!\[.*?\]\(.*?\)|\<img .*? /\>',
-                self._deal_md_pic,
+                functools.partial(self._deal_md_pic, _ctx),
                 _md_text
             )
 
-            if self._para_dict['pre_deal_name']:
+            # 并发获取图片
+            self._fetch_pics(_ctx)
+            self._remove_stale_pics(_ctx)
+
+            if _ctx.pre_deal_name:
                 # 转换回来
-                _temp_text = _temp_text.replace('{{__PRE_DEAL_NAME__}}', self._para_dict['real_name'])
+                _temp_text = _temp_text.replace('{{__PRE_DEAL_NAME__}}', _ctx.para['real_name'])
 
             prompt_obj.prompt_print('%s %s' % (_('copy pic file'), _('done')))
 
-            with open(
-                os.path.join(self._para_dict['out'], self._para_dict['name'] + '_temp.md'),
-                "w", encoding='utf-8'
-            ) as f:
-                f.write(_temp_text)
-            prompt_obj.prompt_print('\n%s %s' % (_('pre convert to temp file'), _('done')))
-
             # 调用Pandoc进行转换处理
             prompt_obj.prompt_print('%s:' % (_('use Pandoc convert'), ))
-            if platform.system() == 'Windows':
-                # Win平台要先执行chcp 65001命令
-                _sys_cmd = 'chcp 65001'
-                self._console_global_para['shell_encoding'] = 'utf-8'
-                prompt_obj.prompt_print('%s: %s' % (_('execute'), _sys_cmd))
-                if(self._exe_syscmd(_sys_cmd, shell_encoding='utf-8') != 0):
-                    return CResult(code='20999')
-
-            # 执行转换命令
-            _sys_cmd = 'pandoc %s -f markdown -t mediawiki -s -o %s' % (
-                os.path.join(self._para_dict['out'], self._para_dict['name'] + '_temp.md'),
-                os.path.join(self._para_dict['out'], self._para_dict['real_name'] + '.txt')
+            _wiki_text = self._pandoc_convert(
+                _temp_text, 'markdown', 'mediawiki', prompt_obj,
+                timeout=(_ctx.para['pandoc_timeout'] if _ctx.para['pandoc_timeout'] > 0 else None)
             )
-            prompt_obj.prompt_print('%s: %s' % (_('execute'), _sys_cmd))
-            if(self._exe_syscmd(_sys_cmd, shell_encoding='utf-8') != 0):
+            if _wiki_text is None:
                 return CResult(code='20999')
 
-            # 删除临时文件
-            FileTool.remove_file(os.path.join(
-                self._para_dict['out'], self._para_dict['name'] + '_temp.md'))
+            self._write_file_atomic(
+                os.path.join(_ctx.para['out'], _ctx.para['real_name'] + '.txt'), _wiki_text
+            )
 
             prompt_obj.prompt_print('\n=================>  %s %s' % (_('convert'), _('done')))
         except Exception as e:
@@ -227,10 +375,11 @@ class MediaWikiCmd(CmdBaseFW):
         """
         _ok_result = CResult(code='00000')
         try:
-            if not self._para_dict_check(cmd=cmd, cmd_para=cmd_para, prompt_obj=prompt_obj):
+            _ctx = self._get_convert_context(cmd_para, prompt_obj)
+            if _ctx is None:
                 return _ok_result
 
-            self._para_dict['stdpic'] = True
+            _ctx.para['stdpic'] = True
 
             # 展示处理信息
             prompt_obj.prompt_print(
@@ -238,80 +387,43 @@ class MediaWikiCmd(CmdBaseFW):
                     _('convert info')
                 )
             )
-            prompt_obj.prompt_print('  %s: %s' % (_('source file'), self._para_dict['in']))
-            prompt_obj.prompt_print('  %s: %s' % (_('out path'), self._para_dict['out']))
-            prompt_obj.prompt_print('  %s: %s' % (_('wiki page title'), self._para_dict['real_name']))
-            prompt_obj.prompt_print('  %s: %s' % (_('copy pic path'), self._para_dict['pic_dir']))
+            prompt_obj.prompt_print('  %s: %s' % (_('source file'), _ctx.para['in']))
+            prompt_obj.prompt_print('  %s: %s' % (_('out path'), _ctx.para['out']))
+            prompt_obj.prompt_print('  %s: %s' % (_('wiki page title'), _ctx.para['real_name']))
+            prompt_obj.prompt_print('  %s: %s' % (_('copy pic path'), _ctx.para['pic_dir']))
             prompt_obj.prompt_print('')
             prompt_obj.prompt_print('%s  =================>' % (_('begin convert'), ))
             prompt_obj.prompt_print('')
 
             # 删除原有复制图片
-            self._create_pic_dir()
-
-            # 先将docx转换为md
-            prompt_obj.prompt_print('%s: ' % (_('change docx file to markdown'), ))
-            if platform.system() == 'Windows':
-                # Win平台要先执行chcp 65001命令
-                _sys_cmd = 'chcp 65001'
-                self._console_global_para['shell_encoding'] = 'utf-8'
-                prompt_obj.prompt_print('%s: %s' % (_('execute'), _sys_cmd))
-                if(self._exe_syscmd(_sys_cmd, shell_encoding='utf-8') != 0):
-                    return CResult(code='20999')
+            self._create_pic_dir(_ctx)
 
-            _sys_cmd = 'pandoc %s -f docx -t markdown -s -o %s --extract-media=%s' % (
-                self._para_dict['in'],
-                os.path.join(self._para_dict['out'], self._para_dict['name'] + '_temp.md'),
-                self._para_dict['pic_dir']
+            # 一次将docx直接转换为mediawiki, 图片不由pandoc提取
+            prompt_obj.prompt_print('%s:' % (_('use Pandoc convert'), ))
+            with open(_ctx.para['in'], 'rb') as f:
+                _docx_data = f.read()
+            _wiki_text = self._pandoc_convert(
+                _docx_data, 'docx', 'mediawiki', prompt_obj,
+                timeout=(_ctx.para['pandoc_timeout'] if _ctx.para['pandoc_timeout'] > 0 else None)
             )
-            prompt_obj.prompt_print('%s: %s' % (_('execute'), _sys_cmd))
-            if(self._exe_syscmd(_sys_cmd, shell_encoding='utf-8') != 0):
+            del _docx_data
+            if _wiki_text is None:
                 return CResult(code='20999')
 
-            # 预处理markdown文件
-            prompt_obj.prompt_print('\n%s %s: ' % (_('begin'), _('begin copy pic file')))
-            _md_text = FileTool.get_file_text(os.path.join(
-                self._para_dict['out'], self._para_dict['name'] + '_temp.md'), encoding=None)
-            # 增加文件名中有()和[]的处理规则的影响支持
-            self._para_dict['pre_deal_name'] = False
-            if len(re.findall(r'[\(|\)|\[|\]]', self._para_dict['real_name'])) > 0:
-                self._para_dict['pre_deal_name'] = True
-                _md_text = _md_text.replace(self._para_dict['real_name'], '{{__PRE_DEAL_NAME__}}')
-
-            _temp_text = re.sub(
-                r'(!\[.*?\]\(.*?\)|\<img .*? /\>)(\{[width=|height=][\s\S]*?\})*',
-                self._deal_md_pic,
-                _md_text
+            # 按出现顺序将图片改为标准名, 并直接从docx压缩包中提取到图片目录
+            prompt_obj.prompt_print('\n%s %s: ' % (_('begin'), _('copy pic file')))
+            _wiki_text = re.sub(
+                r'\[\[(File|Image):((?:\./)?media/[^|\]]+)',
+                functools.partial(self._deal_docx_pic, _ctx),
+                _wiki_text
             )
-
-            if self._para_dict['pre_deal_name']:
-                # 转换回来
-                _temp_text = _temp_text.replace('{{__PRE_DEAL_NAME__}}', self._para_dict['real_name'])
-
+            self._extract_docx_pics(_ctx)
+            self._remove_stale_pics(_ctx)
             prompt_obj.prompt_print('%s %s' % (_('copy pic file'), _('done')))
-            with open(
-                os.path.join(self._para_dict['out'], self._para_dict['name'] + '_temp.md'),
-                "w", encoding='utf-8'
-            ) as f:
-                f.write(_temp_text)
-            prompt_obj.prompt_print('\n%s %s' % (_('pre convert to temp file'), _('done')))
 
-            # 调用Pandoc进行转换处理
-            prompt_obj.prompt_print('\n%s:' % (_('use Pandoc convert'), ))
-
-            # 执行转换命令
-            _sys_cmd = 'pandoc %s -f markdown -t mediawiki -s -o %s' % (
-                os.path.join(self._para_dict['out'], self._para_dict['name'] + '_temp.md'),
-                os.path.join(self._para_dict['out'], self._para_dict['real_name'] + '.txt')
+            self._write_file_atomic(
+                os.path.join(_ctx.para['out'], _ctx.para['real_name'] + '.txt'), _wiki_text
             )
-            prompt_obj.prompt_print('%s: %s' % (_('execute'), _sys_cmd))
-            if(self._exe_syscmd(_sys_cmd, shell_encoding='utf-8') != 0):
-                return CResult(code='20999')
-
-            # 删除临时文件
-            FileTool.remove_file(os.path.join(
-                self._para_dict['out'], self._para_dict['name'] + '_temp.md'))
-            FileTool.remove_dir(os.path.join(self._para_dict['pic_dir'], 'media'))
 
             prompt_obj.prompt_print('\n=================>  %s %s' % (_('convert'), _('done')))
         except Exception as e:
@@ -326,7 +438,7 @@ class MediaWikiCmd(CmdBaseFW):
 
     def _xlstowiki_cmd_dealfun(self, message='', cmd='', cmd_para='', prompt_obj=None, **kwargs):
         """
-        将Excel格式文件转换为mediawiki格式
+        将Excel格式文件(含CSV/TSV文件)转换为mediawiki格式
 
         @param {string} message='' - prompt提示信息
         @param {string} cmd - 执行的命令key值
@@ -344,10 +456,17 @@ class MediaWikiCmd(CmdBaseFW):
                 '-in': '',
                 '-out': '',
                 '-name': '',
-                '-para_name': ''
+                '-para_name': '',
+                '-summary': '',
+                '-format': 'wiki',
+                '-encoding': ''
             }
             _run_para.update(self._cmd_para_to_dict(cmd_para))
             # 参数检查及初始化
+            if _run_para['-format'] not in ('wiki', 'json'):
+                prompt_obj.prompt_print(_('not support format [$1]!', _run_para['-format']))
+                return CResult(code='20999')
+
             if _run_para['-in'] == '' or not os.path.exists(_run_para['-in']) or not os.path.isfile(_run_para['-in']):
                 # 输入文件不存在
                 prompt_obj.prompt_print(_('File \'$1\' not exists, please check [-in] para!', _run_para['-in']))
@@ -413,40 +532,80 @@ class MediaWikiCmd(CmdBaseFW):
                         _temp_para[_para_name]
                     )
 
-            # 打开文件开始逐个处理
-            _wiki_text = ''
-            _wb = xlrd.open_workbook(filename=_run_para['-in'])
-            if _convert_para['show_all_sheet']:
-                _convert_para['sheet_name_list'] = _wb.sheet_names()
-                _convert_para['sheet_index_list'] = []
-
-            for _index in _convert_para['sheet_index_list']:
-                _convert_para['sheet_name_list'].append(_wb.sheet_by_index(_index).name)
-
-            _convert_para['sheet_index_list'] = []
-
-            for _sheet_name in _convert_para['sheet_name_list']:
-                # 获取对应的转换参数
-                _sheet_para = copy.deepcopy(_convert_para['default_para'])
-                _sheet_index = _wb._sheet_names.index(_sheet_name)
-                if _sheet_index in _convert_para['sheet_index_para_list'].keys():
-                    _sheet_para.update(_convert_para['sheet_index_para_list'][_sheet_index])
-                elif _sheet_name in _convert_para['sheet_name_para_list'].keys():
-                    _sheet_para.update(_convert_para['sheet_name_para_list'][_sheet_name])
-
-                # 开始处理
-                _wiki_text = '%s\n=%s=\n%s' % (
-                    _wiki_text,
-                    _sheet_name,
-                    self._convert_xls_sheet_to_wiki(_wb, _wb.sheet_by_index(_sheet_index), _sheet_para)
-                )
+            # 打开文件开始逐个处理, 转换结果逐行写入文件
+            # 流式处理时逐行读取数据, 内存占用与表格大小无关
+            _out_file = os.path.join(_run_para['-out'], _run_para['-name'] + '.txt')
+            _read_para = {
+                'stream': ('-stream' in _run_para.keys()),
+                'encoding': _run_para['-encoding'] if _run_para['-encoding'] != '' else None
+            }
+            _out_para = {
+                'format': _run_para['-format'],  # 输出格式
+                'rows': 0,  # 超大sheet页的分页行数, 0代表不分页
+                'data_limit': 500,  # JSON数据页每次渲染的最大行数, 0代表不限制
+                'path': _run_para['-out'],
+                'name': _run_para['-name']
+            }
+            if '-page_rows' in _run_para.keys() and _run_para['-page_rows'] != '':
+                _out_para['rows'] = max(int(_run_para['-page_rows']), 0)
+            if '-data_page_limit' in _run_para.keys() and _run_para['-data_page_limit'] != '':
+                _out_para['data_limit'] = max(int(_run_para['-data_page_limit']), 0)
+            _page_files = list()  # 主页面以外输出的页面文件清单(子页面及数据页)
+            _reader = open_row_reader(_run_para['-in'], **_read_para)
+            try:
+                _all_sheet_names = _reader.sheet_names
+                _sheet_names = self._get_xls_sheet_names(_convert_para, _all_sheet_names)
+                _sheet_paras = [
+                    self._get_xls_sheet_para(_convert_para, _all_sheet_names, _sheet_name)
+                    for _sheet_name in _sheet_names
+                ]
+                _jobs = 1
+                if '-jobs' in _run_para.keys() and _run_para['-jobs'] != '':
+                    _jobs = min(max(int(_run_para['-jobs']), 1), len(_sheet_names))
+                if _jobs > 1:
+                    # 并行转换时各进程自行打开文件, 主进程无需保持打开
+                    _reader.close()
+
+                with open(_out_file + '.tmp', "w", encoding='utf-8') as f:
+                    _writer = WikiTableWriter(out_fun=f.write)
+                    if _jobs > 1:
+                        # 多个sheet页并行转换, 按sheet页顺序写入结果
+                        for _sheet_name, _result in zip(
+                            _sheet_names, self._convert_xls_sheets_parallel(
+                                _run_para['-in'], _read_para, _sheet_names, _sheet_paras, _jobs, _out_para
+                            )
+                        ):
+                            _writer.write('\n=%s=\n' % _sheet_name)
+                            _writer.write(_result[0])
+                            _page_files.extend(_result[1])
+                    else:
+                        for _sheet_name, _sheet_para in zip(_sheet_names, _sheet_paras):
+                            _writer.write('\n=%s=\n' % _sheet_name)
+                            _page_files.extend(self._convert_xls_sheet(
+                                _reader, _sheet_name, _sheet_para, _writer, _out_para
+                            ))
+                            _reader.unload(_sheet_name)
+                os.replace(_out_file + '.tmp', _out_file)
+            finally:
+                _reader.close()
+
+            if _out_para['format'] == 'json':
+                # JSON数据页需要渲染模块, 与数据页一起上传
+                _page_files.insert(0, self._write_data_module_page(_run_para['-out']))
+            elif len(_page_files) > 0:
+                prompt_obj.prompt_print('%s: %d' % (_('split sub pages'), len(_page_files)))
+
+            # 输出的页面文件清单, 批量转换时由filestowiki按文件顺序添加filter.mt信息
+            # 模块及JSON数据页需要在使用它们的页面之前上传
+            _ok_result.page_files = sorted(
+                [_run_para['-name'] + '.txt'] + _page_files, key=lambda _file: not _file.startswith('Module{ns}')
+            )
 
-            # 将结果写入文件
-            with open(
-                os.path.join(_run_para['-out'], _run_para['-name'] + '.txt'),
-                "w", encoding='utf-8'
-            ) as f:
-                f.write(_wiki_text)
+            # 增加filter.mt信息, 子页面跟随主页面一起上传
+            if '-add_filter' in _run_para.keys():
+                self._append_to_filter_mt(
+                    _run_para['-out'], self._get_filter_mt_text(_ok_result.page_files, _run_para['-summary'])
+                )
 
             prompt_obj.prompt_print('\n=================>  %s %s' % (_('convert'), _('done')))
         except Exception as e:
@@ -505,95 +664,94 @@ class MediaWikiCmd(CmdBaseFW):
                 if not os.path.exists(_run_para['source_file_dir']):
                     FileTool.create_dir(_run_para['source_file_dir'])
 
-            # 遍历文件并进行处理
+            # 遍历文件, 生成转换任务
             prompt_obj.prompt_print(_("begin convert files in $1", _run_para['-in']) + ' =======================>')
             prompt_obj.prompt_print('')
+            _task_list = list()
+            _result_list = list()
+            _manifest = None  # 增量转换的文件清单
+            _manifest_infos = dict()
+            if '-incremental' in _run_para.keys():
+                _manifest = self._load_manifest(_run_para['-out'])
+                # filter.mt只记录本次转换的文件, 让wiki_edit只发布有变化的页面
+                # 没有指定-add_filter时不处理输出目录的filter.mt, 保留用户已有的内容
+                if '-add_filter' in _run_para.keys():
+                    self._reset_filter_mt(_run_para['-out'])
+                if '-add_file_link' in _run_para.keys():
+                    self._reset_filter_mt(_run_para['source_file_dir'])
+
             _file_list = FileTool.get_filelist(path=_run_para['-in'], is_fullname=True)
             for _file in _file_list:
-                _ext = FileTool.get_file_ext(_file)
-                if _ext == 'md':
-                    prompt_obj.prompt_print('%s: %s' % (_('convert'), _file))
-                    self._mdtowiki_cmd_dealfun(
-                        message=message, cmd='mdtowiki',
-                        cmd_para="-in '%s' -out '%s'%s" % (
-                            _file, _run_para['-out'], ' -stdpic' if ('-stdpic' in _run_para.keys()) else ''
-                        ),
-                        prompt_obj=prompt_obj,
-                        **kwargs
-                    )
-                elif _ext == 'docx':
-                    prompt_obj.prompt_print('%s: %s' % (_('convert'), _file))
-                    self._docxtowiki_cmd_dealfun(
-                        message=message, cmd='docxtowiki',
-                        cmd_para="-in '%s' -out '%s'" % (
-                            _file, _run_para['-out']
-                        ),
-                        prompt_obj=prompt_obj,
-                        **kwargs
-                    )
-                elif _ext in ['xls', 'xlsx']:
-                    prompt_obj.prompt_print('%s: %s' % (_('convert'), _file))
-                    self._xlstowiki_cmd_dealfun(
-                        message=message, cmd='xlstowiki',
-                        cmd_para="-in '%s' -out '%s'" % (
-                            _file, _run_para['-out']
-                        ),
-                        prompt_obj=prompt_obj,
-                        **kwargs
-                    )
-                else:
+                _convert_cmd = self._get_file_convert_cmd(_file, _run_para)
+                if _convert_cmd is None:
                     prompt_obj.prompt_print('%s: %s' % (_('not support file format'), _file))
                     continue
 
-                # 进行额外处理
-                _filename = FileTool.get_file_name(_file)
-                _filename_no_ext = FileTool.get_file_name_no_ext(_filename)
-                _before_text = ''  # 在转换文件头要增加的内容
-                _after_text = ''  # 在转换文件结尾要增加的内容
-                if '-add_file_link' in _run_para.keys():
-                    # 复制文件到source_file_list目录
-                    shutil.copyfile(_file, os.path.join(_run_para['source_file_dir'], _filename))
-                    # 添加到filter.mt文件中
-                    _new_filename = _filename.replace('{ns}', '_').replace('{sub}', '_')
-                    self._append_to_filter_mt(
-                        _run_para['source_file_dir'],
-                        '%s|%s|%s' % (_filename, _new_filename, _run_para['-summary'])
-                    )
-                    _before_text += '原文附件：[[File:%s]]\n\n' % _new_filename
-
-                if '-add_category' in _run_para.keys():
-                    # 增加分类信息
-                    _categorys = _run_para['-add_category'].split(',')
-                    for _category in _categorys:
-                        if _category.strip() != '':
-                            _before_text += '[[category:%s]]\n' % _category.strip()
-
-                if '-add_comments' in _run_para.keys():
-                    # 增加评论信息
-                    _after_text += '\n<br>\n<br>\n<comments />'
-
-                # 修改转换后的文件内容，保存到文件中
-                _temp_text = FileTool.get_file_text(
-                    os.path.join(_run_para['-out'], _filename_no_ext + '.txt'),
-                    encoding='utf-8'
+                if _manifest is not None:
+                    # 源文件内容、转换参数及工具版本都没有变化的文件不再转换
+                    _manifest_key = os.path.relpath(_file, _run_para['-in']).replace('\\', '/')
+                    _manifest_infos[_file] = self._get_manifest_info(_file, _run_para, _convert_cmd)
+                    _old_info = _manifest.get(_manifest_key, None)
+                    if self._is_manifest_unchanged(_old_info, _manifest_infos[_file], _run_para['-out']):
+                        prompt_obj.prompt_print('%s: %s' % (_('source file not change, skip convert'), _file))
+                        _manifest_infos[_file]['outputs'] = _old_info['outputs']
+                        _result_list.append(self._get_convert_result(_file, 'skip', 0))
+                        continue
+
+                _task_list.append((_file, _convert_cmd[0], _convert_cmd[1]))
+
+            # 执行转换, 转换结果按文件顺序返回
+            _jobs = 1
+            if '-jobs' in _run_para.keys() and _run_para['-jobs'] != '':
+                _jobs = max(int(_run_para['-jobs']), 1)
+
+            if _jobs > 1 and len(_task_list) > 1:
+                _convert_results = self._convert_files_parallel(_task_list, _jobs, prompt_obj)
+            else:
+                _convert_results = self._convert_files_serial(
+                    _task_list, message=message, prompt_obj=prompt_obj, **kwargs
                 )
-                with open(
-                    os.path.join(_run_para['-out'], _filename_no_ext + '.txt'),
-                    "w", encoding='utf-8'
-                ) as f:
-                    f.write('%s%s%s' % (_before_text, _temp_text, _after_text))
-
-                # 增加filter.mt信息
-                if '-add_filter' in _run_para.keys():
 
-                    self._append_to_filter_mt(
-                        _run_para['-out'],
-                        '%s|%s|%s|%s' % (
-                            _filename_no_ext + '.txt',
-                            _filename_no_ext.replace('{ns}', ':').replace('{sub}', '/'),
-                            _run_para['-summary'], 'true'
+            _pic_store = None  # 按图片内容去重的图片库
+            if '-dedup_pic' in _run_para.keys():
+                _pic_store = self._load_pic_store(_run_para['-out'])
+
+            for _result in _convert_results:
+                if _result['status'] == 'success':
+                    # 进行额外处理
+                    try:
+                        if _pic_store is not None:
+                            # 按文件顺序处理, 先引用图片的文件负责上传图片
+                            self._dedup_converted_pics(_result['file'], _run_para, _pic_store, prompt_obj)
+                        self._deal_converted_file(_result['file'], _run_para, page_files=_result['page_files'])
+                    except Exception as e:
+                        _result['status'] = 'fail'
+                        prompt_obj.prompt_print('%s (%s):\n%s' % (
+                            _('execution exception'), str(e), traceback.format_exc()
+                        ))
+                _result_list.append(_result)
+
+            if _pic_store is not None:
+                self._save_pic_store(_run_para['-out'], _pic_store)
+
+            if _manifest is not None:
+                # 更新增量转换的文件清单, 只保留本次存在且转换成功的文件
+                _new_manifest = dict()
+                for _result in _result_list:
+                    if _result['status'] == 'success':
+                        _manifest_infos[_result['file']]['outputs'] = self._get_manifest_outputs(
+                            _result, _run_para['-out']
                         )
-                    )
+                    if _result['status'] in ('success', 'skip'):
+                        _new_manifest[
+                            os.path.relpath(_result['file'], _run_para['-in']).replace('\\', '/')
+                        ] = _manifest_infos[_result['file']]
+                self._save_manifest(_run_para['-out'], _new_manifest)
+
+            # 打印转换结果清单
+            _file_order = {_file: _index for _index, _file in enumerate(_file_list)}
+            _result_list.sort(key=lambda _result: _file_order[_result['file']])
+            self._print_convert_result(_result_list, prompt_obj)
 
             # 处理完成
             prompt_obj.prompt_print('\n=======================>  %s %s' % (_('convert files'), _('done')))
@@ -610,78 +768,543 @@ class MediaWikiCmd(CmdBaseFW):
     #############################
     # 内部函数
     #############################
-    def _para_dict_check(self, cmd='', cmd_para='', prompt_obj=None, **kwargs):
+    def _get_file_convert_cmd(self, file, run_para):
         """
-        检查并生成
+        获取批量转换时单个文件对应的转换命令
+
+        @param {string} file - 要转换的文件
+        @param {dict} run_para - filestowiki的命令参数
+
+        @return {tuple} - (cmd, cmd_para), 如果文件格式不支持返回None
+        """
+        _ext = FileTool.get_file_ext(file)
+        if _ext == 'md':
+            return ('mdtowiki', self._get_pass_cmd_para(
+                file, run_para,
+                ('-stdpic', '-engine', '-pic_jobs', '-pic_timeout', '-pic_cache', '-pic_cache_size', '-pic_mode',
+                 '-pandoc_timeout')
+            ))
+        elif _ext == 'docx':
+            return ('docxtowiki', self._get_pass_cmd_para(file, run_para, ('-pandoc_timeout', )))
+        elif _ext in SUPPORT_FILE_EXTS:
+            return ('xlstowiki', self._get_pass_cmd_para(
+                file, run_para, ('-stream', '-page_rows', '-format', '-data_page_limit')
+            ))
+        else:
+            return None
+
+    def _get_pass_cmd_para(self, file, run_para, keys):
+        """
+        生成单个文件转换命令的参数, 透传filestowiki的参数
+
+        @param {string} file - 要转换的文件
+        @param {dict} run_para - filestowiki的命令参数
+        @param {tuple} keys - 要透传的参数名清单
+
+        @return {string} - 转换命令参数
+        """
+        _cmd_para = "-in '%s' -out '%s'" % (file, run_para['-out'])
+        for _key in keys:
+            if _key not in run_para.keys():
+                continue
+            _value = run_para[_key].strip("'")
+            _cmd_para += (" %s '%s'" % (_key, _value)) if _value != '' else ' %s' % _key
+        return _cmd_para
+
+    def _convert_files_serial(self, task_list, message='', prompt_obj=None, **kwargs):
+        """
+        在当前线程逐个转换文件
+
+        @param {list} task_list - 转换任务清单, 每个任务为(file, cmd, cmd_para)
+        @param {string} message='' - prompt提示信息
+        @param {PromptPlus} prompt_obj=None - 传入调用函数的PromptPlus对象
+        @param {kwargs} - 传入的主进程的初始化kwargs对象
+
+        @return {iterator} - 按任务顺序返回每个文件的转换结果字典
+        """
+        for _file, _cmd, _cmd_para in task_list:
+            prompt_obj.prompt_print('%s: %s' % (_('convert'), _file))
+            _start = time.time()
+            _result = self._CMD_DEALFUN_DICT[_cmd](
+                message=message, cmd=_cmd, cmd_para=_cmd_para, prompt_obj=prompt_obj, **kwargs
+            )
+            yield self._get_convert_result(
+                _file, 'success' if _result.code == '00000' else 'fail', time.time() - _start,
+                page_files=getattr(_result, 'page_files', None)
+            )
+
+    def _convert_files_parallel(self, task_list, jobs, prompt_obj):
+        """
+        使用进程池并行转换文件, 每个工作进程使用独立的MediaWikiCmd对象
+
+        @param {list} task_list - 转换任务清单, 每个任务为(file, cmd, cmd_para)
+        @param {int} jobs - 并行的进程数
+        @param {PromptPlus} prompt_obj - 传入调用函数的PromptPlus对象
+
+        @return {iterator} - 按任务顺序返回每个文件的转换结果字典
+        """
+        _global_para = {
+            'work_path': self._console_global_para['work_path'],
+            'shell_encoding': self._console_global_para.get('shell_encoding', 'utf-8')
+        }
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, initializer=_filestowiki_worker_init,
+            initargs=(_global_para, get_global_i18n())
+        ) as _executor:
+            _futures = [
+                _executor.submit(_filestowiki_worker, _cmd, _cmd_para) for _file, _cmd, _cmd_para in task_list
+            ]
+            for _task, _future in zip(task_list, _futures):
+                prompt_obj.prompt_print('%s: %s' % (_('convert'), _task[0]))
+                try:
+                    _code, _print_list, _use_time, _page_files = _future.result()
+                except Exception as e:
+                    _code, _print_list, _use_time, _page_files = '20999', [
+                        '%s (%s):\n%s\n' % (_('execution exception'), str(e), traceback.format_exc())
+                    ], 0, None
+                for _str in _print_list:
+                    prompt_obj.prompt_print(_str, end='')
+                yield self._get_convert_result(
+                    _task[0], 'success' if _code == '00000' else 'fail', _use_time, page_files=_page_files
+                )
+
+    def _get_convert_result(self, file, status, use_time, page_files=None):
+        """
+        生成单个文件的转换结果字典
+
+        @param {string} file - 转换的文件
+        @param {string} status - 转换状态, success/fail/skip
+        @param {float} use_time - 转换耗时(秒)
+        @param {list} page_files=None - 转换输出的页面文件清单, 不传代表只有与源文件同名的页面
+
+        @return {dict} - 转换结果字典
+        """
+        return {
+            'file': file,
+            'status': status,
+            'use_time': use_time,
+            'out_file': FileTool.get_file_name_no_ext(file) + '.txt',
+            'page_files': page_files
+        }
+
+    def _get_manifest_info(self, file, run_para, convert_cmd):
+        """
+        获取增量转换文件清单中单个源文件的信息
+
+        @param {string} file - 源文件
+        @param {dict} run_para - filestowiki的命令参数
+        @param {tuple} convert_cmd - 文件对应的转换命令(cmd, cmd_para)
+
+        @return {dict} - 文件信息, 包括源文件内容哈希、转换参数哈希及工具版本
+        """
+        _options = {
+            'cmd': convert_cmd[0],
+            'cmd_para': convert_cmd[1]
+        }
+        for _key in ('-add_file_link', '-add_category', '-add_comments', '-add_filter', '-summary', '-dedup_pic'):
+            if _key in run_para.keys():
+                _options[_key] = run_para[_key]
+
+        if convert_cmd[0] == 'xlstowiki':
+            # Excel的转换参数来自同目录的xlstowiki.mt文件
+            _mtfile = os.path.join(FileTool.get_file_path(file), 'xlstowiki.mt')
+            if os.path.exists(_mtfile):
+                _options['xlstowiki.mt'] = self._get_file_hash(_mtfile)
+        elif convert_cmd[0] == 'mdtowiki':
+            # 引用的本地图片有变化时也需要重新转换
+            _options['pics'] = self._get_md_local_pic_hashes(file)
+
+        return {
+            'hash': self._get_file_hash(file),
+            'options': hashlib.sha256(
+                json.dumps(_options, sort_keys=True, ensure_ascii=False).encode('utf-8')
+            ).hexdigest(),
+            'version': __VERSION__
+        }
+
+    def _get_manifest_outputs(self, result, out_path):
+        """
+        获取转换成功的文件输出的页面文件及图片文件清单, 记录到增量转换的文件清单中
+
+        @param {dict} result - 文件的转换结果字典
+        @param {string} out_path - 输出目录
+
+        @return {list} - 相对输出目录的文件路径清单
+        """
+        _outputs = list(result['page_files']) if result['page_files'] else [result['out_file']]
+        _pic_dir = FileTool.get_file_name_no_ext(result['file']) + '_copy_pic'
+        if os.path.isdir(os.path.join(out_path, _pic_dir)):
+            _outputs.extend([
+                '%s/%s' % (_pic_dir, _pic_name) for _pic_name in sorted(
+                    FileTool.get_filelist(path=os.path.join(out_path, _pic_dir), is_fullname=False)
+                )
+            ])
+        return _outputs
+
+    def _is_manifest_unchanged(self, old_info, new_info, out_path):
+        """
+        判断文件是否可以跳过转换: 源文件内容、转换参数及工具版本都没有变化, 且上次输出的文件都还存在
+
+        @param {dict} old_info - 文件清单中上次转换的文件信息
+        @param {dict} new_info - 本次的文件信息
+        @param {string} out_path - 输出目录
+
+        @return {bool} - 是否可以跳过转换
+        """
+        if old_info is None or 'outputs' not in old_info.keys():
+            return False
+
+        for _key, _value in new_info.items():
+            if old_info.get(_key, None) != _value:
+                return False
+
+        for _output in old_info['outputs']:
+            if not os.path.exists(os.path.join(out_path, _output)):
+                # 输出文件被部分删除, 需要重新转换
+                return False
+        return True
+
+    def _get_md_local_pic_hashes(self, file):
+        """
+        获取md文件引用的本地图片的内容哈希
+
+        @param {string} file - md文件路径
+
+        @return {dict} - key为图片路径, value为图片内容哈希(图片不存在时为None)
+        """
+        _hashes = dict()
+        _md_text = FileTool.get_file_text(file, encoding=None)
+        for _pic_str in re.findall(r'!\[.*?\]\(.*?\)|\<img .*? /\>', _md_text):
+            _src = self._get_md_pic_src(_pic_str)[1]
+            if _src == '' or _src in _hashes.keys() or PicFetcher.is_remote(_src):
+                continue
+            _pic_file = os.path.join(FileTool.get_file_path(file), _src)
+            _hashes[_src] = self._get_file_hash(_pic_file) if os.path.isfile(_pic_file) else None
+        return _hashes
+
+    def _get_file_hash(self, file):
+        """
+        获取文件内容的哈希值
+
+        @param {string} file - 文件路径
+
+        @return {string} - sha256哈希值
+        """
+        _sha = hashlib.sha256()
+        with open(file, 'rb') as f:
+            for _chunk in iter(lambda: f.read(1024 * 1024), b''):
+                _sha.update(_chunk)
+        return _sha.hexdigest()
+
+    def _load_manifest(self, path):
+        """
+        装载输出目录中的增量转换文件清单
+
+        @param {string} path - 输出目录
+
+        @return {dict} - 文件清单字典, key为源文件相对路径, value为文件信息
+        """
+        _file = os.path.join(path, 'filestowiki_manifest.mt')
+        if not os.path.exists(_file):
+            return dict()
+
+        try:
+            return json.loads(FileTool.get_file_text(_file, encoding='utf-8'))
+        except Exception:
+            # 清单文件损坏, 全部重新转换
+            return dict()
+
+    def _save_manifest(self, path, manifest):
+        """
+        保存增量转换文件清单到输出目录
+
+        @param {string} path - 输出目录
+        @param {dict} manifest - 文件清单字典
+        """
+        _file = os.path.join(path, 'filestowiki_manifest.mt')
+        self._write_file_atomic(_file, json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True))
+
+    def _load_pic_store(self, path):
+        """
+        装载输出目录中的图片库(按图片内容去重)
+
+        @param {string} path - 输出目录
+
+        @return {dict} - 图片库字典, key为图片内容哈希, value为{'name': 图片名, 'owner': 负责上传图片的页面文件名(不含扩展名)}
+        """
+        _file = os.path.join(path, 'filestowiki_pic_store.mt')
+        if not os.path.exists(_file):
+            return dict()
+
+        try:
+            return json.loads(FileTool.get_file_text(_file, encoding='utf-8'))
+        except Exception:
+            # 图片库文件损坏, 重新建立
+            return dict()
+
+    def _save_pic_store(self, path, pic_store):
+        """
+        保存图片库到输出目录, 删除页面文件或图片已不存在的图片信息
+
+        @param {string} path - 输出目录
+        @param {dict} pic_store - 图片库字典
+        """
+        for _hash in list(pic_store.keys()):
+            _info = pic_store[_hash]
+            if not os.path.exists(os.path.join(path, _info['owner'] + '.txt')) or not os.path.exists(
+                os.path.join(path, _info['owner'] + '_copy_pic', _info['name'])
+            ):
+                del pic_store[_hash]
+
+        _file = os.path.join(path, 'filestowiki_pic_store.mt')
+        self._write_file_atomic(_file, json.dumps(pic_store, ensure_ascii=False, indent=2, sort_keys=True))
+
+    def _dedup_converted_pics(self, file, run_para, pic_store, prompt_obj):
+        """
+        对转换后文件的图片按内容去重
+        内容相同的图片统一使用图片库中的图片名, 删除重复的图片文件并修改页面中的图片引用
+
+        @param {string} file - 转换的源文件
+        @param {dict} run_para - filestowiki的命令参数
+        @param {dict} pic_store - 图片库字典
+        @param {PromptPlus} prompt_obj - 传入调用函数的PromptPlus对象
+        """
+        _filename_no_ext = FileTool.get_file_name_no_ext(file)
+        _pic_dir = os.path.join(run_para['-out'], _filename_no_ext + '_copy_pic')
+        if not os.path.isdir(_pic_dir):
+            return
+
+        _rename_dict = dict()  # key为重复的图片名, value为图片库中的图片名
+        for _pic_name in sorted(FileTool.get_filelist(path=_pic_dir, is_fullname=False)):
+            _pic_file = os.path.join(_pic_dir, _pic_name)
+            _hash = self._get_file_hash(_pic_file)
+            _info = pic_store.get(_hash, None)
+            if _info is not None and (_info['owner'], _info['name']) != (_filename_no_ext, _pic_name) and \
+                    os.path.exists(os.path.join(run_para['-out'], _info['owner'] + '_copy_pic', _info['name'])):
+                # 图片库中已有相同内容的图片
+                FileTool.remove_file(_pic_file)
+                if _info['name'] != _pic_name:
+                    _rename_dict[_pic_name] = _info['name']
+                prompt_obj.prompt_print('%s: %s -> %s' % (
+                    _('dedup pic file'), _pic_file,
+                    os.path.join(_info['owner'] + '_copy_pic', _info['name'])
+                ))
+            else:
+                pic_store[_hash] = {'name': _pic_name, 'owner': _filename_no_ext}
+
+        if len(FileTool.get_filelist(path=_pic_dir, is_fullname=False)) == 0:
+            FileTool.remove_dir(_pic_dir)
+
+        if len(_rename_dict) > 0:
+            # 修改页面中的图片引用
+            _wiki_file = os.path.join(run_para['-out'], _filename_no_ext + '.txt')
+            _text = FileTool.get_file_text(_wiki_file, encoding='utf-8')
+            # 只有命名空间不区分大小写, 图片名需要与图片文件名完全一致
+            _text = re.sub(
+                r'\[\[((?i:Image|File)):(%s)(?=[|\]])' % '|'.join(
+                    [re.escape(_name) for _name in _rename_dict.keys()]
+                ),
+                lambda _match: '[[%s:%s' % (_match.group(1), _rename_dict[_match.group(2)]),
+                _text
+            )
+            self._write_file_atomic(_wiki_file, _text)
+
+    def _deal_converted_file(self, file, run_para, page_files=None):
+        """
+        批量转换时对转换后的文件进行额外处理(原文链接、分类、评论、filter.mt)
+
+        @param {string} file - 转换的源文件
+        @param {dict} run_para - filestowiki的命令参数
+        @param {list} page_files=None - 转换输出的页面文件清单(例如Excel的子页面), 不传代表只有与源文件同名的页面
+        """
+        _filename = FileTool.get_file_name(file)
+        _filename_no_ext = FileTool.get_file_name_no_ext(_filename)
+        _before_text = ''  # 在转换文件头要增加的内容
+        _after_text = ''  # 在转换文件结尾要增加的内容
+        if '-add_file_link' in run_para.keys():
+            # 复制文件到source_file_list目录
+            shutil.copyfile(file, os.path.join(run_para['source_file_dir'], _filename))
+            # 添加到filter.mt文件中
+            _new_filename = _filename.replace('{ns}', '_').replace('{sub}', '_')
+            self._append_to_filter_mt(
+                run_para['source_file_dir'],
+                '%s|%s|%s' % (_filename, _new_filename, run_para['-summary'])
+            )
+            _before_text += '原文附件：[[File:%s]]\n\n' % _new_filename
+
+        if '-add_category' in run_para.keys():
+            # 增加分类信息
+            _categorys = run_para['-add_category'].split(',')
+            for _category in _categorys:
+                if _category.strip() != '':
+                    _before_text += '[[category:%s]]\n' % _category.strip()
+
+        if '-add_comments' in run_para.keys():
+            # 增加评论信息
+            _after_text += '\n<br>\n<br>\n<comments />'
+
+        # 修改转换后的文件内容，保存到文件中
+        if _before_text != '' or _after_text != '':
+            _wiki_file = os.path.join(run_para['-out'], _filename_no_ext + '.txt')
+            _temp_text = FileTool.get_file_text(_wiki_file, encoding='utf-8')
+            self._write_file_atomic(_wiki_file, '%s%s%s' % (_before_text, _temp_text, _after_text))
+
+        # 增加filter.mt信息, 在主进程按文件顺序添加
+        if '-add_filter' in run_para.keys():
+            self._append_to_filter_mt(
+                run_para['-out'],
+                self._get_filter_mt_text(
+                    page_files if page_files else [_filename_no_ext + '.txt'], run_para['-summary']
+                )
+            )
+
+    def _print_convert_result(self, result_list, prompt_obj):
+        """
+        打印批量转换的结果清单
+
+        @param {list} result_list - 转换结果字典清单
+        @param {PromptPlus} prompt_obj - 传入调用函数的PromptPlus对象
+        """
+        _success = 0
+        _skip = 0
+        _use_time = 0.0
+        prompt_obj.prompt_print('\n%s:' % (_('convert result'), ))
+        prompt_obj.prompt_print('  %s | %s | %s | %s' % (
+            _('status'), _('use time(s)'), _('source file'), _('out file')))
+        for _result in result_list:
+            if _result['status'] == 'success':
+                _success += 1
+            elif _result['status'] == 'skip':
+                _skip += 1
+            _use_time += _result['use_time']
+            prompt_obj.prompt_print('  %s | %.3f | %s | %s' % (
+                _(_result['status']), _result['use_time'], _result['file'],
+                _result['out_file'] if _result['status'] != 'fail' else ''
+            ))
+        prompt_obj.prompt_print('  %s: %d, %s: %d, %s: %d, %s: %d, %s: %.3f' % (
+            _('total'), len(result_list), _('success'), _success, _('skip'), _skip,
+            _('fail'), len(result_list) - _success - _skip, _('use time(s)'), _use_time
+        ))
+
+    def _get_convert_context(self, cmd_para, prompt_obj):
+        """
+        检查命令参数并生成转换任务的上下文
 
-        @param {string} cmd - 执行的命令key值
         @param {string} cmd_para - 传入的命令参数（命令后的字符串，去掉第一个空格）
+        @param {PromptPlus} prompt_obj - 传入调用函数的PromptPlus对象
 
-        @return {bool} - 如果返回空字符串代表成功，有值的字符串代表失败
+        @return {ConvertContext} - 转换任务的上下文, 参数检查失败返回None
         """
         # 获取命令执行参数
         _cmd_list = PromptPlus.get_cmd_para_list(cmd_para)
-        self._para_dict = {
+        _para = {
             'in': '',
             'out': '',
             'name': '',
             'stdpic': False,
             'pic_dir': '',
-            'pic_list': {},
-            'pic_num': 0
+            'pic_jobs': 8,
+            'pic_timeout': 30,
+            'pic_cache': None,
+            'pic_cache_size': 500,
+            'pic_mode': 'copy',
+            'engine': 'pandoc',
+            'pandoc_timeout': 600
         }
         for _item in _cmd_list:
             if '-in' == _item[0]:
-                self._para_dict['in'] = _item[1].strip("'")
+                _para['in'] = _item[1].strip("'")
             elif '-out' == _item[0]:
-                self._para_dict['out'] = _item[1].strip("'")
+                _para['out'] = _item[1].strip("'")
             elif '-name' == _item[0]:
-                self._para_dict['name'] = _item[1].strip("'")
+                _para['name'] = _item[1].strip("'")
             elif '-stdpic' == _item[0]:
-                self._para_dict['stdpic'] = True
+                _para['stdpic'] = True
+            elif '-engine' == _item[0]:
+                _para['engine'] = _item[1].strip("'").lower()
+            elif '-pic_jobs' == _item[0]:
+                _para['pic_jobs'] = max(int(_item[1].strip("'")), 1)
+            elif '-pic_timeout' == _item[0]:
+                _para['pic_timeout'] = float(_item[1].strip("'"))
+            elif '-pic_cache' == _item[0]:
+                _para['pic_cache'] = _item[1].strip("'")
+                if _para['pic_cache'] == '':
+                    _para['pic_cache'] = os.path.join(
+                        os.path.expanduser('~'), '.mediawikiTool', 'pic_cache'
+                    )
+            elif '-pic_cache_size' == _item[0]:
+                _para['pic_cache_size'] = float(_item[1].strip("'"))
+            elif '-pic_mode' == _item[0]:
+                _para['pic_mode'] = _item[1].strip("'").lower()
+            elif '-pandoc_timeout' == _item[0]:
+                _para['pandoc_timeout'] = float(_item[1].strip("'"))
+
+        if _para['engine'] not in ('pandoc', 'native'):
+            prompt_obj.prompt_print(_('not support convert engine [$1]!', _para['engine']))
+            return None
+
+        if _para['pic_mode'] not in ('copy', 'hardlink', 'reflink', 'symlink'):
+            prompt_obj.prompt_print(_('not support pic mode [$1]!', _para['pic_mode']))
+            return None
 
         # 参数检查及初始化
-        if self._para_dict['in'] == '' or not os.path.exists(self._para_dict['in']) or not os.path.isfile(self._para_dict['in']):
+        if _para['in'] == '' or not os.path.exists(_para['in']) or not os.path.isfile(_para['in']):
             # 输入文件不存在
-            prompt_obj.prompt_print(_('File \'$1\' not exists, please check [-in] para!', self._para_dict['in']))
-            return False
+            prompt_obj.prompt_print(_('File \'$1\' not exists, please check [-in] para!', _para['in']))
+            return None
 
-        self._para_dict['in'] = os.path.realpath(self._para_dict['in'])  # 获取全路径
-        self._para_dict['in_dir'] = FileTool.get_file_path(self._para_dict['in'])
+        _para['in'] = os.path.realpath(_para['in'])  # 获取全路径
+        _para['in_dir'] = FileTool.get_file_path(_para['in'])
 
-        if self._para_dict['out'] == '':
-            self._para_dict['out'] = self._console_global_para['work_path']  # 使用工作路径
+        if _para['out'] == '':
+            _para['out'] = self._console_global_para['work_path']  # 使用工作路径
         else:
-            if not os.path.exists(self._para_dict['out']):
-                # 创建对应目录
-                FileTool.create_dir(self._para_dict['out'])
-            self._para_dict['out'] = os.path.realpath(self._para_dict['out'])
+            # 创建对应目录(同时转换多个文件时目录可能已由其他线程创建)
+            os.makedirs(_para['out'], exist_ok=True)
+            _para['out'] = os.path.realpath(_para['out'])
 
-        if self._para_dict['name'] == '':
-            self._para_dict['name'] = FileTool.get_file_name_no_ext(self._para_dict['in'])
+        if _para['name'] == '':
+            _para['name'] = FileTool.get_file_name_no_ext(_para['in'])
 
         # 保存真正的名字 - 命名空间间隔符用{ns}替代，子页面间隔符用{sub}替代
-        self._para_dict['real_name'] = self._para_dict['name']
-        self._para_dict['name'] = self._para_dict['name'].replace('{ns}', '_').replace('{sub}', '_')
+        _para['real_name'] = _para['name']
+        _para['name'] = _para['name'].replace('{ns}', '_').replace('{sub}', '_')
 
-        self._para_dict['pic_dir'] = os.path.join(
-            self._para_dict['out'], self._para_dict['real_name'] + '_copy_pic')
+        _para['pic_dir'] = os.path.join(
+            _para['out'], _para['real_name'] + '_copy_pic')
 
-        return True
+        return ConvertContext(_para, prompt_obj)
 
-    def _deal_md_pic(self, match_str):
+    def _deal_md_pic(self, ctx, match_str):
         """
         针对获取到的md图片路径字符串进行文件处理和替换
 
+        @param {ConvertContext} ctx - 转换任务的上下文
         @param {re.Match} match_str - 匹配到的对象
 
         @return {string} - 替换后的图片字符串
         """
-        _str = match_str.group()
-        # 提取图片路径信息
+        _alt, _src = self._get_md_pic_src(match_str.group())
+
+        # 增加文件名中有()和[]的处理规则的影响支持
+        if ctx.pre_deal_name:
+            # 转换回来
+            _src = _src.replace('{{__PRE_DEAL_NAME__}}', ctx.para['real_name'])
+            _alt = _alt.replace('{{__PRE_DEAL_NAME__}}', ctx.para['real_name'])
+
+        return self._deal_pic_src(ctx, _src, _alt)
+
+    def _get_md_pic_src(self, pic_str):
+        """
+        从md的图片字符串中提取图片说明及路径
+
+        @param {string} pic_str - 图片字符串, 例如'![alt](src)'或'<img src="src" alt="alt" />'
+
+        @return {tuple} - (alt, src)
+        """
+        _str = pic_str
         _alt = ''
         _src = ''
-        _name = ''
         if _str.startswith('!['):
             # ![img004](mdtowiki_pic/img004.png)的格式
             _p_alt = re.compile(r'!\[(.*?)\]')
@@ -699,24 +1322,97 @@ class MediaWikiCmd(CmdBaseFW):
             if len(_temp) > 0:
                 _src = _temp[0].strip('\'"')
 
-        # 增加文件名中有()和[]的处理规则的影响支持
-        if self._para_dict['pre_deal_name']:
-            # 转换回来
-            _src = _src.replace('{{__PRE_DEAL_NAME__}}', self._para_dict['real_name'])
-            _alt = _alt.replace('{{__PRE_DEAL_NAME__}}', self._para_dict['real_name'])
+        return (_alt, _src)
+
+    def _deal_pic_src(self, ctx, src, alt):
+        """
+        对图片进行文件处理(复制或下载), 并返回替换后的wiki图片字符串
+
+        @param {ConvertContext} ctx - 转换任务的上下文
+        @param {string} src - 图片路径
+        @param {string} alt - 图片说明
+
+        @return {string} - 替换后的图片字符串
+        """
+        _name = self._get_pic_name(ctx, src)
+
+        # 改写文件
+        if alt == '':
+            return '[[Image:%s]]' % (_name, )
+        else:
+            return '[[Image:%s|%s]]' % (_name, alt)
+
+    def _deal_docx_pic(self, ctx, match_str):
+        """
+        将pandoc输出的wiki文本中的docx提取图片路径替换为标准图片名
+
+        @param {ConvertContext} ctx - 转换任务的上下文
+        @param {re.Match} match_str - 匹配到的对象, group(1)为File/Image, group(2)为提取的图片路径
+
+        @return {string} - 替换后的图片字符串
+        """
+        return '[[%s:%s' % (match_str.group(1), self._get_pic_name(ctx, match_str.group(2)))
+
+    def _extract_docx_pics(self, ctx):
+        """
+        从docx压缩包中将图片直接流式写入图片目录的标准图片名文件(不产生中间文件)
+
+        @param {ConvertContext} ctx - 转换任务的上下文
+        """
+        if len(ctx.pic_tasks) == 0:
+            return
+
+        with zipfile.ZipFile(ctx.para['in']) as _zip:
+            _entrys = {_entry.lower(): _entry for _entry in _zip.namelist()}
+            for _src, _name in ctx.pic_tasks:
+                try:
+                    # 文本中的路径为相对word目录的路径, 例如media/image1.png
+                    _path = _src.replace('\\', '/').lower()
+                    if _path.startswith('./'):
+                        _path = _path[2:]
+                    _entry = _entrys.get('word/' + _path, _entrys.get(_path, None))
+                    if _entry is None:
+                        raise FileNotFoundError('[%s] not found in docx file' % _src)
+
+                    _dest_file = os.path.join(ctx.para['pic_dir'], _name)
+                    PicFetcher.remove_dest(_dest_file)
+                    with _zip.open(_entry) as _fsrc, open(
+                        _dest_file, 'wb'
+                    ) as _fdest:
+                        shutil.copyfileobj(_fsrc, _fdest, 1024 * 1024)
+                    ctx.prompt_obj.prompt_print('%s: %s -> %s %s' % (_('copy pic file'), _src, _name, _('done')))
+                except Exception as e:
+                    ctx.prompt_obj.prompt_print(
+                        '%s: %s -> %s %s ( %s ):\n %s' % (
+                            _('copy pic file'), _src, _name, _('execution exception'), str(e),
+                            traceback.format_exc()
+                        )
+                    )
+        ctx.pic_tasks = list()
+
+    def _get_pic_name(self, ctx, src):
+        """
+        获取图片对应的wiki图片名, 第一次出现的图片将加入待处理任务清单
+
+        @param {ConvertContext} ctx - 转换任务的上下文
+        @param {string} src - 图片路径
+
+        @return {string} - wiki图片名
+        """
+        _src = src
+        _name = ''
 
         # 检查文件是否已经处理过
-        if _src in self._para_dict['pic_list']:
-            _name = self._para_dict['pic_list'][_src]
-            self._prompt_obj.prompt_print('%s: %s -> %s %s' % (_('copy pic file'), _src, _name, _('done')))
+        if _src in ctx.pic_list:
+            _name = ctx.pic_list[_src]
         else:
             # 未处理过
-            if self._para_dict['stdpic']:
+            if ctx.para['stdpic']:
                 # 按顺序命名
-                self._para_dict['pic_num'] = self._para_dict['pic_num'] + 1
+                ctx.pic_num = ctx.pic_num + 1
                 _name = '%s_%s_%s.%s' % (
-                    self._para_dict['name'], _('embed'),
-                    StringTool.fill_fix_string(str(self._para_dict['pic_num']), 5, '0'),
+                    ctx.para['name'], _('embed'),
+                    StringTool.fill_fix_string(str(ctx.pic_num), 5, '0'),
                     FileTool.get_file_ext(_src)
                 )
             else:
@@ -729,113 +1425,227 @@ class MediaWikiCmd(CmdBaseFW):
                     _name = _temp_str[_index + 1:]
 
                 _name = '%s_%s_%s' % (
-                    self._para_dict['name'], _('embed'), _name
+                    ctx.para['name'], _('embed'), _name
                 )
 
-            # 加入到清单中
-            self._para_dict['pic_list'][_src] = _name
+            # 加入到清单中, 文本改写完成后再统一复制或下载文件
+            ctx.pic_list[_src] = _name
+            ctx.pic_tasks.append((_src, _name))
 
-            # 复制或下载文件
-            try:
-                self._down_md_pic(_src, os.path.join(self._para_dict['pic_dir'], _name))
-                self._prompt_obj.prompt_print('%s: %s -> %s %s' % (_('copy pic file'), _src, _name, _('done')))
-            except Exception as e:
-                # 提示
-                self._prompt_obj.prompt_print(
+        return _name
+
+    def _get_pic_fetcher(self):
+        """
+        获取进程内共享的图片获取工具(保持网络长连接)
+
+        @return {PicFetcher} - 图片获取工具
+        """
+        with _SHARED_LOCK:
+            _fetcher = RunTool.get_global_var('PIC_FETCHER')
+            if _fetcher is None:
+                _fetcher = PicFetcher(user_agent='mediawikiTool/%s' % __VERSION__)
+                RunTool.set_global_var('PIC_FETCHER', _fetcher)
+        return _fetcher
+
+    def _get_pic_cache(self, ctx):
+        """
+        获取进程内共享的网络图片缓存
+
+        @param {ConvertContext} ctx - 转换任务的上下文
+        @return {PicCache} - 图片缓存, 没有指定-pic_cache参数返回None
+        """
+        if ctx.para['pic_cache'] is None:
+            return None
+
+        _path = os.path.realpath(ctx.para['pic_cache'])
+        _max_size = int(ctx.para['pic_cache_size'] * 1024 * 1024)
+        with _SHARED_LOCK:
+            _cache = RunTool.get_global_var('PIC_CACHE')
+            if _cache is None or _cache.path != _path:
+                _cache = PicCache(_path, max_size=_max_size)
+                RunTool.set_global_var('PIC_CACHE', _cache)
+            else:
+                _cache.max_size = _max_size
+        return _cache
+
+    def _fetch_pics(self, ctx):
+        """
+        并发复制或下载文本中引用的图片(按图片在文本中出现的顺序输出处理结果)
+
+        @param {ConvertContext} ctx - 转换任务的上下文
+        """
+        _task_list = list()
+        for _src, _name in ctx.pic_tasks:
+            if PicFetcher.is_remote(_src):
+                _task_list.append((_src, os.path.join(ctx.para['pic_dir'], _name)))
+            else:
+                # 本地文件，按源文件所在目录复制
+                _task_list.append((
+                    os.path.join(ctx.para['in_dir'], _src),
+                    os.path.join(ctx.para['pic_dir'], _name)
+                ))
+
+        _errors = self._get_pic_fetcher().fetch_all(
+            _task_list, jobs=ctx.para['pic_jobs'], timeout=ctx.para['pic_timeout'],
+            cache=self._get_pic_cache(ctx), mode=ctx.para['pic_mode']
+        )
+        for _task, _error in zip(ctx.pic_tasks, _errors):
+            if _error is None:
+                ctx.prompt_obj.prompt_print('%s: %s -> %s %s' % (_('copy pic file'), _task[0], _task[1], _('done')))
+            else:
+                ctx.prompt_obj.prompt_print(
                     '%s: %s -> %s %s ( %s ):\n %s' % (
-                        _('copy pic file'), _src, _name, _('execution exception'), str(e),
-                        traceback.format_exc()
+                        _('copy pic file'), _task[0], _task[1], _('execution exception'), str(_error),
+                        ''.join(traceback.format_exception(type(_error), _error, _error.__traceback__))
                     )
                 )
+        ctx.pic_tasks = list()
 
-        # 改写文件
-        if _alt == '':
-            return '[[Image:%s]]' % (_name, )
-        else:
-            return '[[Image:%s|%s]]' % (_name, _alt)
+    def _get_pandoc_server(self, prompt_obj, timeout=None):
+        """
+        获取控制台会话内共享的pandoc服务(第一次获取时启动)
+        已启动服务的超时时间小于要求的超时时间时, 按新的超时时间重启服务
+
+        @param {PromptPlus} prompt_obj - 输出提示信息的对象
+        @param {float} timeout=None - 单次转换的超时时间(秒), None代表不超时
+
+        @return {PandocServer} - pandoc服务对象
+        """
+        with _SHARED_LOCK:
+            _server = RunTool.get_global_var('PANDOC_SERVER')
+            if _server is not None and _server.is_available and _server.convert_timeout is not None \
+                    and (timeout is None or timeout > _server.convert_timeout):
+                _server.stop()
+                _server = None
+
+            if _server is None:
+                _server = PandocServer(convert_timeout=timeout)
+                RunTool.set_global_var('PANDOC_SERVER', _server)
+                if _server.start():
+                    # 控制台退出时关闭服务
+                    atexit.register(_server.stop)
+                    prompt_obj.prompt_print('%s: pandoc %s' % (_('start Pandoc server'), _server.version))
+        return _server
+
+    def _pandoc_convert(self, text, from_format, to_format, prompt_obj, timeout=None):
+        """
+        调用pandoc进行格式转换, 转换内容在内存中传递, 不产生临时文件
+        优先使用会话内常驻的pandoc服务, 服务不可用(pandoc版本低于3.0)时通过管道调用pandoc命令
 
-    def _down_md_pic(self, src, dest):
+        @param {string|bytes} text - 要转换的内容, 二进制格式(例如docx)传入bytes
+        @param {string} from_format - 源格式, 例如markdown、docx
+        @param {string} to_format - 目标格式, 例如markdown、mediawiki
+        @param {PromptPlus} prompt_obj - 输出提示信息的对象
+        @param {float} timeout=None - 转换的超时时间(秒), None代表不超时
+
+        @return {string} - 转换后的文本, 转换失败返回None
+        """
+        _server = self._get_pandoc_server(prompt_obj, timeout=timeout)
+        if _server.is_available:
+            try:
+                _wiki_text = _server.convert(text, from_format, to_format, timeout=timeout)
+                prompt_obj.prompt_print('%s: %s -> %s %s' % (
+                    _('use Pandoc server convert'), from_format, to_format, _('done')))
+                return _wiki_text
+            except PandocServerUnavailable as e:
+                # 服务不可用或连接失败, 改为使用命令行方式
+                prompt_obj.prompt_print('%s %s ( %s ), %s' % (
+                    _('use Pandoc server convert'), _('fail'), str(e), _('change to use Pandoc command')))
+            except PandocServerTimeout:
+                # 超时的文档使用命令行方式同样会超时, 不再重试
+                prompt_obj.prompt_print('%s : %ss' % (_('Command execute timeout'), str(timeout)))
+                return None
+            except Exception as e:
+                prompt_obj.prompt_print('%s %s ( %s )' % (_('use Pandoc server convert'), _('fail'), str(e)))
+                return None
+
+        _args = ['pandoc', '-f', from_format, '-t', to_format, '-s']
+        prompt_obj.prompt_print('%s: %s' % (_('execute'), ' '.join(_args)))
+
+        _sp = subprocess.Popen(
+            _args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            start_new_session=(platform.system() != 'Windows')
+        )
+        try:
+            # 同时写入标准输入及读取标准输出/错误输出, 避免管道阻塞
+            _out, _err = _sp.communicate(
+                input=text if isinstance(text, bytes) else text.encode('utf-8'), timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            prompt_obj.prompt_print('%s : %ss' % (_('Command execute timeout'), str(timeout)))
+            self._kill_syscmd(_sp)
+            return None
+        except KeyboardInterrupt:
+            # 遇到 Ctrl + C 终止命令并退出
+            prompt_obj.prompt_print(_('Cancle Command execute, exit job!'))
+            self._kill_syscmd(_sp)
+            return None
+
+        if _sp.returncode != 0:
+            _show_str = _err.decode('utf-8', errors='replace').strip()
+            if _show_str != '':
+                prompt_obj.prompt_print(_show_str)
+            prompt_obj.prompt_print('%s : %d' % (_("Command done, exit code"), _sp.returncode))
+            return None
+
+        prompt_obj.prompt_print('%s' % (_("Command execute done"), ))
+        return _out.decode('utf-8').replace('\r\n', '\n')
+
+    def _write_file_atomic(self, file, text):
         """
-        将图片文件下载到指定路径
+        写入文本文件, 先写入临时文件再替换, 避免中断时留下不完整的文件
 
-        @param {string} src - 要下载的文件路径
-        @param {string} dest - 目标文件
+        @param {string} file - 要写入的文件
+        @param {string} text - 文件内容
         """
-        if src.startswith('http://') or src.startswith('https://'):
-            # 网络图片，需要下载
-            _resp = requests.get(src)
-            with open(dest, "wb") as f:
-                f.write(_resp.content)
-        else:
-            # 本地文件，进行复制
-            _src_file = os.path.join(self._para_dict['in_dir'], src)
-            shutil.copyfile(_src_file, dest)
+        with open(file + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(file + '.tmp', file)
 
-    def _exe_syscmd(self, cmd, shell_encoding='utf-8'):
+    def _kill_syscmd(self, sp):
         """
-        执行系统命令
-
-        @param {string} cmd - 要执行的命令
-        @param {string} shell_encoding='utf-8' - 界面编码
+        终止执行中的系统命令(包括命令启动的子进程)
 
-        @return {int} - 返回执行结果
+        @param {subprocess.Popen} sp - 命令的进程对象
         """
-        _sp = subprocess.Popen(
-            cmd, close_fds=True,
-            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            shell=True
-        )
-        # 循环等待执行完成
-        _exit_code = None
-        try:
-            while True:
-                try:
-                    # 打印内容
-                    _show_str = _sp.stdout.readline().decode(shell_encoding).strip()
-                    if _show_str != '':
-                        self._prompt_obj.prompt_print(_show_str)
-
-                    _exit_code = _sp.poll()
-                    if _exit_code is not None:
-                        # 结束，打印异常日志
-                        _show_str = _sp.stdout.read().decode(shell_encoding).strip()
-                        if _show_str != '':
-                            self._prompt_obj.prompt_print(_show_str)
-                        if _exit_code != 0:
-                            _show_str = _sp.stderr.read().decode(shell_encoding).strip()
-                            if _show_str != '':
-                                self._prompt_obj.prompt_print(_show_str)
-                        break
-                    # 释放一下CPU
-                    time.sleep(0.01)
-                except KeyboardInterrupt:
-                    # 不允许取消
-                    self._prompt_obj.prompt_print(_("Command Executing, can't exit execute job!"))
-        except KeyboardInterrupt:
-            # 遇到 Ctrl + C 退出
-            pass
+        if sp.poll() is not None:
+            return
 
-        # 最后返回
-        if _exit_code is not None:
-            if _exit_code != 0:
-                # 执行错误，显示异常
-                self._prompt_obj.prompt_print('%s : %d' % (_("Command done, exit code"), _exit_code))
+        try:
+            if platform.system() == 'Windows':
+                subprocess.call(
+                    'taskkill /F /T /PID %d' % sp.pid,
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                )
             else:
-                self._prompt_obj.prompt_print('%s' % (_("Command execute done"), ))
-
-        return _exit_code
+                os.killpg(sp.pid, signal.SIGKILL)
+        except Exception:
+            sp.kill()
+        sp.wait()
 
-    def _create_pic_dir(self):
+    def _create_pic_dir(self, ctx):
         """
-        新建或删除图片复制目录
+        新建图片复制目录
+        已存在的图片保留, 以便大小和修改时间一致的图片无需重新复制, 转换完成后通过_remove_stale_pics清理
+
+        @param {ConvertContext} ctx - 转换任务的上下文
         """
-        if os.path.exists(self._para_dict['pic_dir']):
-            FileTool.remove_files(path=self._para_dict['pic_dir'])
-        else:
+        if not os.path.exists(ctx.para['pic_dir']):
             # 创建目录
-            FileTool.create_dir(self._para_dict['pic_dir'])
+            FileTool.create_dir(ctx.para['pic_dir'])
+
+        ctx.prompt_obj.prompt_print('%s %s' % (_('make pic path'), _('done')))
+
+    def _remove_stale_pics(self, ctx):
+        """
+        删除图片复制目录中本次转换没有引用的图片
 
-        self._prompt_obj.prompt_print('%s %s' % (_('make pic path'), _('done')))
+        @param {ConvertContext} ctx - 转换任务的上下文
+        """
+        _names = set(ctx.pic_list.values())
+        for _file in FileTool.get_filelist(path=ctx.para['pic_dir'], is_fullname=False):
+            if _file not in _names:
+                FileTool.remove_file(os.path.join(ctx.para['pic_dir'], _file))
 
     def _append_to_filter_mt(self, path, text):
         """
@@ -847,88 +1657,333 @@ class MediaWikiCmd(CmdBaseFW):
         with open(os.path.join(path, 'filter.mt'), 'a+', encoding='utf-8') as f:
             f.writelines('\n' + text)
 
-    def _convert_xls_sheet_to_wiki(self, wb, sheet, conver_para):
+    def _get_filter_mt_text(self, page_files, summary):
         """
-        将Excel的sheet页转换为wiki表格样式
+        生成页面文件在filter.mt中的信息
 
-        @param {WorkBook} wb - Excel打开的工作簿
-        @param {Sheet} sheet - 要处理的sheet页
-        @param {dict} conver_para - 转换参数
+        @param {list} page_files - 页面文件名清单
+        @param {string} summary - 编辑摘要
 
-        @return {string} - 转换后的wiki显示表格字符串
+        @return {string} - filter.mt信息, 每个页面一行
         """
-        # 处理列过滤取值
-        _col_filter = conver_para['col_filter']
-        if len(_col_filter) == 0:
-            if conver_para['data_col_start'] > 0 or conver_para['data_cols_end'] >= 0:
-                # 直接将需要的列转换为_col_filter
-                if conver_para['data_cols_end'] < 0:
-                    conver_para['data_cols_end'] = sheet.ncols - 1
-                _col_filter = [_i for _i in range(conver_para['data_col_start'], conver_para['data_cols_end'] + 1)]
+        return '\n'.join([
+            '%s|%s|%s|%s' % (_file, self._get_page_title(_file[0: -4]), summary, 'true')
+            for _file in page_files
+        ])
 
-        # 先清洗数据到数组中
-        _sheet_name = sheet.name
-        _head = []
-        _data = []
-        # 标题行
-        if conver_para['has_head']:
-            # 处理标题行
-            _head = self._xls_rows_to_strlist(sheet.row(conver_para['head_row']))
-            if len(_col_filter) > 0:
-                _head = [_head[_i] for _i in _col_filter]
-            # 显示转换
-            _i = 0
-            while _i < len(_head):
-                if _head[_i] in conver_para['head_trans_dict'].keys():
-                    _head[_i] = conver_para['head_trans_dict'][_head[_i]]
-                _i += 1
+    def _reset_filter_mt(self, path):
+        """
+        清空filter.mt文件(保留空文件, 没有要发布的页面时wiki_edit不会发布目录下的所有文件)
+
+        @param {string} path - 文件所在路径
+        """
+        self._write_file_atomic(os.path.join(path, 'filter.mt'), '')
+
+    def _get_xls_sheet_names(self, convert_para, all_sheet_names):
+        """
+        获取要转换的sheet页名清单
+
+        @param {dict} convert_para - xlstowiki的转换参数
+        @param {list} all_sheet_names - Excel文件的所有sheet页名
 
-        # 数据数组
-        if conver_para['data_row_end'] < 0:
-            conver_para['data_row_end'] = sheet.nrows - 1
+        @return {list} - 要转换的sheet页名清单
+        """
+        if convert_para['show_all_sheet']:
+            return list(all_sheet_names)
+
+        _sheet_names = list(convert_para['sheet_name_list'])
+        for _index in convert_para['sheet_index_list']:
+            _sheet_names.append(all_sheet_names[_index])
+        return _sheet_names
+
+    def _get_xls_sheet_para(self, convert_para, all_sheet_names, sheet_name):
+        """
+        获取sheet页对应的转换参数
+
+        @param {dict} convert_para - xlstowiki的转换参数
+        @param {list} all_sheet_names - Excel文件的所有sheet页名
+        @param {string} sheet_name - sheet页名
+
+        @return {dict} - sheet页的转换参数
+        """
+        # 转换过程不会修改参数, 浅复制即可
+        _sheet_para = dict(convert_para['default_para'])
+        _sheet_index = all_sheet_names.index(sheet_name)
+        if _sheet_index in convert_para['sheet_index_para_list'].keys():
+            _sheet_para.update(convert_para['sheet_index_para_list'][_sheet_index])
+        elif sheet_name in convert_para['sheet_name_para_list'].keys():
+            _sheet_para.update(convert_para['sheet_name_para_list'][sheet_name])
+        return _sheet_para
+
+    def _convert_xls_sheets_parallel(self, file, read_para, sheet_names, sheet_paras, jobs, out_para):
+        """
+        使用进程池并行转换sheet页
 
-        _row = conver_para['data_row_start']
-        while _row <= conver_para['data_row_end']:
-            _row_data = self._xls_rows_to_strlist(sheet.row(_row))
-            # 转换显示值
-            for _tran_index in conver_para['col_trans_dict'].keys():
-                _index_num = int(_tran_index)
-                if _row_data[_index_num] in conver_para['col_trans_dict'][_tran_index].keys():
-                    _row_data[_index_num] = conver_para['col_trans_dict'][_tran_index][_row_data[_index_num]]
+        @param {string} file - Excel文件路径
+        @param {dict} read_para - 打开文件的参数(stream, encoding)
+        @param {list} sheet_names - 要转换的sheet页名清单
+        @param {list} sheet_paras - 与sheet_names对应的转换参数清单
+        @param {int} jobs - 并行的进程数
+        @param {dict} out_para - 输出参数
 
-            # 处理显示列
-            if len(_col_filter) > 0:
-                _row_data = [_row_data[_i] for _i in _col_filter]
+        @return {iterator} - 按sheet页顺序返回每个sheet页的(wiki文本, 输出的其他页面文件名清单)
+        """
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as _executor:
+            _futures = [
+                _executor.submit(_xlstowiki_sheet_worker, file, read_para, _sheet_name, _sheet_para, out_para)
+                for _sheet_name, _sheet_para in zip(sheet_names, sheet_paras)
+            ]
+            for _future in _futures:
+                yield _future.result()
+
+    def _convert_xls_sheet(self, reader, sheet_name, conver_para, writer, out_para):
+        """
+        按输出参数转换Excel的sheet页, 数据行数超过分页行数的sheet页拆分为子页面输出
 
-            # 加入到数组中
-            _data.append(_row_data)
-            _row += 1
+        @param {XlsRowReader|CsvRowReader} reader - 表格文件的行读取对象
+        @param {string} sheet_name - 要处理的sheet页名
+        @param {dict} conver_para - 转换参数
+        @param {WikiTableWriter} writer - 输出主页面的对象
+        @param {dict} out_para - 输出参数
+            format : 输出格式, wiki-直接输出wiki表格, json-输出为JSON数据页, 主页面通过模块渲染
+            rows : 每个子页面的数据行数, 0代表不分页
+            data_limit : JSON数据页每次渲染的最大行数, 0代表不限制
+            path : 页面文件的输出路径
+            name : 主页面的文件名(不含扩展名)
+
+        @return {list} - 主页面以外输出的页面文件名清单
+        """
+        _plan = XlsSheetPlan(conver_para, to_str=reader.to_str)
 
-        # 处理显示的wiki文本
         # 表格标题头
-        _wiki_text = '{| class="wikitable sortable"\n|+%s\n!%s\n' % (
-            _sheet_name, '\n!'.join(_head)
-        )
+        _head = []
+        if _plan.has_head:
+            _head = _plan.convert_head(reader.read_values(sheet_name, _plan.head_row))
+
         # 表格数据
-        for _row_data in _data:
-            _wiki_text = '%s|-\n|%s\n' % (
-                _wiki_text, '\n|'.join(_row_data)
+        _rows = (
+            _plan.convert_row(_values) for _values in reader.iter_values(
+                sheet_name, start_row=_plan.data_row_start, end_row=_plan.data_row_end
+            )
+        )
+
+        if out_para['rows'] > 0:
+            # 先读取一页多一行的数据, 判断是否需要分页
+            _first_rows = list(itertools.islice(_rows, out_para['rows'] + 1))
+            _rows = itertools.chain(_first_rows, _rows)
+            if len(_first_rows) > out_para['rows']:
+                return self._write_xls_sheet_pages(sheet_name, _head, _rows, writer, out_para)
+
+        if out_para['format'] == 'json':
+            # 数据输出到JSON数据页, 主页面通过模块渲染
+            _sheet_page_name = '%s{sub}%s' % (out_para['name'], self._get_sheet_page_name(sheet_name))
+            _data_file = 'Module{ns}%s.json.txt' % _sheet_page_name
+            _row_count = self._write_xls_data_page(out_para['path'], _data_file, sheet_name, _head, _rows)
+            return [_data_file] + self._write_xls_data_view(
+                writer, _sheet_page_name, '%s#%s' % (self._get_page_title(out_para['name']), sheet_name),
+                _data_file, _row_count, out_para
             )
+
+        writer.begin_table(sheet_name, _head, css_class='wikitable sortable')
+        writer.add_rows(_rows)
+
         # 表格结尾
-        _wiki_text = '%s%s' % (_wiki_text, '|}\n')
+        writer.end_table()
+        return list()
+
+    def _write_xls_data_page(self, path, data_file, caption, head, rows):
+        """
+        将表格数据输出为JSON数据页文件
+
+        @param {string} path - 输出路径
+        @param {string} data_file - 数据页文件名
+        @param {string} caption - 表格标题
+        @param {list} head - 表格头字符串数组
+        @param {iterator} rows - 已转换的数据行
+
+        @return {int} - 数据行数
+        """
+        _data_path = os.path.join(path, data_file)
+        _counter = itertools.count()  # 统计数据行数
+        with open(_data_path + '.tmp', 'w', encoding='utf-8') as f:
+            _data_writer = WikiJsonDataWriter(out_fun=f.write)
+            _data_writer.begin_table(caption, head)
+            _data_writer.add_rows(_row for _row, _ in zip(rows, _counter))
+            _data_writer.end_table()
+        os.replace(_data_path + '.tmp', _data_path)
+        return next(_counter)
+
+    def _write_xls_data_view(self, writer, view_name, first_title, data_file, row_count, out_para):
+        """
+        在页面中输出渲染JSON数据页的调用文本, 每次只渲染data_limit行
+        数据行数超过data_limit时, 其余的行输出到'view_name{sub}offset{sub}跳过行数'的分页页面, 各页面输出分页链接
+
+        @param {WikiTableWriter} writer - 输出页面的对象
+        @param {string} view_name - 分页页面的文件名前缀(不含扩展名)
+        @param {string} first_title - 显示第一页数据的页面标题(分页链接使用)
+        @param {string} data_file - JSON数据页文件名
+        @param {int} row_count - 数据行数
+        @param {dict} out_para - 输出参数, 与_convert_xls_sheet的out_para一致
+
+        @return {list} - 分页页面文件名清单
+        """
+        _limit = out_para['data_limit']
+        _data_title = self._get_page_title(data_file[0: -4])
+        _offsets = [0]
+        if _limit > 0:
+            _offsets = list(range(0, max(row_count, 1), _limit))
+
+        _view_prefix = '%s{sub}offset{sub}' % view_name
+        _titles = [first_title] + [
+            self._get_page_title('%s%d' % (_view_prefix, _offset)) for _offset in _offsets[1:]
+        ]
+        _ranges = ['%d - %d' % (_offset + 1, min(_offset + _limit, row_count)) for _offset in _offsets]
+
+        def _nav_text(current):
+            # 分页链接, 当前页不加链接
+            return '%s\n' % ' | '.join([
+                ("'''%s'''" % _range) if _offset == current else ('[[%s|%s]]' % (_title, _range))
+                for _offset, _title, _range in zip(_offsets, _titles, _ranges)
+            ])
+
+        _page_files = list()
+        for _offset in _offsets:
+            _text = WikiJsonDataWriter.get_invoke_text(_data_title, limit=_limit, offset=_offset)
+            if len(_offsets) > 1:
+                _text = _nav_text(_offset) + _text
+            if _offset == 0:
+                writer.write(_text)
+            else:
+                _page_file = '%s%d.txt' % (_view_prefix, _offset)
+                self._write_file_atomic(os.path.join(out_para['path'], _page_file), _text)
+                _page_files.append(_page_file)
+
+        # 删除上次转换遗留的多余分页页面
+        self._remove_xls_data_views(out_para['path'], view_name, keep_offsets=_offsets[1:])
+        return _page_files
+
+    def _remove_xls_data_views(self, path, view_name, keep_offsets=()):
+        """
+        删除JSON数据页的分页页面文件
+
+        @param {string} path - 输出路径
+        @param {string} view_name - 分页页面的文件名前缀(不含扩展名)
+        @param {list} keep_offsets=() - 要保留的分页页面的跳过行数清单
+        """
+        _prefix = '%s{sub}offset{sub}' % view_name
+        for _file in os.listdir(path):
+            if _file.startswith(_prefix) and re.fullmatch(r'\d+\.txt', _file[len(_prefix):]) is not None \
+                    and int(_file[len(_prefix): -4]) not in keep_offsets:
+                FileTool.remove_file(os.path.join(path, _file))
+
+    def _write_data_module_page(self, path):
+        """
+        输出渲染JSON数据页的模块页面文件, 内容没有变化时不重复写入
+
+        @param {string} path - 输出路径
+
+        @return {string} - 模块页面文件名
+        """
+        _module_file = 'Module{ns}%s.txt' % DATA_MODULE_NAME
+        _module_path = os.path.join(path, _module_file)
+        if not os.path.exists(_module_path) or FileTool.get_file_text(
+            _module_path, encoding='utf-8'
+        ) != DATA_MODULE_TEXT:
+            # 批量并行转换时多个进程可能同时写入, 临时文件按进程区分
+            with open('%s.%d.tmp' % (_module_path, os.getpid()), 'w', encoding='utf-8') as f:
+                f.write(DATA_MODULE_TEXT)
+            os.replace('%s.%d.tmp' % (_module_path, os.getpid()), _module_path)
+        return _module_file
+
+    def _write_xls_sheet_pages(self, sheet_name, head, rows, writer, page_para):
+        """
+        将sheet页的数据按分页行数拆分输出到子页面文件, 并在主页面输出子页面索引
+        子页面文件名为'主页面名{sub}sheet页名{sub}页码', 上传后的页面为'主页面/sheet页名/页码'
+        JSON格式时每个子页面的数据输出到'Module{ns}主页面名{sub}sheet页名{sub}页码.json'数据页, 子页面通过模块渲染
+
+        @param {string} sheet_name - sheet页名
+        @param {list} head - 表格头字符串数组
+        @param {iterator} rows - 已转换的数据行
+        @param {WikiTableWriter} writer - 输出主页面的对象
+        @param {dict} page_para - 分页参数, 与_convert_xls_sheet的out_para一致
+
+        @return {list} - 子页面文件名清单(JSON格式时包括数据页, 数据页在使用它的子页面之前)
+        """
+        _page_files = list()
+        _page_no = 0
+        _main_title = self._get_page_title(page_para['name'])
+        _sub_name = '%s{sub}%s{sub}' % (page_para['name'], self._get_sheet_page_name(sheet_name))
+        _row_start = 1
+        while True:
+            _page_rows = itertools.islice(rows, page_para['rows'])
+            _first_row = next(_page_rows, None)
+            if _first_row is None:
+                break
+
+            _page_no += 1
+            _page_file = '%s%d.txt' % (_sub_name, _page_no)
+            _page_path = os.path.join(page_para['path'], _page_file)
+            _caption = '%s (%d)' % (sheet_name, _page_no)
+            _counter = itertools.count()  # 统计子页面的数据行数
+            _page_rows = (
+                _row for _row, _ in zip(itertools.chain([_first_row], _page_rows), _counter)
+            )
+            with open(_page_path + '.tmp', 'w', encoding='utf-8') as f:
+                _page_writer = WikiTableWriter(out_fun=f.write)
+                _page_writer.write('[[%s#%s|%s]]\n' % (_main_title, sheet_name, _main_title))
+                if page_para['format'] == 'json':
+                    _data_file = 'Module{ns}%s.json.txt' % _page_file[0: -4]
+                    _data_rows = self._write_xls_data_page(page_para['path'], _data_file, _caption, head, _page_rows)
+                    _page_files.append(_data_file)
+                    _page_files.extend(self._write_xls_data_view(
+                        _page_writer, _page_file[0: -4], self._get_page_title(_page_file[0: -4]),
+                        _data_file, _data_rows, page_para
+                    ))
+                else:
+                    _page_writer.begin_table(_caption, head, css_class='wikitable sortable')
+                    _page_writer.add_rows(_page_rows)
+                    _page_writer.end_table()
+            os.replace(_page_path + '.tmp', _page_path)
+
+            # 主页面输出子页面索引
+            _row_count = next(_counter)
+            writer.write('* [[%s|%d - %d]]\n' % (
+                self._get_page_title(_page_file[0: -4]), _row_start, _row_start + _row_count - 1
+            ))
+            _page_files.append(_page_file)
+            _row_start += _row_count
+
+        # 删除上次转换遗留的多余子页面及数据页
+        _index = _page_no + 1
+        while os.path.exists(os.path.join(page_para['path'], '%s%d.txt' % (_sub_name, _index))):
+            FileTool.remove_file(os.path.join(page_para['path'], '%s%d.txt' % (_sub_name, _index)))
+            _data_path = os.path.join(page_para['path'], 'Module{ns}%s%d.json.txt' % (_sub_name, _index))
+            if os.path.exists(_data_path):
+                FileTool.remove_file(_data_path)
+            self._remove_xls_data_views(page_para['path'], '%s%d' % (_sub_name, _index))
+            _index += 1
+
+        return _page_files
+
+    def _get_sheet_page_name(self, sheet_name):
+        """
+        将sheet页名转换为可用于文件名及页面标题的名字
+
+        @param {string} sheet_name - sheet页名
 
-        # 返回结果
-        return _wiki_text
+        @return {string} - 替换了特殊字符的名字
+        """
+        return re.sub(r'[\\/:*?"<>|\[\]{}#]', '_', sheet_name)
 
-    def _xls_rows_to_strlist(self, rows):
+    def _get_page_title(self, name):
         """
-        将一行转换为字符串数组返回
+        将文件名格式的页面名转换为wiki页面标题
 
-        @param {xlrd.sheet.Cell[]} rows - 行数组
+        @param {string} name - 文件名格式的页面名(不含扩展名), 使用{ns}代表命名空间分隔, {sub}代表子页面分隔
 
-        @return {list} - 字符数组
+        @return {string} - wiki页面标题
         """
-        return [str(row.value) for row in rows]
+        return name.replace('{ns}', ':').replace('{sub}', '/')
 
 
 class MediaWikiSite(CmdBaseFW):
@@ -958,6 +2013,10 @@ class MediaWikiSite(CmdBaseFW):
             'wiki_contributions': self._wiki_contributions_cmd_dealfun
         }
         self._mwsite = None
+        self._session_cache = None  # 登录会话的缓存
+        self._meta_cache = None  # 网站元数据的缓存
+        self._scheduler = None  # 网站请求的调度适配器
+        self._interwiki = dict()  # 网站的interwiki前缀与url的对应字典
         self._console_global_para = RunTool.get_global_var('CONSOLE_GLOBAL_PARA')
 
     #############################
@@ -990,7 +2049,11 @@ class MediaWikiSite(CmdBaseFW):
 
         # 执行函数
         if _real_dealfun is not None:
-            return _real_dealfun(message=message, cmd=cmd, cmd_para=cmd_para, prompt_obj=prompt_obj, **kwargs)
+            if self._scheduler is not None:
+                self._scheduler.reset_stats()
+            _result = _real_dealfun(message=message, cmd=cmd, cmd_para=cmd_para, prompt_obj=prompt_obj, **kwargs)
+            self._print_request_stats()
+            return _result
         else:
             prompt_obj.prompt_print(_("'$1' is not support command!", cmd))
             return CResult(code='11404', i18n_msg_paras=(cmd, ))
@@ -1025,7 +2088,12 @@ class MediaWikiSite(CmdBaseFW):
                 'consumer_token=': None,
                 'consumer_secret=': None,
                 'access_token=': None,
-                'access_secret=': None
+                'access_secret=': None,
+                'session_ttl=': '86400',
+                'meta_ttl=': '86400',
+                'rate=': '10',
+                'max_retries=': '5',
+                'maxlag=': '5'
             }
             self._site_para.update(self._cmd_para_to_dict(cmd_para))
             if '{para}1' not in self._site_para.keys():
@@ -1074,8 +2142,8 @@ class MediaWikiSite(CmdBaseFW):
                 prompt_obj.prompt_print(_('not connect to wiki site yet, please use wikiconnect to connect!'))
                 return CResult(code='20999')
 
-            # 连接到wiki网站
-            self._connect_to_wikisite()
+            # 连接到wiki网站, 不使用缓存的登录会话
+            self._connect_to_wikisite(force_login=True)
 
             # 返回提示
             prompt_obj.prompt_print(
@@ -1120,6 +2188,14 @@ class MediaWikiSite(CmdBaseFW):
                 _('username'), self._site_para['username=']
             )
         )
+        if self._mwsite.initialized:
+            prompt_obj.prompt_print(
+                ' %s:%s  %s:%s  %s:%d' % (
+                    _('site version'), self._mwsite.site['generator'],
+                    _('user groups'), ','.join(self._mwsite.groups),
+                    _('interwiki count'), len(self._interwiki)
+                )
+            )
         return CResult(code='00000')
 
     def _wiki_getpage_cmd_dealfun(self, message='', cmd='', cmd_para='', prompt_obj=None, **kwargs):
@@ -1146,6 +2222,8 @@ class MediaWikiSite(CmdBaseFW):
                 'title': '',
                 '-output': '',
                 '-filename': None,
+                '-jobs': '',
+                '-max_pages': ''
             }
             self._getpage_para.update(self._cmd_para_to_dict(cmd_para))
             if '{para}1' not in self._getpage_para.keys():
@@ -1169,16 +2247,24 @@ class MediaWikiSite(CmdBaseFW):
                 if self._getpage_para['-L'] != '':
                     _max_level = int(self._getpage_para['-L'])
 
+            # 并发获取页面的线程数及最多获取的页面数
+            _jobs = 1
+            if self._getpage_para['-jobs'] != '':
+                _jobs = max(int(self._getpage_para['-jobs']), 1)
+            _max_pages = 0
+            if self._getpage_para['-max_pages'] != '':
+                _max_pages = max(int(self._getpage_para['-max_pages']), 0)
+
             # 执行页面获取
-            self._get_page_objs = dict()
-            self._get_wiki_page(
+            self._get_wiki_pages(
                 self._getpage_para['title'], self._getpage_para['-output'],
                 filename=self._getpage_para['-filename'],
                 down_file=('-d' in self._getpage_para.keys()),
                 get_links=('-L' in self._getpage_para.keys()),
                 max_level=_max_level,
                 expandtemplates=('-e' in self._getpage_para.keys()),
-                get_templates=('-t' in self._getpage_para.keys())
+                get_templates=('-t' in self._getpage_para.keys()),
+                jobs=_jobs, max_pages=_max_pages
             )
         except Exception as e:
             _prin_str = '%s (%s):\n%s' % (
@@ -1228,6 +2314,9 @@ class MediaWikiSite(CmdBaseFW):
                 is_fullname=False
             )
             # 删除过滤文件
+            for _mt_file in ('filestowiki_manifest.mt', 'filestowiki_pic_store.mt'):
+                if _mt_file in self._upload_para['file_list']:
+                    self._upload_para['file_list'].remove(_mt_file)
             if 'filter.mt' in self._upload_para['file_list']:
                 self._upload_para['file_list'].remove('filter.mt')
                 if self._upload_para['-filter'] == '':
@@ -1251,6 +2340,9 @@ class MediaWikiSite(CmdBaseFW):
                 desc=self._upload_para['-desc'],
                 ignore=('-I' in self._upload_para.keys())
             )
+
+            # 保存操作过程中获取的令牌
+            self._save_session()
         except Exception as e:
             _prin_str = '%s (%s):\n%s' % (
                 _('execution exception'), str(e), traceback.format_exc()
@@ -1301,6 +2393,9 @@ class MediaWikiSite(CmdBaseFW):
                 is_fullname=False
             )
             # 删除过滤文件
+            for _mt_file in ('filestowiki_manifest.mt', 'filestowiki_pic_store.mt'):
+                if _mt_file in self._edit_para['file_list']:
+                    self._edit_para['file_list'].remove(_mt_file)
             if 'filter.mt' in self._edit_para['file_list']:
                 self._edit_para['file_list'].remove('filter.mt')
                 if self._edit_para['-filter'] == '':
@@ -1330,6 +2425,8 @@ class MediaWikiSite(CmdBaseFW):
                 file_desc=self._edit_para['-FD']
             )
 
+            # 保存操作过程中获取的令牌
+            self._save_session()
         except Exception as e:
             _prin_str = '%s (%s):\n%s' % (
                 _('execution exception'), str(e), traceback.format_exc()
@@ -1475,110 +2572,61 @@ class MediaWikiSite(CmdBaseFW):
             prompt_obj.prompt_print(_('create ranking page') + '....', end=' ')
 
             # 团队贡献排行
-            _wiki_text = '%s: %s\n\n\n=%s=\n%s\n{| class="wikitable"\n|+%s\n!%s\n' % (
+            _writer = WikiTableWriter()
+            _writer.write('%s: %s\n\n\n=%s=\n%s\n' % (
                 _('statistical date'), _now_str,
                 '%s %s' % (_('team'), _('contribution ranking')),
-                _namespace_ranking_para['description'],
+                _namespace_ranking_para['description']
+            ))
+            _writer.begin_table(
                 '%s %s' % (_('team'), _('contribution ranking')),
-                '\n!'.join(
-                    [
-                        _('rank'), _('team'), _('publish page count'), _('last month add'),
-                        _('last month change'), _('last week add'), _('last week change'),
-                    ])
+                [
+                    _('rank'), _('team'), _('publish page count'), _('last month add'),
+                    _('last month change'), _('last week add'), _('last week change'),
+                ]
             )
             _i = 1
             for _row_data in _namespace_ranking_para['sorted_data']:
-                _wiki_text = '%s|-\n|%s\n' % (
-                    _wiki_text, '\n|'.join([
-                        str(_i), _row_data[0], str(_row_data[1]['count']),
-                        str(_row_data[1]['last_month_add']), str(_row_data[1]['last_month_change']),
-                        str(_row_data[1]['last_week_add']), str(_row_data[1]['last_week_change']),
-                    ])
-                )
-                _i += 1
-
-            _wiki_text = '%s%s' % (_wiki_text, '|}\n')
-
-            # 总排行
-            _wiki_text = '%s\n\n=%s=\n==%s==\n%s\n{| class="wikitable"\n|+%s\n!%s\n' % (
-                _wiki_text, '%s %s' % (_('person'), _('contribution ranking')),
-                '%s %s' % (_('total'), _('contribution ranking')),
-                _person_ranking_para['description_total'],
-                '%s %s' % (_('total'), _('contribution ranking')),
-                '\n!'.join([
-                    _('rank'), _('user'), _('add page count'), _('change page count'), _('ranking scroe')
-                ])
-            )
-
-            _i = 1
-            for _row_data in _person_ranking_para['sorted_data_total']:
-                if _i < _person_ranking_para['top'] and _row_data[1]['total_ranking_scroe'] > 0:
-                    _wiki_text = '%s|-\n|%s\n' % (
-                        _wiki_text, '\n|'.join([
-                            str(_i), _row_data[0], str(_row_data[1]['total_add']),
-                            str(_row_data[1]['total_change']),
-                            str(round(_row_data[1]['total_ranking_scroe'], 2))
-                        ])
-                    )
-                else:
-                    break
-                _i += 1
-
-            _wiki_text = '%s%s' % (_wiki_text, '|}\n')
-
-            # 月榜
-            _wiki_text = '%s\n\n==%s==\n%s\n{| class="wikitable"\n|+%s\n!%s\n' % (
-                _wiki_text,
-                '%s %s' % (_('last month'), _('contribution ranking')),
-                _person_ranking_para['description_last_month'],
-                '%s %s' % (_('last month'), _('contribution ranking')),
-                '\n!'.join([
-                    _('rank'), _('user'), _('add page count'), _('change page count'), _('ranking scroe')
+                _writer.add_row([
+                    str(_i), _row_data[0], str(_row_data[1]['count']),
+                    str(_row_data[1]['last_month_add']), str(_row_data[1]['last_month_change']),
+                    str(_row_data[1]['last_week_add']), str(_row_data[1]['last_week_change']),
                 ])
-            )
-
-            _i = 1
-            for _row_data in _person_ranking_para['sorted_data_month']:
-                if _i < _person_ranking_para['top'] and _row_data[1]['last_month_ranking_scroe'] > 0:
-                    _wiki_text = '%s|-\n|%s\n' % (
-                        _wiki_text, '\n|'.join([
-                            str(_i), _row_data[0], str(_row_data[1]['last_month_add']),
-                            str(_row_data[1]['last_month_change']),
-                            str(round(_row_data[1]['last_month_ranking_scroe'], 2))
-                        ])
-                    )
-                else:
-                    break
                 _i += 1
 
-            _wiki_text = '%s%s' % (_wiki_text, '|}\n')
-
-            # 周榜
-            _wiki_text = '%s\n\n==%s==\n%s\n{| class="wikitable"\n|+%s\n!%s\n' % (
-                _wiki_text,
-                '%s %s' % (_('last week'), _('contribution ranking')),
-                _person_ranking_para['description_last_week'],
-                '%s %s' % (_('last week'), _('contribution ranking')),
-                '\n!'.join([
-                    _('rank'), _('user'), _('add page count'), _('change page count'), _('ranking scroe')
-                ])
-            )
-
-            _i = 1
-            for _row_data in _person_ranking_para['sorted_data_week']:
-                if _i < _person_ranking_para['top'] and _row_data[1]['last_week_ranking_scroe'] > 0:
-                    _wiki_text = '%s|-\n|%s\n' % (
-                        _wiki_text, '\n|'.join([
-                            str(_i), _row_data[0], str(_row_data[1]['last_week_add']),
-                            str(_row_data[1]['last_week_change']),
-                            str(round(_row_data[1]['last_week_ranking_scroe'], 2))
+            _writer.end_table()
+
+            # 个人排行: 总排行、月榜、周榜
+            _person_head = [
+                _('rank'), _('user'), _('add page count'), _('change page count'), _('ranking scroe')
+            ]
+            _writer.write('\n\n=%s=\n' % ('%s %s' % (_('person'), _('contribution ranking')), ))
+            for _title, _description, _sorted_key, _data_key in (
+                (_('total'), 'description_total', 'sorted_data_total', 'total'),
+                (_('last month'), 'description_last_month', 'sorted_data_month', 'last_month'),
+                (_('last week'), 'description_last_week', 'sorted_data_week', 'last_week')
+            ):
+                if _data_key != 'total':
+                    _writer.write('\n\n')
+                _writer.write('==%s==\n%s\n' % (
+                    '%s %s' % (_title, _('contribution ranking')),
+                    _person_ranking_para[_description]
+                ))
+                _writer.begin_table('%s %s' % (_title, _('contribution ranking')), _person_head)
+
+                _i = 1
+                for _row_data in _person_ranking_para[_sorted_key]:
+                    if _i < _person_ranking_para['top'] and _row_data[1][_data_key + '_ranking_scroe'] > 0:
+                        _writer.add_row([
+                            str(_i), _row_data[0], str(_row_data[1][_data_key + '_add']),
+                            str(_row_data[1][_data_key + '_change']),
+                            str(round(_row_data[1][_data_key + '_ranking_scroe'], 2))
                         ])
-                    )
-                else:
-                    break
-                _i += 1
+                    else:
+                        break
+                    _i += 1
 
-            _wiki_text = '%s%s' % (_wiki_text, '|}\n')
+                _writer.end_table()
 
             _before_text = ''
             if '-add_category' in _contributions_para.keys():
@@ -1593,7 +2641,8 @@ class MediaWikiSite(CmdBaseFW):
                 os.path.join(_contributions_para['-out'], _contributions_para['-name'] + '.txt'),
                 "w", encoding='utf-8'
             ) as f:
-                f.write('%s%s' % (_before_text, _wiki_text))
+                f.write(_before_text)
+                f.write(_writer.get_text())
 
             # 增加filter.mt信息
             if '-add_filter' in _contributions_para.keys():
@@ -1621,9 +2670,12 @@ class MediaWikiSite(CmdBaseFW):
     #############################
     # 内部函数
     #############################
-    def _connect_to_wikisite(self):
+    def _connect_to_wikisite(self, force_login=False):
         """
         连接到wiki网站
+        old-login验证模式下登录会话缓存在本地, 有效期内重新连接时复用缓存的cookie及令牌, 会话失效时自动重新登录
+
+        @param {bool} force_login=False - 是否不使用缓存的会话, 强制重新登录
         """
         _client_certificate = None
         if self._site_para['auth='] == 'ssl':
@@ -1647,22 +2699,489 @@ class MediaWikiSite(CmdBaseFW):
             consumer_token=self._site_para['consumer_token='],
             consumer_secret=self._site_para['consumer_secret='],
             access_token=self._site_para['access_token='],
-            access_secret=self._site_para['access_secret=']
+            access_secret=self._site_para['access_secret='],
+            max_lag=int(self._site_para['maxlag=']),
+            max_retries=1,
+            do_init=False
+        )
+
+        # 所有请求经过调度适配器限速及重试(mwclient自身只在适配器重试失败后再重试一次)
+        self._scheduler = WikiRequestScheduler(
+            rate=float(self._site_para['rate=']), max_retries=int(self._site_para['max_retries='])
         )
+        self._mwsite.connection.mount('http://', self._scheduler)
+        self._mwsite.connection.mount('https://', self._scheduler)
+
+        # 装载缓存的登录会话, 再获取网站信息(同时确认会话的登录状态)
+        self._session_cache = None
+        self._meta_cache = None
+        _tokens = None
+        if self._site_para['auth='] == 'old-login' and float(self._site_para['session_ttl=']) > 0:
+            self._session_cache = WikiSessionCache(
+                os.path.join(os.path.expanduser('~'), '.mediawikiTool', 'session'),
+                '%s://%s%s|%s' % (
+                    self._site_para['scheme='], self._site_para['host'], self._site_para['path='],
+                    self._site_para['username=']
+                ),
+                ttl=float(self._site_para['session_ttl='])
+            )
+            if force_login:
+                self._session_cache.clear()
+            else:
+                _tokens = self._session_cache.load(self._mwsite.connection.cookies)
+
+        _meta_cached = self._load_site_meta(force_refresh=force_login)
+        _refresh_meta = _meta_cached  # 使用了缓存时在后台重新获取
+        if not _refresh_meta:
+            try:
+                if self._meta_cache is not None:
+                    # 获取网站信息的同时更新缓存, 无需再在后台重新获取
+                    self._fetch_site_meta(self._mwsite, self._meta_cache)
+                else:
+                    self._mwsite.site_init()
+            except mwclient.errors.APIError as e:
+                # 私有wiki网站, 登录后再获取网站信息
+                if e.code not in ('unknown_action', 'readapidenied'):
+                    raise
+                _refresh_meta = True
 
         # 登陆验证
         if self._site_para['auth='] == 'old-login':
-            self._mwsite.login(
-                username=self._site_para['username='], password=self._site_para['password=']
+            if _tokens is not None and _meta_cached:
+                # 缓存的用户信息不代表会话仍然有效, 重新获取当前用户确认
+                self._check_login_user()
+            if _tokens is not None and self._is_login_user():
+                # 缓存的会话仍然有效(使用元数据缓存时在后台重新确认)
+                self._mwsite.tokens.update(_tokens)
+            else:
+                # 登录后用户信息有变化, 需要更新缓存
+                self._login_wikisite()
+                _refresh_meta = True
+
+        # 在后台重新获取网站元数据并更新缓存
+        if _refresh_meta and self._meta_cache is not None:
+            threading.Thread(
+                target=self._refresh_site_meta, args=(self._mwsite, self._meta_cache, self._session_cache),
+                name='wiki_meta_refresh', daemon=True
+            ).start()
+
+    def _print_request_stats(self):
+        """
+        打印当前命令的网站请求统计(有重试或被限速时才打印)
+        """
+        if self._scheduler is None:
+            return
+
+        _stats = self._scheduler.get_stats()
+        if _stats['retries'] > 0 or _stats['throttled'] > 0:
+            self._prompt_obj.prompt_print(
+                _('request stats: $1 requests, $2 retries, $3 throttled, wait $4 seconds',
+                  str(_stats['requests']), str(_stats['retries']), str(_stats['throttled']),
+                  '%.1f' % _stats['wait_time'])
+            )
+
+    def _load_site_meta(self, force_refresh=False):
+        """
+        从本地缓存装载网站元数据(siteinfo、命名空间、interwiki及用户权限), 避免每次连接都要等待网站返回
+
+        @param {bool} force_refresh=False - 是否不使用缓存(仍会在连接后重新获取并更新缓存)
+
+        @return {bool} - 是否已使用缓存完成网站信息的初始化
+        """
+        _ttl = float(self._site_para['meta_ttl='])
+        if _ttl <= 0:
+            return False
+
+        self._meta_cache = WikiSiteMetaCache(
+            os.path.join(os.path.expanduser('~'), '.mediawikiTool', 'meta'),
+            '%s://%s%s' % (self._site_para['scheme='], self._site_para['host'], self._site_para['path=']),
+            ttl=_ttl
+        )
+        _meta = None if force_refresh else self._meta_cache.load()
+        _user_key = self._get_meta_user_key()
+        if _meta is None or _user_key not in _meta['users'].keys():
+            return False
+
+        self._apply_site_meta(self._mwsite, _meta, _meta['users'][_user_key])
+        return True
+
+    def _get_meta_user_key(self):
+        """
+        获取网站元数据缓存中用户信息的标识
+        由验证模式及对应的凭据身份(用户名、客户端证书或OAuth令牌)组成, 凭据部分只保存哈希值
+
+        @return {string} - 用户信息的标识
+        """
+        _auth = self._site_para['auth=']
+        if _auth in ('old-login', 'http'):
+            _identity = self._site_para['username=']
+        elif _auth == 'ssl':
+            _identity = '%s|%s' % (self._site_para['client_pem='], self._site_para['key_pem='])
+        elif _auth == 'OAuth':
+            _identity = '%s|%s' % (self._site_para['consumer_token='], self._site_para['access_token='])
+        else:
+            _identity = ''
+        return '%s|%s' % (_auth, hashlib.sha256(_identity.encode('utf-8')).hexdigest())
+
+    def _refresh_site_meta(self, site, meta_cache, session_cache):
+        """
+        重新获取网站元数据并更新缓存(在后台线程中执行), 同时确认缓存的登录会话是否仍然有效
+
+        @param {mwclient.Site} site - 要获取元数据的网站对象
+        @param {WikiSiteMetaCache} meta_cache - 网站元数据的缓存
+        @param {WikiSessionCache} session_cache - 登录会话的缓存, 为None代表不缓存会话
+        """
+        try:
+            self._fetch_site_meta(site, meta_cache)
+            if session_cache is not None and site is self._mwsite and not self._is_login_user():
+                # 缓存的会话已失效, 下次连接时重新登录
+                session_cache.clear()
+        except Exception:
+            # 保留原有的缓存, 下次连接时再重新获取
+            pass
+
+    def _fetch_site_meta(self, site, meta_cache):
+        """
+        获取网站元数据(一次请求获取siteinfo、命名空间、interwiki及用户信息), 设置到网站对象上并更新缓存
+
+        @param {mwclient.Site} site - 要获取元数据的网站对象
+        @param {WikiSiteMetaCache} meta_cache - 网站元数据的缓存
+        """
+        _query = site.get(
+            'query', meta='siteinfo|userinfo', siprop='general|namespaces|interwikimap',
+            uiprop='groups|rights'
+        )['query']
+        _meta = {
+            'general': _query['general'],
+            'namespaces': {
+                str(_ns['id']): _ns.get('*', '') for _ns in _query['namespaces'].values()
+            },
+            'interwiki': {
+                _iw['prefix']: _iw['url'] for _iw in _query.get('interwikimap', [])
+            }
+        }
+        _userinfo = {
+            'name': _query['userinfo']['name'],
+            'groups': _query['userinfo'].get('groups', []),
+            'rights': _query['userinfo'].get('rights', []),
+            'anon': 'anon' in _query['userinfo']
+        }
+        self._apply_site_meta(site, _meta, _userinfo)
+        meta_cache.save(_meta, user_key=self._get_meta_user_key(), userinfo=_userinfo)
+
+    def _apply_site_meta(self, site, meta, userinfo):
+        """
+        将网站元数据设置到网站对象上(与mwclient.Site.site_init的处理一致)
+
+        @param {mwclient.Site} site - 网站对象
+        @param {dict} meta - 网站元数据字典
+        @param {dict} userinfo - 用户信息字典
+        """
+        site.site = meta['general']
+        site.namespaces = {int(_id): _name for _id, _name in meta['namespaces'].items()}
+        site.writeapi = 'writeapi' in site.site
+        site.version = site.version_tuple_from_generator(site.site['generator'])
+        site.username = userinfo['name']
+        site.groups = userinfo['groups']
+        site.rights = userinfo['rights']
+        site.logged_in = not userinfo['anon']
+        site.initialized = True
+        if site is self._mwsite:
+            self._interwiki = meta['interwiki']
+
+    def _login_wikisite(self):
+        """
+        登录wiki网站(old-login验证模式), 并保存登录会话到缓存
+        """
+        self._mwsite.connection.cookies.clear()
+        self._mwsite.tokens.clear()
+        self._mwsite.login(
+            username=self._site_para['username='], password=self._site_para['password=']
+        )
+        self._save_session()
+
+    def _save_session(self):
+        """
+        保存当前的登录会话到缓存
+        """
+        if self._session_cache is not None:
+            self._session_cache.save(self._mwsite.connection.cookies, self._mwsite.tokens)
+
+    def _get_assert_para(self):
+        """
+        获取写操作的登录断言参数, old-login验证模式下要求服务端确认是登录用户, 会话失效时返回assertuserfailed错误
+
+        @return {dict} - 断言参数
+        """
+        if self._site_para['auth='] == 'old-login':
+            return {'assert': 'user'}
+        return dict()
+
+    def _check_login_user(self):
+        """
+        重新获取网站的当前用户信息(只查询userinfo), 更新网站对象的登录状态
+        """
+        try:
+            _userinfo = self._mwsite.get('query', meta='userinfo', uiprop='groups|rights')['query']['userinfo']
+        except mwclient.errors.APIError as e:
+            # 私有wiki网站未登录时无法查询
+            if e.code != 'readapidenied':
+                raise
+            _userinfo = {'name': '', 'anon': ''}
+
+        self._mwsite.username = _userinfo['name']
+        self._mwsite.groups = _userinfo.get('groups', [])
+        self._mwsite.rights = _userinfo.get('rights', [])
+        self._mwsite.logged_in = 'anon' not in _userinfo
+
+    def _is_login_user(self):
+        """
+        判断网站的当前登录用户是否为连接参数指定的用户
+
+        @return {bool} - 是否已登录
+        """
+        if not self._mwsite.logged_in:
+            return False
+
+        # wiki的用户名首字母大写, 下划线与空格等价
+        _username = self._site_para['username='].replace('_', ' ').strip()
+        return self._mwsite.username == _username[0: 1].upper() + _username[1:]
+
+    def _call_with_relogin(self, fun):
+        """
+        执行网站的写操作, 遇到令牌或登录失效的错误时重新登录后再执行一次
+
+        @param {function} fun - 执行操作的函数(无参数)
+
+        @return {object} - 函数的返回值
+        """
+        try:
+            return fun()
+        except (mwclient.errors.AssertUserFailedError, mwclient.errors.APIError) as e:
+            _code = getattr(e, 'code', 'assertuserfailed')
+            if self._site_para['auth='] != 'old-login' or _code not in (
+                'badtoken', 'assertuserfailed', 'assertbotfailed', 'notloggedin', 'mustbeloggedin'
+            ):
+                raise
+
+        self._prompt_obj.prompt_print(_('login session expired, login again'))
+        self._login_wikisite()
+        _result = fun()
+        self._save_session()
+        return _result
+
+    def _get_wiki_pages(self, title, output, filename=None, down_file=False, get_links=False,
+                        max_level=3, expandtemplates=False, get_templates=False, jobs=1, max_pages=0):
+        """
+        按层级广度优先获取wiki指定页面及其链接、模板页面
+        同一层级的页面按批次(每批50个, 有apihighlimits权限时500个)一次查询页面内容、文件、链接及模板, 再并发保存
+
+        @param {string} title - 页面标题
+        @param {string} output - 输出路径
+        @param {string} filename=None - 保存页面文件名
+        @param {bool} down_file=False - 是否下载页面包含的文件
+        @param {bool} get_links=False - 是否下载页面包含的内部链接页面
+        @param {int} max_level=3 - 下载内部链接页面的最大层级
+        @param {bool} expandtemplates=False - 是否展开模板
+        @param {bool} get_templates=False - 是否获取页面包含的模板
+        @param {int} jobs=1 - 并发获取页面的线程数
+        @param {int} max_pages=0 - 最多获取的页面数, 0代表不限制
+        """
+        self._get_page_objs = {title: ''}  # 已处理的页面及文件, 所有线程共享
+        self._get_page_lock = threading.Lock()
+        self._print_lock = threading.Lock()  # 页面线程完成时输出缓存的信息, 与主线程的输出互斥
+        _page_count = 1
+        _level_tasks = [{
+            'title': title, 'filename': filename, 'down_file': down_file, 'get_links': get_links,
+            'current_level': 0, 'expandtemplates': expandtemplates, 'get_templates': get_templates
+        }]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as _executor:
+            while len(_level_tasks) > 0:
+                self._print_with_lock('\n%s\n' % _(
+                    'get pages of level [$1]: $2 pages', str(_level_tasks[0]['current_level']), str(len(_level_tasks))
+                ))
+                # 分批查询页面信息
+                _batch_size = self._get_query_batch_size()
+                _batches = [
+                    _level_tasks[_i: _i + _batch_size] for _i in range(0, len(_level_tasks), _batch_size)
+                ]
+                _batch_futures = [
+                    _executor.submit(
+                        self._query_wiki_pages, [_task['title'] for _task in _batch],
+                        get_images=any(_task['down_file'] for _task in _batch),
+                        get_links=any(
+                            _task['get_links'] and _task['current_level'] < max_level for _task in _batch
+                        ),
+                        get_templates=any(_task['get_templates'] for _task in _batch)
+                    ) for _batch in _batches
+                ]
+
+                # 查询完成的批次提交保存页面
+                _page_futures = list()
+                for _batch, _batch_future in zip(_batches, _batch_futures):
+                    try:
+                        _page_infos = _batch_future.result()
+                    except Exception as e:
+                        if _batch[0]['current_level'] == 0:
+                            raise
+                        self._print_with_lock('%s (%s):\n%s' % (
+                            _('get wiki page error: page [$1]', ', '.join([_task['title'] for _task in _batch])),
+                            str(e), traceback.format_exc()
+                        ))
+                        continue
+
+                    for _task in _batch:
+                        if _page_infos[_task['title']] is not None:
+                            # 标准化后的标题(例如首字母大写)也加入已处理列表
+                            with self._get_page_lock:
+                                self._get_page_objs[_page_infos[_task['title']]['title']] = ''
+                        _page_futures.append((_task, _executor.submit(
+                            self._get_wiki_page_task, output=output, page_info=_page_infos[_task['title']],
+                            max_level=max_level, **_task
+                        )))
+
+                # 按页面顺序汇总下一层级要获取的页面
+                _next_tasks = list()
+                for _task, _future in _page_futures:
+                    try:
+                        _child_tasks = _future.result()
+                    except Exception as e:
+                        if _task['current_level'] == 0:
+                            raise
+                        self._print_with_lock('%s (%s):\n%s' % (
+                            _('get wiki page error: page [$1]', _task['title']), str(e), traceback.format_exc()
+                        ))
+                        continue
+
+                    for _child in _child_tasks:
+                        with self._get_page_lock:
+                            if _child['title'] in self._get_page_objs.keys():
+                                self._print_with_lock(_('resource [$1] has been processed', _child['title']))
+                                continue
+                            if max_pages > 0 and _page_count >= max_pages:
+                                self._print_with_lock(_('reach max pages [$1], skip page [$2]', str(max_pages), _child['title']))
+                                continue
+                            self._get_page_objs[_child['title']] = ''  # 加入到已处理列表
+                        _page_count += 1
+                        _next_tasks.append(_child)
+
+                _level_tasks = _next_tasks
+
+    def _get_query_batch_size(self):
+        """
+        获取一次查询的最大页面数
+
+        @return {int} - 有apihighlimits权限(例如机器人)时为500, 否则为50
+        """
+        if 'apihighlimits' in self._mwsite.rights:
+            return 500
+        return 50
+
+    def _query_wiki_pages(self, titles, get_images=False, get_links=False, get_templates=False):
+        """
+        一次查询多个页面的内容及页面中的文件、链接、模板(自动处理查询的续传)
+
+        @param {list} titles - 页面标题清单, 数量不超过_get_query_batch_size
+        @param {bool} get_images=False - 是否查询页面包含的文件
+        @param {bool} get_links=False - 是否查询页面包含的内部链接
+        @param {bool} get_templates=False - 是否查询页面使用的模板
+
+        @return {dict} - 以传入的标题为key的页面信息字典, 页面不存在时值为None;
+            页面信息格式为{'title': 标题, 'text': 页面内容, 'images': [文件标题], 'links': [链接页面标题],
+            'templates': [模板标题]}
+        """
+        _props = ['revisions']
+        _kwargs = {
+            'titles': '|'.join(titles),
+            'rvprop': 'content'
+        }
+        if self._mwsite.version is not None and self._mwsite.version[:2] >= (1, 32):
+            _kwargs['rvslots'] = 'main'
+        if get_images:
+            _props.append('images')
+            _kwargs['imlimit'] = 'max'
+        if get_links:
+            _props.append('links')
+            _kwargs['pllimit'] = 'max'
+        if get_templates:
+            _props.append('templates')
+            _kwargs['tllimit'] = 'max'
+        _kwargs['prop'] = '|'.join(_props)
+
+        # 续传时同一页面的信息分布在多次的返回结果中, 按标题合并
+        _pages = dict()
+        _title_map = dict()
+        while True:
+            _result = self._mwsite.post('query', **_kwargs)
+            _query = _result.get('query', dict())
+            for _item in _query.get('normalized', []) + _query.get('converted', []):
+                _title_map[_item['from']] = _item['to']
+
+            for _page in _query.get('pages', dict()).values():
+                _info = _pages.setdefault(_page['title'], {
+                    'title': _page['title'], 'exists': 'missing' not in _page and 'invalid' not in _page,
+                    'text': None, 'images': list(), 'links': list(), 'templates': list()
+                })
+                if 'revisions' in _page and _info['text'] is None:
+                    _rev = _page['revisions'][0]
+                    _info['text'] = _rev['slots']['main']['*'] if 'slots' in _rev else _rev.get('*', '')
+                for _key in ('images', 'links', 'templates'):
+                    _info[_key].extend([_item['title'] for _item in _page.get(_key, [])])
+
+            if 'continue' not in _result:
+                break
+            _kwargs.update(_result['continue'])
+
+        _page_infos = dict()
+        for _title in titles:
+            # 标题可能先标准化再进行繁简转换, 按转换链找到最终的标题
+            _name = _title
+            _names = {_name}
+            while _name in _title_map.keys() and _title_map[_name] not in _names:
+                _name = _title_map[_name]
+                _names.add(_name)
+            _info = _pages.get(_name, None)
+            _page_infos[_title] = _info if _info is not None and _info['exists'] else None
+        return _page_infos
+
+    def _download_wiki_files(self, names, path, prompt_obj=None):
+        """
+        下载wiki文件(按批次一次查询多个文件的下载地址)
+
+        @param {list} names - 文件标题清单, 例如['File:a.png']
+        @param {string} path - 文件的保存目录
+        @param {PromptPlus|BufferPrompt} prompt_obj=None - 输出提示的对象, 为None时使用命令的提示对象
+        """
+        _prompt_obj = self._prompt_obj if prompt_obj is None else prompt_obj
+        _batch_size = self._get_query_batch_size()
+        for _i in range(0, len(names), _batch_size):
+            _result = self._mwsite.post(
+                'query', titles='|'.join(names[_i: _i + _batch_size]), prop='imageinfo', iiprop='url'
             )
+            for _page in _result.get('query', dict()).get('pages', dict()).values():
+                if len(_page.get('imageinfo', [])) == 0:
+                    _prompt_obj.prompt_print(_('get wiki page error: page [$1] not exists!', _page['title']))
+                    continue
 
-    def _get_wiki_page(self, title, output, filename=None, down_file=False, get_links=False,
-                       max_level=3, current_level=0, expandtemplates=False, get_templates=False):
+                _image_name = _page['title'].replace(' ', '_')
+                _nameindex = _image_name.find(':')
+                if _nameindex > -1:
+                    _image_name = _image_name[_nameindex + 1:]
+                _resp = self._mwsite.connection.get(_page['imageinfo'][0]['url'], stream=True)
+                _resp.raise_for_status()
+                with open(os.path.join(path, _image_name), 'wb') as fd:
+                    for _chunk in _resp.iter_content(65536):
+                        fd.write(_chunk)
+                _prompt_obj.prompt_print('%s %s' % (_('download file [$1]', _image_name), _('done')))
+
+    def _get_wiki_page(self, title, output, page_info, filename=None, down_file=False, get_links=False,
+                       max_level=3, current_level=0, expandtemplates=False, get_templates=False, prompt_obj=None):
         """
-        获取wiki指定页面
+        保存wiki指定页面(可在多线程中执行), 返回需要继续获取的链接及模板页面
 
         @param {string} title - 页面标题
         @param {string} output - 输出路径
+        @param {dict} page_info - 通过_query_wiki_pages查询到的页面信息, 为None代表页面不存在
         @param {string} filename=None - 保存页面文件名
         @param {bool} down_file=False - 是否下载页面包含的文件
         @param {bool} get_links=False - 是否下载页面包含的内部链接页面
@@ -1670,17 +3189,16 @@ class MediaWikiSite(CmdBaseFW):
         @param {int} current_level=0 - 当前处理层级
         @param {bool} expandtemplates=False - 是否展开模板
         @param {bool} get_templates=False - 是否获取页面包含的模板
-        """
-        if title in self._get_page_objs.keys():
-            self._prompt_obj.prompt_print(_('page [$1] has been processed', title))
-            return
-        self._get_page_objs[title] = ''  # 加入到已处理列表
+        @param {PromptPlus|BufferPrompt} prompt_obj=None - 输出提示的对象, 为None时使用命令的提示对象
 
-        self._prompt_obj.prompt_print('%s: %s =====================>' % (_('getting page'), title))
-        _page = self._mwsite.pages[title]
-        if not _page.exists:
-            self._prompt_obj.prompt_print(_('get wiki page error: page [$1] not exists!', title))
-            return
+        @return {list} - 需要继续获取的页面清单, 每个页面为本函数的参数字典(不含output、max_level)
+        """
+        _prompt_obj = self._prompt_obj if prompt_obj is None else prompt_obj
+        _child_tasks = list()
+        _prompt_obj.prompt_print('%s: %s =====================>' % (_('getting page'), title))
+        if page_info is None:
+            _prompt_obj.prompt_print(_('get wiki page error: page [$1] not exists!', title))
+            return _child_tasks
 
         # 获取页面内容
         _filename = filename
@@ -1688,15 +3206,18 @@ class MediaWikiSite(CmdBaseFW):
             _filename = title.replace(':', '{ns}').replace('/', '{sub}') + '.txt'
 
         # 写入文件
+        _text = page_info['text'] or ''
+        if expandtemplates:
+            _text = self._mwsite.expandtemplates(_text, title=title)
         with open(os.path.join(output, _filename), "w", encoding='utf-8') as f:
-            f.write(_page.text(expandtemplates=expandtemplates))
+            f.write(_text)
 
-        self._prompt_obj.prompt_print('%s %s' % (_('get page [$1] text', title), _('done')))
+        _prompt_obj.prompt_print('%s %s' % (_('get page [$1] text', title), _('done')))
 
         _filename_no_ext = FileTool.get_file_name_no_ext(_filename)
         # 判断是否下载页面包含的文件
         if down_file:
-            self._prompt_obj.prompt_print('\n%s:' % (_('download files in page [$1]', title)))
+            _prompt_obj.prompt_print('\n%s:' % (_('download files in page [$1]', title)))
             # 创建目录
             _file_dir = os.path.join(output, _filename_no_ext + '_copy_pic')
             if os.path.exists(_file_dir):
@@ -1704,50 +3225,95 @@ class MediaWikiSite(CmdBaseFW):
             else:
                 FileTool.create_dir(_file_dir)
             # 下载文件
-            for _image in _page.images():
-                if _image.name in self._get_page_objs.keys():
-                    self._prompt_obj.prompt_print(_('resource [$1] has been processed', _image.name))
-                    continue
-                self._get_page_objs[_image.name] = ''  # 加入到已处理列表
+            _names = list()
+            for _name in page_info['images']:
+                with self._get_page_lock:
+                    if _name in self._get_page_objs.keys():
+                        _prompt_obj.prompt_print(_('resource [$1] has been processed', _name))
+                        continue
+                    self._get_page_objs[_name] = ''  # 加入到已处理列表
+                _names.append(_name)
+            self._download_wiki_files(_names, _file_dir, prompt_obj=_prompt_obj)
+
+        # 判断是否下载内部链接页面(放到下一层级获取)
+        if get_links and current_level < max_level:
+            _count = len(_child_tasks)
+            for _name in page_info['links']:
+                _child_tasks.append({
+                    'title': _name, 'down_file': down_file, 'get_links': get_links,
+                    'current_level': current_level + 1, 'expandtemplates': expandtemplates,
+                    'get_templates': get_templates
+                })
+            _prompt_obj.prompt_print('%s: %d' % (
+                _('get link_pages on page [$1]', title), len(_child_tasks) - _count
+            ))
+
+        # 判断是否下载页面使用到的所有模板(放到下一层级获取)
+        if get_templates:
+            _count = len(_child_tasks)
+            for _name in page_info['templates']:
+                _child_tasks.append({
+                    'title': _name, 'down_file': True, 'get_links': False,
+                    'current_level': current_level + 1, 'expandtemplates': False,
+                    'get_templates': True
+                })
+            _prompt_obj.prompt_print('%s: %d' % (
+                _('get template_pages on page [$1]', title), len(_child_tasks) - _count
+            ))
+
+        return _child_tasks
+
+    def _get_wiki_page_task(self, **kwargs):
+        """
+        在线程中保存wiki指定页面, 页面的输出信息先缓存, 完成后在打印锁中一次输出, 避免不同页面的信息交错
 
-                _image_name = _image.name.replace(' ', '_')
-                _nameindex = _image_name.find(':')
-                if _nameindex > -1:
-                    _image_name = _image_name[_nameindex + 1:]
-                with open(os.path.join(_file_dir, _image_name), 'wb') as fd:
-                    _image.download(fd)
-                self._prompt_obj.prompt_print('%s %s' % (_('download file [$1]', _image_name), _('done')))
+        @param {**kwargs} - _get_wiki_page的参数
 
-        # 判断是否下载内部链接页面
-        if get_links and current_level < max_level:
-            self._prompt_obj.prompt_print('\n%s:\n' % (_('get link_pages on page [$1]', title)))
-            for _link in _page.links():
-                if _link.name in self._get_page_objs.keys():
-                    self._prompt_obj.prompt_print(_('resource [$1] has been processed', _link.name))
-                    continue
+        @return {list} - 需要继续获取的页面清单
+        """
+        _prompt_obj = BufferPrompt()
+        try:
+            return self._get_wiki_page(prompt_obj=_prompt_obj, **kwargs)
+        finally:
+            with self._print_lock:
+                for _str in _prompt_obj.print_list:
+                    self._prompt_obj.prompt_print(_str, end='')
 
-                self._get_wiki_page(
-                    _link.name, output, down_file=down_file, get_links=get_links,
-                    max_level=max_level, current_level=current_level+1,
-                    expandtemplates=expandtemplates, get_templates=get_templates
-                )
-                self._prompt_obj.prompt_print('\n%s %s' % (_('get link_page [$1]', _link.name), _('done')))
+    def _print_with_lock(self, *args, **kwargs):
+        """
+        在打印锁中输出信息(页面线程运行期间主线程使用), 参数与prompt_print一致
+        """
+        with self._print_lock:
+            self._prompt_obj.prompt_print(*args, **kwargs)
 
-        # 判断是否下载页面使用到的所有模板
-        if get_templates:
-            self._prompt_obj.prompt_print('\n%s:\n' % (_('get template_pages on page [$1]', title)))
-            for _template in _page.templates():
-                if _template.name in self._get_page_objs.keys():
-                    self._prompt_obj.prompt_print(_('resource [$1] has been processed', _template.name))
-                    continue
+    def _upload_with_assert(self, file_obj, filename, desc, ignore):
+        """
+        上传文件, 上传请求(含分块上传)附加写操作的登录断言参数
+        mwclient.Site.upload不支持传入额外参数, 上传期间在网站对象的raw_call中添加
 
-                self._get_wiki_page(
-                    _template.name, output, down_file=True, get_links=False,
-                    max_level=max_level, current_level=current_level+1,
-                    expandtemplates=False,
-                    get_templates=True
-                )
-                self._prompt_obj.prompt_print('\n%s %s' % (_('get template_page [$1]', _template.name), _('done')))
+        @param {file} file_obj - 要上传的文件对象
+        @param {string} filename - 上传后的文件名
+        @param {string} desc - 文件描述
+        @param {bool} ignore - 是否忽略警告
+
+        @return {dict} - mwclient.Site.upload的返回值
+        """
+        _assert_para = self._get_assert_para()
+        if len(_assert_para) == 0:
+            return self._mwsite.upload(file_obj, filename, desc, ignore=ignore)
+
+        _raw_call = self._mwsite.raw_call
+
+        def _raw_call_with_assert(script, data, *args, **kwargs):
+            if data.get('action', None) == 'upload':
+                data = dict(data, **_assert_para)
+            return _raw_call(script, data, *args, **kwargs)
+
+        self._mwsite.raw_call = _raw_call_with_assert
+        try:
+            return self._mwsite.upload(file_obj, filename, desc, ignore=ignore)
+        finally:
+            del self._mwsite.raw_call
 
     def _upload_files(self, input, file_list, rewrite=False, desc='', ignore=False):
         """
@@ -1791,11 +3357,12 @@ class MediaWikiSite(CmdBaseFW):
                 continue
 
             # 处理上传操作
+            def _upload():
+                with open(os.path.join(input, _filename), 'rb') as _file_obj:
+                    return self._upload_with_assert(_file_obj, _upload_name, _desc, ignore)
+
             try:
-                _result = self._mwsite.upload(
-                    open(os.path.join(input, _filename), 'rb'),
-                    _upload_name, _desc, ignore=ignore
-                )
+                _result = self._call_with_relogin(_upload)
             except Exception as e:
                 _prin_str = '%s %s (%s):\n%s' % (
                     _('upload file [$1] > [$2]', _filename, _upload_name),
@@ -1887,7 +3454,9 @@ class MediaWikiSite(CmdBaseFW):
                     os.path.join(input, _filename),
                     encoding=encoding
                 )
-                _result = _page.save(_text, _summary)
+                _result = self._call_with_relogin(
+                    lambda: _page.save(_text, _summary, **self._get_assert_para())
+                )
             except Exception as e:
                 _prin_str = '%s %s (%s):\n%s' % (
                     _('edit page [$1] > [$2]', _filename, _title), _('fail'), str(e), traceback.format_exc()
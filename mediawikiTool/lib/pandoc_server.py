@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+pandoc服务模式转换后台
+@module pandoc_server
+@file pandoc_server.py
+"""
+
+import os
+import sys
+import time
+import base64
+import socket
+import subprocess
+import requests
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'pandoc_server'  # 模块名
+__DESCRIPT__ = u'pandoc服务模式转换后台'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2019.12.09'  # 发布日期
+
+
+# 不限制转换时间时服务使用的超时时间(秒)
+NO_TIMEOUT_SECONDS = 86400
+
+
+class PandocServerUnavailable(RuntimeError):
+    """
+    pandoc服务不可用或连接失败
+    """
+    pass
+
+
+class PandocServerTimeout(RuntimeError):
+    """
+    pandoc服务转换超时
+    """
+    pass
+
+
+class PandocServer(object):
+    """
+    pandoc服务模式(pandoc server, pandoc 3.0以上版本支持)的转换后台
+    只启动一次pandoc进程, 所有转换请求都通过http发送到该进程处理, 避免每个文件都启动一次pandoc
+    """
+
+    def __init__(self, pandoc_cmd='pandoc', host='127.0.0.1', start_timeout=10.0, convert_timeout=600):
+        """
+        构造函数
+
+        @param {string} pandoc_cmd='pandoc' - pandoc的执行命令
+        @param {string} host='127.0.0.1' - 服务监听的地址
+        @param {float} start_timeout=10.0 - 等待服务启动的超时时间(秒)
+        @param {float} convert_timeout=600 - 服务允许的单次转换的最大时间(秒), None代表不限制
+        """
+        self.pandoc_cmd = pandoc_cmd
+        self.host = host
+        self.start_timeout = start_timeout
+        self.convert_timeout = convert_timeout
+        self.port = None
+        self.version = ''
+        self._process = None
+        self._session = None
+        self._available = None  # None代表还未尝试启动
+
+    #############################
+    # 公共属性
+    #############################
+    @property
+    def is_available(self):
+        """
+        服务是否可用
+
+        @property {bool}
+        """
+        return self._available is True and self._process is not None and self._process.poll() is None
+
+    @property
+    def url(self):
+        """
+        服务的访问地址
+
+        @property {string}
+        """
+        return 'http://%s:%d' % (self.host, self.port)
+
+    #############################
+    # 公共函数
+    #############################
+    def start(self):
+        """
+        启动pandoc服务
+
+        @return {bool} - 是否启动成功, 如果pandoc版本不支持服务模式将返回False
+        """
+        if self._available is not None:
+            # 已尝试过启动, 不重复启动
+            return self.is_available
+
+        self._available = False
+        try:
+            self.port = self._get_free_port()
+            self._process = subprocess.Popen(
+                [
+                    self.pandoc_cmd, 'server', '--port', str(self.port),
+                    '--timeout', str(self._get_server_timeout())
+                ],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        except Exception:
+            # pandoc不存在
+            self._process = None
+            return False
+
+        # 等待服务启动
+        self._session = requests.Session()
+        _end_time = time.time() + self.start_timeout
+        while time.time() < _end_time:
+            if self._process.poll() is not None:
+                # 进程已退出, 说明版本不支持服务模式
+                break
+            try:
+                _resp = self._session.get(self.url + '/version', timeout=1)
+                if _resp.status_code == 200:
+                    self.version = _resp.text.strip()
+                    self._available = True
+                    return True
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(0.05)
+
+        # 启动失败
+        self.stop()
+        return False
+
+    def stop(self):
+        """
+        停止pandoc服务
+        """
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.terminate()
+                try:
+                    self._process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self._process.kill()
+            self._process = None
+
+        if self._available:
+            self._available = False
+
+    def convert(self, text, from_format, to_format, standalone=True, timeout=None):
+        """
+        执行格式转换
+
+        @param {string|bytes} text - 要转换的内容, 如果是二进制格式(例如docx)传入bytes
+        @param {string} from_format - 源格式, 例如markdown、docx
+        @param {string} to_format - 目标格式, 例如mediawiki
+        @param {bool} standalone=True - 是否生成独立文档(对应-s参数)
+        @param {float} timeout=None - 本次转换的超时时间(秒), None代表使用服务的超时时间
+
+        @return {string} - 转换后的文本
+
+        @throws {PandocServerUnavailable} - 服务不可用或连接失败时抛出异常
+        @throws {PandocServerTimeout} - 转换超时时抛出异常
+        @throws {RuntimeError} - 转换失败时抛出异常
+        """
+        if not self.is_available:
+            raise PandocServerUnavailable('pandoc server is not available')
+
+        if isinstance(text, bytes):
+            # 二进制格式需要进行base64编码
+            text = base64.b64encode(text).decode('ascii')
+
+        if timeout is None:
+            timeout = self.convert_timeout
+        try:
+            _resp = self._session.post(
+                self.url,
+                json={
+                    'text': text,
+                    'from': from_format,
+                    'to': to_format,
+                    'standalone': standalone
+                },
+                headers={'Accept': 'application/json'},
+                timeout=(self.start_timeout, timeout)
+            )
+        except requests.exceptions.ReadTimeout:
+            raise PandocServerTimeout('pandoc server convert timeout: %ss' % str(timeout))
+        except requests.exceptions.ConnectionError as e:
+            raise PandocServerUnavailable('pandoc server connect error: %s' % str(e))
+
+        if _resp.status_code == 503:
+            # 服务端转换超时
+            raise PandocServerTimeout('pandoc server convert timeout: %s' % _resp.text)
+        if _resp.status_code != 200:
+            raise RuntimeError('pandoc server convert error [%d]: %s' % (_resp.status_code, _resp.text))
+
+        _ret = _resp.json()
+        if 'error' in _ret.keys():
+            raise RuntimeError('pandoc server convert error: %s' % _ret['error'])
+
+        return _ret['output']
+
+    #############################
+    # 内部函数
+    #############################
+    def _get_server_timeout(self):
+        """
+        获取启动服务的--timeout参数
+
+        @return {int} - 超时时间(秒)
+        """
+        if not self.convert_timeout:
+            return NO_TIMEOUT_SECONDS
+        return max(1, int(-(-self.convert_timeout // 1)))
+
+    def _get_free_port(self):
+        """
+        获取一个可用的端口
+
+        @return {int} - 端口号
+        """
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as _sock:
+            _sock.bind((self.host, 0))
+            return _sock.getsockname()[1]
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+图片文件处理工具
+@module pic_tool
+@file pic_tool.py
+"""
+
+import os
+import sys
+import time
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import concurrent.futures
+import requests
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'pic_tool'  # 模块名
+__DESCRIPT__ = u'图片文件处理工具'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2019.12.09'  # 发布日期
+
+
+FICLONE = 0x40049409  # Linux复制文件时共享数据块的ioctl请求号(btrfs/xfs等文件系统支持)
+
+
+class PicFetcher(object):
+    """
+    图片获取工具
+    网络图片通过共享的长连接会话并发下载, 本地图片直接复制
+    """
+
+    def __init__(self, pool_size=16, user_agent='mediawikiTool'):
+        """
+        构造函数
+
+        @param {int} pool_size=16 - 每个网站保持的连接池大小
+        @param {string} user_agent='mediawikiTool' - 下载时使用的User-Agent
+        """
+        self._session = requests.Session()
+        self._session.headers['User-Agent'] = user_agent
+        _adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount('http://', _adapter)
+        self._session.mount('https://', _adapter)
+
+    #############################
+    # 公共函数
+    #############################
+    @staticmethod
+    def is_remote(src):
+        """
+        判断图片是否网络图片
+
+        @param {string} src - 图片路径
+
+        @return {bool} - 是否网络图片
+        """
+        return src.startswith('http://') or src.startswith('https://')
+
+    @staticmethod
+    def remove_dest(dest):
+        """
+        删除已存在的目标文件
+        目标文件可能是硬链接或符号链接, 直接覆盖写入会修改到链接的源文件
+
+        @param {string} dest - 目标文件
+        """
+        if os.path.lexists(dest):
+            os.remove(dest)
+
+    @staticmethod
+    def is_same_file(src, dest):
+        """
+        判断目标文件是否已与源文件一致(同一文件, 或大小和修改时间都相同)
+
+        @param {string} src - 源文件
+        @param {string} dest - 目标文件
+
+        @return {bool} - 是否一致
+        """
+        if not os.path.exists(dest):
+            return False
+        if os.path.samefile(src, dest):
+            return True
+        _src_stat = os.stat(src)
+        _dest_stat = os.stat(dest)
+        return _src_stat.st_size == _dest_stat.st_size and \
+            int(_src_stat.st_mtime) == int(_dest_stat.st_mtime)
+
+    @classmethod
+    def copy_local(cls, src, dest, mode='copy'):
+        """
+        将本地图片放置到目标路径
+        硬链接/共享数据块复制/符号链接不支持时(例如跨文件系统)自动改为普通复制
+
+        @param {string} src - 源文件
+        @param {string} dest - 目标文件
+        @param {string} mode='copy' - 放置方式, copy-复制, hardlink-硬链接, reflink-共享数据块复制, symlink-符号链接
+
+        @return {string} - 实际使用的放置方式, 目标文件已一致无需处理返回skip
+        """
+        if cls.is_same_file(src, dest):
+            return 'skip'
+
+        cls.remove_dest(dest)
+        if mode == 'hardlink':
+            try:
+                os.link(src, dest)
+                return mode
+            except OSError:
+                pass
+        elif mode == 'symlink':
+            try:
+                os.symlink(os.path.realpath(src), dest)
+                return mode
+            except OSError:
+                pass
+        elif mode == 'reflink':
+            if cls._reflink(src, dest):
+                return mode
+
+        # 普通复制, 保留修改时间以便下次比较
+        shutil.copy2(src, dest)
+        return 'copy'
+
+    def fetch_all(self, task_list, jobs=8, timeout=30, cache=None, mode='copy'):
+        """
+        并发获取图片
+
+        @param {list} task_list - 任务清单, 每个任务为(src, dest), src为网络地址或本地文件全路径
+        @param {int} jobs=8 - 并发数
+        @param {float} timeout=30 - 网络请求的超时时间(秒)
+        @param {PicCache} cache=None - 网络图片的本地缓存, 不传代表不使用缓存
+        @param {string} mode='copy' - 本地图片的放置方式, 见copy_local
+
+        @return {list} - 与任务清单顺序一致的处理结果, 成功为None, 失败为对应的异常对象
+        """
+        if len(task_list) == 0:
+            return list()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(min(jobs, len(task_list)), 1)) as _executor:
+            _futures = [
+                _executor.submit(self.fetch, _src, _dest, timeout=timeout, cache=cache, mode=mode)
+                for _src, _dest in task_list
+            ]
+            _errors = [_future.exception() for _future in _futures]
+
+        if cache is not None:
+            cache.save()
+        return _errors
+
+    def fetch(self, src, dest, timeout=30, cache=None, mode='copy'):
+        """
+        获取单个图片到指定路径
+
+        @param {string} src - 网络地址或本地文件全路径
+        @param {string} dest - 目标文件
+        @param {float} timeout=30 - 网络请求的超时时间(秒)
+        @param {PicCache} cache=None - 网络图片的本地缓存
+        @param {string} mode='copy' - 本地图片的放置方式, 见copy_local
+        """
+        if self.is_remote(src):
+            self.download(src, dest, timeout=timeout, cache=cache)
+        else:
+            self.copy_local(src, dest, mode=mode)
+
+    def download(self, url, dest, timeout=30, cache=None):
+        """
+        下载网络图片
+        如果有缓存, 将使用ETag/Last-Modified发起条件请求, 服务器返回304时直接使用缓存文件
+
+        @param {string} url - 网络地址
+        @param {string} dest - 目标文件
+        @param {float} timeout=30 - 网络请求的超时时间(秒)
+        @param {PicCache} cache=None - 网络图片的本地缓存
+        """
+        _conditional = cache is not None  # 是否使用缓存发起条件请求
+        while True:
+            _headers = dict()
+            _cache_file = None
+            if _conditional:
+                _info = cache.get(url)
+                if _info is not None:
+                    _cache_file = _info['file']
+                    if _info.get('etag', None) is not None:
+                        _headers['If-None-Match'] = _info['etag']
+                    if _info.get('last_modified', None) is not None:
+                        _headers['If-Modified-Since'] = _info['last_modified']
+
+            _resp = self._session.get(url, headers=_headers, timeout=timeout, stream=True)
+            if _resp.status_code != 304 or _cache_file is None:
+                break
+
+            # 缓存有效
+            _resp.close()
+            try:
+                self.remove_dest(dest)
+                shutil.copyfile(_cache_file, dest)
+                return
+            except FileNotFoundError:
+                # 缓存文件在获取缓存信息后被其他线程或进程清理, 重新完整下载
+                _conditional = False
+
+        with _resp:
+            _resp.raise_for_status()
+            _etag = _resp.headers.get('ETag', None)
+            _last_modified = _resp.headers.get('Last-Modified', None)
+            if cache is None or (_etag is None and _last_modified is None):
+                # 无法进行验证的图片不缓存, 先下载到同目录的临时文件再替换, 避免中断时留下不完整的图片
+                _temp_file = dest + '.tmp'
+                try:
+                    with open(_temp_file, 'wb') as f:
+                        for _chunk in _resp.iter_content(chunk_size=65536):
+                            f.write(_chunk)
+                    os.replace(_temp_file, dest)
+                except Exception:
+                    if os.path.exists(_temp_file):
+                        os.remove(_temp_file)
+                    raise
+                return
+
+            _fd, _temp_file = cache.get_temp_file()
+            with os.fdopen(_fd, 'wb') as f:
+                for _chunk in _resp.iter_content(chunk_size=65536):
+                    f.write(_chunk)
+
+        _cache_file = cache.put(url, _temp_file, etag=_etag, last_modified=_last_modified)
+        self.remove_dest(dest)
+        shutil.copyfile(_cache_file, dest)
+
+    def close(self):
+        """
+        关闭连接会话
+        """
+        self._session.close()
+
+    #############################
+    # 内部函数
+    #############################
+    @staticmethod
+    def _reflink(src, dest):
+        """
+        使用共享数据块的方式复制文件(仅Linux下支持该特性的文件系统)
+
+        @param {string} src - 源文件
+        @param {string} dest - 目标文件
+
+        @return {bool} - 是否复制成功
+        """
+        try:
+            import fcntl
+        except ImportError:
+            return False
+
+        with open(src, 'rb') as _fsrc, open(dest, 'wb') as _fdest:
+            try:
+                fcntl.ioctl(_fdest.fileno(), FICLONE, _fsrc.fileno())
+                _ok = True
+            except OSError:
+                # 文件系统不支持或跨文件系统
+                _ok = False
+
+        if not _ok:
+            os.remove(dest)
+            return False
+
+        shutil.copystat(src, dest)
+        return True
+
+
+class PicCache(object):
+    """
+    网络图片的本地磁盘缓存
+    按url保存图片文件及ETag/Last-Modified信息, 超出容量时按最近最少使用(LRU)的顺序清理
+    """
+
+    def __init__(self, path, max_size=500 * 1024 * 1024):
+        """
+        构造函数
+
+        @param {string} path - 缓存目录
+        @param {int} max_size=500*1024*1024 - 缓存的最大容量(字节)
+        """
+        self.path = os.path.realpath(path)
+        self.max_size = max_size
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+
+        self._index_file = os.path.join(self.path, 'index.json')
+        self._lock = threading.Lock()
+        self._index = self._load_index()  # key为url, value为缓存信息字典
+        self._removed = set()  # 本进程清理掉的url
+
+    #############################
+    # 公共函数
+    #############################
+    def get(self, url):
+        """
+        获取url对应的缓存信息
+
+        @param {string} url - 图片地址
+
+        @return {dict} - 缓存信息字典(file为缓存文件全路径), 没有缓存返回None
+        """
+        with self._lock:
+            _info = self._index.get(url, None)
+            if _info is None:
+                return None
+
+            _file = os.path.join(self.path, _info['file'])
+            if not os.path.exists(_file):
+                # 缓存文件已被清理
+                self._index.pop(url)
+                return None
+
+            _info['atime'] = time.time()
+            _ret = dict(_info)
+            _ret['file'] = _file
+            return _ret
+
+    def get_temp_file(self):
+        """
+        在缓存目录中创建一个临时文件
+
+        @return {tuple} - (文件描述符, 文件路径)
+        """
+        return tempfile.mkstemp(suffix='.tmp', dir=self.path)
+
+    def put(self, url, temp_file, etag=None, last_modified=None):
+        """
+        将下载的临时文件放入缓存
+
+        @param {string} url - 图片地址
+        @param {string} temp_file - 下载的临时文件
+        @param {string} etag=None - 响应的ETag
+        @param {string} last_modified=None - 响应的Last-Modified
+
+        @return {string} - 缓存文件全路径
+        """
+        _name = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        _file = os.path.join(self.path, _name)
+        os.replace(temp_file, _file)
+        with self._lock:
+            self._index[url] = {
+                'file': _name,
+                'etag': etag,
+                'last_modified': last_modified,
+                'size': os.path.getsize(_file),
+                'atime': time.time()
+            }
+            self._removed.discard(url)
+            self._evict(keep_url=url)
+        return _file
+
+    def save(self):
+        """
+        保存缓存索引(与其他进程保存的索引合并)
+        """
+        with self._lock:
+            _disk_index = self._load_index()
+            for _url, _info in _disk_index.items():
+                if _url in self._removed:
+                    continue
+                if _url not in self._index.keys() or self._index[_url]['atime'] < _info['atime']:
+                    if os.path.exists(os.path.join(self.path, _info['file'])):
+                        self._index[_url] = _info
+            self._evict()
+
+            _fd, _temp_file = self.get_temp_file()
+            with os.fdopen(_fd, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(self._index, ensure_ascii=False))
+            os.replace(_temp_file, self._index_file)
+
+    #############################
+    # 内部函数
+    #############################
+    def _load_index(self):
+        """
+        装载缓存索引
+
+        @return {dict} - 缓存索引
+        """
+        if not os.path.exists(self._index_file):
+            return dict()
+        try:
+            with open(self._index_file, 'r', encoding='utf-8') as f:
+                return json.loads(f.read())
+        except Exception:
+            # 索引损坏, 重建缓存
+            return dict()
+
+    def _evict(self, keep_url=None):
+        """
+        按LRU顺序清理超出容量的缓存(调用前需获取锁)
+
+        @param {string} keep_url=None - 不清理的url
+        """
+        _total = sum([_info['size'] for _info in self._index.values()])
+        if _total <= self.max_size:
+            return
+
+        for _url, _info in sorted(self._index.items(), key=lambda _item: _item[1]['atime']):
+            if _total <= self.max_size:
+                break
+            if _url == keep_url:
+                continue
+            try:
+                os.remove(os.path.join(self.path, _info['file']))
+            except OSError:
+                pass
+            _total -= _info['size']
+            self._index.pop(_url)
+            self._removed.add(_url)
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+文本文件处理工具
+@module text_tool
+@file text_tool.py
+"""
+
+import os
+import sys
+try:
+    import chardet
+except ImportError:
+    chardet = None
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'text_tool'  # 模块名
+__DESCRIPT__ = u'文本文件处理工具'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2019.12.09'  # 发布日期
+
+
+def detect_file_encoding(file):
+    """
+    根据文件头判断文本文件的编码
+
+    @param {string} file - 文件路径
+
+    @return {string} - 文件编码
+    """
+    with open(file, 'rb') as f:
+        _head = f.read(65536)
+
+    try:
+        _head.decode('utf-8')
+        return 'utf-8-sig'
+    except UnicodeDecodeError as e:
+        if e.start > len(_head) - 4:
+            # 截断了多字节字符
+            return 'utf-8-sig'
+
+    if chardet is not None:
+        _encoding = chardet.detect(_head)['encoding']
+        if _encoding:
+            return _encoding
+    return 'gb18030'
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
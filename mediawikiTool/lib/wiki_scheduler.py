@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+wiki网站请求调度工具
+@module wiki_scheduler
+@file wiki_scheduler.py
+"""
+
+import os
+import sys
+import time
+import random
+import threading
+import email.utils
+import requests
+from requests.adapters import HTTPAdapter
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'wiki_scheduler'  # 模块名
+__DESCRIPT__ = u'wiki网站请求调度工具'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2019.12.09'  # 发布日期
+
+
+# 不会修改网站数据, 可以安全重试的API操作
+IDEMPOTENT_ACTIONS = ('query', 'parse', 'expandtemplates', 'compare', 'opensearch', 'help')
+
+
+class TokenBucket(object):
+    """
+    令牌桶限速工具(线程安全)
+    网站要求降速时速率减半, 之后每次请求成功逐步恢复到设置的速率
+    """
+
+    def __init__(self, rate, burst=None, min_rate=0.2):
+        """
+        构造函数
+
+        @param {float} rate - 每秒允许的请求数
+        @param {float} burst=None - 允许的突发请求数, 不传代表与rate一致(最少为1)
+        @param {float} min_rate=0.2 - 降速后的最低速率
+        """
+        self.max_rate = float(rate)
+        self.rate = self.max_rate
+        self.min_rate = min(min_rate, self.max_rate)
+        self.burst = max(1.0, float(rate if burst is None else burst))
+        self._tokens = self.burst
+        self._last_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    #############################
+    # 公共函数
+    #############################
+    def acquire(self):
+        """
+        获取一个令牌, 令牌不足时等待
+
+        @return {float} - 等待的秒数
+        """
+        _wait_time = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return _wait_time
+                _wait = (1 - self._tokens) / self.rate
+
+            time.sleep(_wait)
+            _wait_time += _wait
+
+    def slow_down(self):
+        """
+        网站要求降速时调用, 速率减半
+        """
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0)
+
+    def speed_up(self):
+        """
+        请求成功时调用, 逐步恢复速率
+        """
+        if self.rate >= self.max_rate:
+            return
+
+        with self._lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    #############################
+    # 内部函数
+    #############################
+    def _refill(self):
+        """
+        按流逝的时间补充令牌(需在锁内调用)
+        """
+        _now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (_now - self._last_time) * self.rate)
+        self._last_time = _now
+
+
+class WikiRequestScheduler(HTTPAdapter):
+    """
+    wiki网站的请求调度适配器, 挂载到mwclient.Site的connection上, 所有对网站的请求都经过该适配器
+    1、按令牌桶限制请求速率, 网站返回429或maxlag时自动降速
+    2、遵循网站返回的Retry-After等待时间, 未返回时使用带随机抖动的指数退避
+    3、429及maxlag(网站未执行请求)的情况所有请求都重试, 5xx及连接错误仅重试不修改数据的请求
+    4、统计请求、重试、限速次数及等待时间
+    """
+
+    def __init__(self, rate=10, max_retries=5, backoff_base=1.0, backoff_max=60.0, **kwargs):
+        """
+        构造函数
+
+        @param {float} rate=10 - 每秒允许的请求数, 0代表不限速
+        @param {int} max_retries=5 - 失败请求的最大重试次数
+        @param {float} backoff_base=1.0 - 指数退避的基础等待秒数
+        @param {float} backoff_max=60.0 - 单次等待的最大秒数
+        @param {kwargs} - HTTPAdapter的其他初始化参数
+        """
+        HTTPAdapter.__init__(self, **kwargs)
+        self.bucket = TokenBucket(rate) if rate > 0 else None
+        self.retry_count = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._stats_lock = threading.Lock()
+        self._stats = None
+        self.reset_stats()
+
+    #############################
+    # 公共函数
+    #############################
+    def send(self, request, **kwargs):
+        """
+        发送请求(覆盖HTTPAdapter的函数), 按调度规则限速及重试
+
+        @param {requests.PreparedRequest} request - 要发送的请求
+        @param {kwargs} - HTTPAdapter.send的其他参数
+
+        @return {requests.Response} - 请求的响应, 重试次数用完时返回最后一次的响应
+        """
+        _idempotent = self._is_idempotent(request)
+        _retries = 0
+        while True:
+            if self.bucket is not None:
+                self._add_stats('wait_time', self.bucket.acquire())
+            self._add_stats('requests', 1)
+
+            try:
+                _resp = HTTPAdapter.send(self, request, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if not _idempotent or _retries >= self.retry_count:
+                    raise
+                _retries += 1
+                self._backoff(_retries, None)
+                continue
+
+            _throttled = _resp.status_code == 429 or 'X-Database-Lag' in _resp.headers
+            if not _throttled and (_resp.status_code < 500 or _resp.status_code > 599):
+                if self.bucket is not None:
+                    self.bucket.speed_up()
+                return _resp
+
+            if _throttled:
+                self._add_stats('throttled', 1)
+                if self.bucket is not None:
+                    self.bucket.slow_down()
+
+            if (not _throttled and not _idempotent) or _retries >= self.retry_count:
+                return _resp
+
+            # 释放连接后重试
+            _resp.close()
+            _retries += 1
+            self._backoff(_retries, _resp.headers.get('Retry-After'))
+
+    def reset_stats(self):
+        """
+        重置统计信息
+
+        @return {dict} - 重置前的统计信息
+        """
+        with self._stats_lock:
+            _stats = self._stats
+            self._stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'wait_time': 0.0}
+        return _stats
+
+    def get_stats(self):
+        """
+        获取统计信息
+
+        @return {dict} - 统计信息字典, 包括requests(请求数)、retries(重试数)、throttled(被限速次数)、
+            wait_time(限速及退避等待的秒数)
+        """
+        with self._stats_lock:
+            return dict(self._stats)
+
+    #############################
+    # 内部函数
+    #############################
+    def _is_idempotent(self, request):
+        """
+        判断请求是否不修改网站数据, 可以安全重试
+
+        @param {requests.PreparedRequest} request - 请求
+
+        @return {bool} - 是否可以安全重试
+        """
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return True
+
+        # mwclient默认使用POST方式调用API, 通过action判断
+        _body = request.body
+        if isinstance(_body, bytes):
+            _body = _body.decode('utf-8', errors='ignore')
+        if not isinstance(_body, str):
+            return False
+        for _item in _body.split('&'):
+            if _item.startswith('action='):
+                return _item[7:] in IDEMPOTENT_ACTIONS
+        return False
+
+    def _backoff(self, retries, retry_after):
+        """
+        重试前等待, 优先使用网站返回的Retry-After, 否则使用带随机抖动的指数退避
+
+        @param {int} retries - 当前的重试次数
+        @param {string} retry_after - 网站返回的Retry-After头(秒数或HTTP日期)
+        """
+        _wait = self._parse_retry_after(retry_after)
+        if _wait is None:
+            _wait = random.uniform(0.5, 1.0) * min(self.backoff_max, self.backoff_base * 2 ** (retries - 1))
+        _wait = min(self.backoff_max, _wait)
+
+        self._add_stats('retries', 1)
+        self._add_stats('wait_time', _wait)
+        time.sleep(_wait)
+
+    def _parse_retry_after(self, retry_after):
+        """
+        解析Retry-After头
+
+        @param {string} retry_after - Retry-After头的值
+
+        @return {float} - 要等待的秒数, 无法解析时返回None
+        """
+        if not retry_after:
+            return None
+
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _add_stats(self, key, value):
+        """
+        累加统计信息
+
+        @param {string} key - 统计项
+        @param {number} value - 累加值
+        """
+        if value:
+            with self._stats_lock:
+                self._stats[key] += value
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
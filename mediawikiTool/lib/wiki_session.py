@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+wiki网站登录会话及元数据缓存工具
+@module wiki_session
+@file wiki_session.py
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'wiki_session'  # 模块名
+__DESCRIPT__ = u'wiki网站登录会话及元数据缓存工具'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2019.12.09'  # 发布日期
+
+
+def _write_json_file(path, file, data):
+    """
+    将数据写入仅当前用户可读写的JSON文件(目录权限0700, 文件权限0600), 先写入临时文件再替换
+
+    @param {string} path - 文件所在目录
+    @param {string} file - 文件路径
+    @param {dict} data - 要写入的数据
+    """
+    if not os.path.exists(path):
+        os.makedirs(path, mode=0o700, exist_ok=True)
+
+    _temp_file = '%s.%d.%d.tmp' % (file, os.getpid(), threading.get_ident())
+    _fd = os.open(_temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(_fd, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(_temp_file, file)
+
+
+class WikiSessionCache(object):
+    """
+    wiki网站登录会话的本地缓存
+    将登录后的cookie及令牌保存到仅当前用户可读写的文件中(目录权限0700, 文件权限0600), 在有效期内重新连接时直接复用;
+    缓存的会话是否仍然有效由调用方向网站确认, 失效时重新登录并覆盖缓存
+    """
+
+    def __init__(self, path, key, ttl=86400):
+        """
+        构造函数
+
+        @param {string} path - 缓存目录
+        @param {string} key - 会话的标识, 例如'https://host/path|username', 不同标识使用不同的缓存文件
+        @param {float} ttl=86400 - 缓存的有效期(秒)
+        """
+        self.path = path
+        self.ttl = ttl
+        self.file = os.path.join(path, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json')
+
+    #############################
+    # 公共函数
+    #############################
+    def load(self, cookie_jar):
+        """
+        将缓存的cookie装载到cookie_jar中
+
+        @param {requests.cookies.RequestsCookieJar} cookie_jar - 要装载的cookie容器
+
+        @return {dict} - 缓存的令牌字典, 缓存不存在、已过期或无法读取时返回None
+        """
+        try:
+            with open(self.file, 'r', encoding='utf-8') as f:
+                _data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        _now = time.time()
+        if _data.get('save_time', 0) + self.ttl < _now:
+            return None
+
+        for _cookie in _data.get('cookies', []):
+            if _cookie['expires'] is not None and _cookie['expires'] < _now:
+                continue
+            cookie_jar.set(
+                _cookie['name'], _cookie['value'], domain=_cookie['domain'], path=_cookie['path'],
+                secure=_cookie['secure'], expires=_cookie['expires']
+            )
+        return _data.get('tokens', dict())
+
+    def save(self, cookie_jar, tokens=None):
+        """
+        保存cookie及令牌到缓存文件(先写入临时文件再替换)
+
+        @param {requests.cookies.RequestsCookieJar} cookie_jar - 要保存的cookie容器
+        @param {dict} tokens=None - 要保存的令牌字典
+        """
+        _data = {
+            'save_time': time.time(),
+            'cookies': [
+                {
+                    'name': _cookie.name, 'value': _cookie.value, 'domain': _cookie.domain,
+                    'path': _cookie.path, 'secure': _cookie.secure, 'expires': _cookie.expires
+                } for _cookie in cookie_jar
+            ],
+            'tokens': dict(tokens) if tokens else dict()
+        }
+
+        _write_json_file(self.path, self.file, _data)
+
+    def clear(self):
+        """
+        删除缓存文件
+        """
+        if os.path.exists(self.file):
+            os.remove(self.file)
+
+
+class WikiSiteMetaCache(object):
+    """
+    wiki网站元数据(siteinfo、命名空间、interwiki及用户权限)的本地缓存
+    以网站地址为标识, 用户信息按用户标识(验证模式及凭据身份)分别保存; 缓存过期前连接网站时直接使用缓存, 由调用方在后台重新获取并更新缓存
+    """
+
+    def __init__(self, path, key, ttl=86400):
+        """
+        构造函数
+
+        @param {string} path - 缓存目录
+        @param {string} key - 网站的标识, 例如'https://host/path'
+        @param {float} ttl=86400 - 缓存的有效期(秒), 超过有效期的缓存不再使用
+        """
+        self.path = path
+        self.ttl = ttl
+        self.file = os.path.join(path, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json')
+
+    #############################
+    # 公共函数
+    #############################
+    def load(self):
+        """
+        获取缓存的网站元数据
+
+        @return {dict} - 元数据字典, 格式为{'general': siteinfo, 'namespaces': {'id': 名称},
+            'interwiki': {前缀: url}, 'users': {用户标识: userinfo}}; 缓存不存在、已过期或无法读取时返回None
+        """
+        try:
+            with open(self.file, 'r', encoding='utf-8') as f:
+                _data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if _data.get('save_time', 0) + self.ttl < time.time():
+            return None
+        return _data
+
+    def save(self, meta, user_key='', userinfo=None):
+        """
+        保存网站元数据到缓存文件, 保留缓存中其他用户的用户信息
+
+        @param {dict} meta - 网站元数据字典, 包括general、namespaces、interwiki
+        @param {string} user_key='' - 用户标识, 不同验证模式或凭据连接网站时的用户信息分别保存
+        @param {dict} userinfo=None - 用户信息(name、groups、rights等), 不传代表不更新用户信息
+        """
+        _old_data = self.load()
+        _users = dict() if _old_data is None else _old_data.get('users', dict())
+        if userinfo is not None:
+            _users[user_key] = userinfo
+
+        _data = {
+            'save_time': time.time(),
+            'general': meta['general'],
+            'namespaces': meta['namespaces'],
+            'interwiki': meta['interwiki'],
+            'users': _users
+        }
+        _write_json_file(self.path, self.file, _data)
+
+    def clear(self):
+        """
+        删除缓存文件
+        """
+        if os.path.exists(self.file):
+            os.remove(self.file)
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
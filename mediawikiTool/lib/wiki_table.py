@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+wiki表格生成工具
+@module wiki_table
+@file wiki_table.py
+"""
+
+import os
+import sys
+import json
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'wiki_table'  # 模块名
+__DESCRIPT__ = u'wiki表格生成工具'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2019.12.09'  # 发布日期
+
+
+# JSON数据页的渲染模块名
+DATA_MODULE_NAME = 'XlsToWiki'
+
+# JSON数据页的渲染模块(Lua)代码, 需要MediaWiki 1.39以上版本(mw.loadJsonData), 使用方法:
+# {{#invoke:XlsToWiki|table|data=Module:数据页.json|limit=显示行数|offset=跳过行数|filter=过滤文本|filter_col=过滤列序号}}
+DATA_MODULE_TEXT = """-- Render the JSON data page created by xlstowiki of mediawikiTool, do not edit it by hand
+-- Need MediaWiki 1.39 or later (mw.loadJsonData)
+-- {{#invoke:XlsToWiki|table|data=Module:Name/Sheet.json|limit=500|offset=0|filter=text|filter_col=1}}
+local p = {}
+
+local function match_row(row, filter, filter_col)
+    if filter == nil then
+        return true
+    end
+    if filter_col ~= nil then
+        return mw.ustring.find(row[filter_col] or '', filter, 1, true) ~= nil
+    end
+    for _, value in ipairs(row) do
+        if mw.ustring.find(value, filter, 1, true) ~= nil then
+            return true
+        end
+    end
+    return false
+end
+
+function p.table(frame)
+    local args = frame.args
+    local data = mw.loadJsonData(args.data)
+    local limit = tonumber(args.limit) or 0
+    local offset = tonumber(args.offset) or 0
+    local filter_col = tonumber(args.filter_col)
+    local filter = args.filter
+    if filter == '' then
+        filter = nil
+    end
+
+    local root = mw.html.create('table'):addClass('wikitable sortable')
+    root:tag('caption'):wikitext(args.caption or data.caption)
+    local head = nil
+    for _, value in ipairs(data.head) do
+        head = head or root:tag('tr')
+        head:tag('th'):wikitext(value)
+    end
+
+    local matched = 0
+    local shown = 0
+    for _, row in ipairs(data.rows) do
+        if limit > 0 and shown >= limit then
+            break
+        end
+        if match_row(row, filter, filter_col) then
+            matched = matched + 1
+            if matched > offset then
+                local tr = root:tag('tr')
+                for _, value in ipairs(row) do
+                    tr:tag('td'):wikitext(value)
+                end
+                shown = shown + 1
+            end
+        end
+    end
+    return tostring(root)
+end
+
+return p
+"""
+
+
+class WikiTableWriter(object):
+    """
+    wiki表格文本的增量生成工具
+    输出的片段直接交给输出函数(例如文件对象的write), 不指定输出函数时放入缓存清单, 最后一次性拼接, 避免字符串反复拼接
+    """
+
+    def __init__(self, out_fun=None):
+        """
+        构造函数
+
+        @param {function} out_fun=None - 输出函数, 传入要输出的字符串; 不传代表输出到内部缓存, 通过get_text获取
+        """
+        self._buffer = None
+        if out_fun is None:
+            self._buffer = list()
+            out_fun = self._buffer.append
+        self._out_fun = out_fun
+
+    #############################
+    # 公共函数
+    #############################
+    def write(self, text):
+        """
+        输出表格以外的文本(例如标题)
+
+        @param {string} text - 要输出的文本
+        """
+        self._out_fun(text)
+
+    def begin_table(self, caption, head, css_class='wikitable'):
+        """
+        输出表格开始部分(含标题及表头)
+
+        @param {string} caption - 表格标题
+        @param {list} head - 表头字符串数组
+        @param {string} css_class='wikitable' - 表格的样式
+        """
+        self._out_fun('{| class="%s"\n|+%s\n!%s\n' % (css_class, caption, '\n!'.join(head)))
+
+    def add_row(self, row):
+        """
+        输出表格的一行
+
+        @param {list} row - 行的字符串数组
+        """
+        self._out_fun('|-\n|%s\n' % '\n|'.join(row))
+
+    def add_rows(self, rows):
+        """
+        输出表格的多行
+
+        @param {iterator} rows - 行清单, 每行为字符串数组
+        """
+        for _row in rows:
+            self._out_fun('|-\n|%s\n' % '\n|'.join(_row))
+
+    def end_table(self):
+        """
+        输出表格结尾
+        """
+        self._out_fun('|}\n')
+
+    def get_text(self):
+        """
+        获取缓存中的文本(仅不指定输出函数时可用)
+
+        @return {string} - 已输出的全部文本
+        """
+        if self._buffer is None:
+            raise RuntimeError('the writer output to out_fun, no buffer text')
+
+        if len(self._buffer) > 1:
+            _text = ''.join(self._buffer)
+            self._buffer.clear()
+            self._buffer.append(_text)
+        return self._buffer[0] if len(self._buffer) > 0 else ''
+
+
+class WikiJsonDataWriter(WikiTableWriter):
+    """
+    将表格输出为JSON数据页的工具, 接口与WikiTableWriter一致
+    输出格式为{"caption": 标题, "head": [表头], "rows": [[行数据], ...]}, 每行数据占一行, 便于比较版本差异
+    """
+
+    def __init__(self, out_fun=None):
+        """
+        构造函数
+
+        @param {function} out_fun=None - 输出函数, 传入要输出的字符串; 不传代表输出到内部缓存, 通过get_text获取
+        """
+        WikiTableWriter.__init__(self, out_fun=out_fun)
+        self._row_sep = '\n'
+
+    #############################
+    # 公共函数
+    #############################
+    def begin_table(self, caption, head, css_class='wikitable'):
+        """
+        输出数据开始部分(含标题及表头)
+
+        @param {string} caption - 表格标题
+        @param {list} head - 表头字符串数组
+        @param {string} css_class='wikitable' - 表格的样式(JSON数据页不使用)
+        """
+        self._row_sep = '\n'
+        self._out_fun('{"caption":%s,"head":%s,"rows":[' % (self._dumps(caption), self._dumps(head)))
+
+    def add_row(self, row):
+        """
+        输出数据的一行
+
+        @param {list} row - 行的字符串数组
+        """
+        self._out_fun(self._row_sep + self._dumps(row))
+        self._row_sep = ',\n'
+
+    def add_rows(self, rows):
+        """
+        输出数据的多行
+
+        @param {iterator} rows - 行清单, 每行为字符串数组
+        """
+        for _row in rows:
+            self.add_row(_row)
+
+    def end_table(self):
+        """
+        输出数据结尾
+        """
+        self._out_fun('\n]}\n')
+
+    @staticmethod
+    def get_invoke_text(data_title, limit=0, offset=0):
+        """
+        获取在页面中渲染JSON数据页的调用文本
+
+        @param {string} data_title - JSON数据页的标题
+        @param {int} limit=0 - 显示的最大行数, 0代表显示所有行
+        @param {int} offset=0 - 跳过的行数
+
+        @return {string} - 模块调用文本
+        """
+        return '{{#invoke:%s|table|data=%s%s%s}}\n' % (
+            DATA_MODULE_NAME, data_title, ('|limit=%d' % limit) if limit > 0 else '',
+            ('|offset=%d' % offset) if offset > 0 else ''
+        )
+
+    #############################
+    # 内部函数
+    #############################
+    def _dumps(self, obj):
+        """
+        转换为紧凑的JSON字符串
+
+        @param {object} obj - 要转换的对象
+
+        @return {string} - JSON字符串
+        """
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
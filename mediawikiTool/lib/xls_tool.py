@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Excel文件处理工具
+@module xls_tool
+@file xls_tool.py
+"""
+
+import os
+import sys
+import csv
+import datetime
+import functools
+import itertools
+import xlrd
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+from mediawikiTool.lib.text_tool import detect_file_encoding
+
+
+__MOUDLE__ = 'xls_tool'  # 模块名
+__DESCRIPT__ = u'Excel文件处理工具'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2019.12.09'  # 发布日期
+
+
+# 支持的表格文件扩展名
+SUPPORT_FILE_EXTS = ('xls', 'xlsx', 'csv', 'tsv')
+
+# xlrd 2.0以上版本不再支持读取xlsx文件
+XLRD_SUPPORT_XLSX = int(getattr(xlrd, '__version__', '1').split('.')[0]) < 2
+
+
+def open_row_reader(file, stream=True, encoding=None):
+    """
+    按文件扩展名打开对应的表格行读取对象
+
+    @param {string} file - 表格文件路径
+    @param {bool} stream=True - Excel文件是否使用流式模式(CSV/TSV文件总是逐行读取)
+    @param {string} encoding=None - CSV/TSV文件的编码, 不传代表自动判断
+
+    @return {XlsRowReader|CsvRowReader} - 行读取对象
+    """
+    if os.path.splitext(file)[1].lower() in ('.csv', '.tsv'):
+        return CsvRowReader(file, encoding=encoding)
+    return XlsRowReader(file, stream=stream)
+
+
+class XlsRowReader(object):
+    """
+    按行读取Excel文件的工具
+    流式模式下, xlsx文件在安装了openpyxl的情况下使用只读模式逐行读取, 其他情况使用xlrd按需装载sheet页, 处理完成后释放;
+    非流式模式使用xlrd一次装载整个文件
+    xlrd 2.0以上版本不支持xlsx文件, 此时xlsx文件总是使用openpyxl读取, 未安装openpyxl将抛出ImportError
+    读取的是单元格的原始值, 通过to_str转换为字符串, 转换规则与xlrd的str(cell.value)保持一致
+    """
+
+    def __init__(self, file, stream=True):
+        """
+        构造函数
+
+        @param {string} file - Excel文件路径
+        @param {bool} stream=True - 是否使用流式模式
+        """
+        self.file = file
+        self._wb = None
+        self._is_openpyxl = False
+        self._date_1904 = False  # openpyxl读取的文件是否使用1904日期系统
+        self._sheets = dict()  # 已装载的xlrd sheet页
+
+        _ext = os.path.splitext(file)[1].lower()
+        if _ext in ('.xlsx', '.xlsm') and openpyxl is None and not XLRD_SUPPORT_XLSX:
+            raise ImportError(
+                'openpyxl is required to read %s file (xlrd %s not support it), please install it: pip install openpyxl'
+                % (_ext, xlrd.__version__)
+            )
+
+        if _ext in ('.xlsx', '.xlsm') and openpyxl is not None and (stream or not XLRD_SUPPORT_XLSX):
+            self._wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+            self._is_openpyxl = True
+            _epoch = getattr(self._wb, 'epoch', None)
+            self._date_1904 = _epoch is not None and _epoch.year == 1904
+        else:
+            self._wb = xlrd.open_workbook(filename=file, on_demand=stream)
+
+    #############################
+    # 公共属性
+    #############################
+    @property
+    def sheet_names(self):
+        """
+        sheet页名清单
+
+        @property {list}
+        """
+        if self._is_openpyxl:
+            return self._wb.sheetnames
+        else:
+            return self._wb.sheet_names()
+
+    @property
+    def to_str(self):
+        """
+        将读取的单元格原始值转换为字符串的函数
+
+        @property {function}
+        """
+        if self._is_openpyxl:
+            return functools.partial(self.value_to_str, date_1904=self._date_1904)
+        return str
+
+    #############################
+    # 公共函数
+    #############################
+    def read_values(self, sheet_name, row):
+        """
+        读取指定行的单元格原始值
+
+        @param {string} sheet_name - sheet页名
+        @param {int} row - 行索引, 从0开始
+
+        @return {list} - 行的单元格值数组, 行不存在返回空数组
+        """
+        for _values in self.iter_values(sheet_name, start_row=row, end_row=row):
+            return _values
+        return list()
+
+    def iter_values(self, sheet_name, start_row=0, end_row=-1):
+        """
+        逐行读取sheet页的单元格原始值
+
+        @param {string} sheet_name - sheet页名
+        @param {int} start_row=0 - 开始行, 从0开始
+        @param {int} end_row=-1 - 结束行(包含), -1代表读取到最后一行
+
+        @return {iterator} - 每次返回一行的单元格值数组, 数组长度为sheet页的列数
+        """
+        if self._is_openpyxl:
+            _sheet = self._wb[sheet_name]
+            _ncols = _sheet.max_column or 0
+            for _values in _sheet.iter_rows(
+                min_row=start_row + 1, max_row=None if end_row < 0 else end_row + 1, values_only=True
+            ):
+                if len(_values) < _ncols:
+                    _values = list(_values) + [None] * (_ncols - len(_values))
+                yield _values
+        else:
+            _sheet = self._get_xlrd_sheet(sheet_name)
+            _end_row = _sheet.nrows - 1 if end_row < 0 else min(end_row, _sheet.nrows - 1)
+            _row = start_row
+            while _row <= _end_row:
+                yield _sheet.row_values(_row)
+                _row += 1
+
+    def unload(self, sheet_name):
+        """
+        释放已装载的sheet页
+
+        @param {string} sheet_name - sheet页名
+        """
+        if not self._is_openpyxl and sheet_name in self._sheets.keys():
+            self._sheets.pop(sheet_name)
+            self._wb.unload_sheet(sheet_name)
+
+    def close(self):
+        """
+        关闭文件
+        """
+        if self._wb is None:
+            return
+
+        if self._is_openpyxl:
+            self._wb.close()
+        else:
+            self._sheets.clear()
+            self._wb.release_resources()
+        self._wb = None
+
+    @staticmethod
+    def value_to_str(value, date_1904=False):
+        """
+        将openpyxl读取的单元格值转换为与xlrd一致的字符串
+        (xlrd空单元格为'', 数字为float, 布尔值为0/1, 日期时间为Excel的日期序列号float)
+
+        @param {object} value - 单元格值
+        @param {bool} date_1904=False - 文件是否使用1904日期系统
+
+        @return {string} - 字符串
+        """
+        if value is None:
+            return ''
+        elif isinstance(value, bool):
+            return str(int(value))
+        elif isinstance(value, int):
+            return str(float(value))
+        elif isinstance(value, (datetime.datetime, datetime.date, datetime.time, datetime.timedelta)):
+            return str(XlsRowReader.date_to_serial(value, date_1904=date_1904))
+        else:
+            return str(value)
+
+    @staticmethod
+    def date_to_serial(value, date_1904=False):
+        """
+        将日期时间转换为Excel的日期序列号(与xlrd读取日期单元格的值一致)
+
+        @param {datetime.datetime|datetime.date|datetime.time|datetime.timedelta} value - 日期时间值
+        @param {bool} date_1904=False - 文件是否使用1904日期系统
+
+        @return {float} - 日期序列号, 整数部分为天数, 小数部分为一天中的时间
+        """
+        if isinstance(value, datetime.timedelta):
+            return value.total_seconds() / 86400
+        if isinstance(value, datetime.time):
+            return (
+                value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1000000
+            ) / 86400
+        if not isinstance(value, datetime.datetime):
+            value = datetime.datetime(value.year, value.month, value.day)
+
+        if date_1904:
+            return XlsRowReader.date_to_serial(value.replace(tzinfo=None) - datetime.datetime(1904, 1, 1))
+
+        _serial = XlsRowReader.date_to_serial(value.replace(tzinfo=None) - datetime.datetime(1899, 12, 30))
+        if _serial < 61:
+            # Excel的1900日期系统将1900年视为闰年, 1900-03-01之前的序列号少1
+            _serial -= 1
+        return _serial
+
+    #############################
+    # 内部函数
+    #############################
+    def _get_xlrd_sheet(self, sheet_name):
+        """
+        获取xlrd的sheet页(按需装载)
+
+        @param {string} sheet_name - sheet页名
+
+        @return {xlrd.sheet.Sheet} - sheet页对象
+        """
+        if sheet_name not in self._sheets.keys():
+            self._sheets[sheet_name] = self._wb.sheet_by_name(sheet_name)
+        return self._sheets[sheet_name]
+
+
+class CsvRowReader(object):
+    """
+    按行读取CSV/TSV文件的工具, 接口与XlsRowReader一致
+    文件作为一个sheet页(页名为不含扩展名的文件名), 每次读取都从文件头逐行解析, 内存占用与文件大小无关
+    读取的单元格值均为字符串, 数字不会像Excel一样转换为浮点数(例如1不会显示为1.0)
+    """
+
+    def __init__(self, file, encoding=None):
+        """
+        构造函数
+
+        @param {string} file - CSV/TSV文件路径, .tsv文件使用制表符分隔, 其他使用逗号分隔
+        @param {string} encoding=None - 文件编码, 不传代表自动判断
+        """
+        self.file = file
+        self.encoding = encoding if encoding else detect_file_encoding(file)
+        self.delimiter = '\t' if os.path.splitext(file)[1].lower() == '.tsv' else ','
+        self._sheet_name = os.path.splitext(os.path.basename(file))[0]
+
+    #############################
+    # 公共属性
+    #############################
+    @property
+    def sheet_names(self):
+        """
+        sheet页名清单
+
+        @property {list}
+        """
+        return [self._sheet_name]
+
+    @property
+    def to_str(self):
+        """
+        将读取的单元格原始值转换为字符串的函数
+
+        @property {function}
+        """
+        return str
+
+    #############################
+    # 公共函数
+    #############################
+    def read_values(self, sheet_name, row):
+        """
+        读取指定行的单元格值
+
+        @param {string} sheet_name - sheet页名
+        @param {int} row - 行索引, 从0开始
+
+        @return {list} - 行的单元格值数组, 行不存在返回空数组
+        """
+        for _values in self.iter_values(sheet_name, start_row=row, end_row=row):
+            return _values
+        return list()
+
+    def iter_values(self, sheet_name, start_row=0, end_row=-1):
+        """
+        逐行读取单元格值
+
+        @param {string} sheet_name - sheet页名
+        @param {int} start_row=0 - 开始行, 从0开始
+        @param {int} end_row=-1 - 结束行(包含), -1代表读取到最后一行
+
+        @return {iterator} - 每次返回一行的单元格值数组
+        """
+        if sheet_name != self._sheet_name:
+            raise KeyError('sheet [%s] not found' % sheet_name)
+
+        with open(self.file, 'r', encoding=self.encoding, newline='') as f:
+            _reader = csv.reader(f, delimiter=self.delimiter)
+            for _values in itertools.islice(_reader, start_row, None if end_row < 0 else end_row + 1):
+                yield _values
+
+    def unload(self, sheet_name):
+        """
+        释放已装载的sheet页(逐行读取, 无需处理)
+
+        @param {string} sheet_name - sheet页名
+        """
+        pass
+
+    def close(self):
+        """
+        关闭文件(每次读取时打开文件, 无需处理)
+        """
+        pass
+
+
+class XlsSheetPlan(object):
+    """
+    sheet页的转换执行计划
+    将xlstowiki.mt的sheet页参数预先编译为要输出的列索引数组及对应的显示值转换字典, 每行只读取和转换要显示的列
+    """
+
+    def __init__(self, sheet_para, to_str=str):
+        """
+        构造函数
+
+        @param {dict} sheet_para - sheet页的转换参数(xlstowiki.mt的default_para格式), 不会被修改
+        @param {function} to_str=str - 将单元格原始值转换为字符串的函数
+        """
+        self.has_head = sheet_para['has_head']
+        self.head_row = sheet_para['head_row']
+        self.data_row_start = sheet_para['data_row_start']
+        self.data_row_end = sheet_para['data_row_end']
+        self.cols = None  # 要输出的列索引数组, None代表按每行自身的列数输出
+        self._to_str = to_str
+        self._col_filter = list(sheet_para['col_filter'])
+        self._col_start = sheet_para['data_col_start']
+        self._col_end = sheet_para['data_cols_end']
+        self._head_trans = sheet_para['head_trans_dict']
+        self._col_trans = {
+            int(_index): _trans for _index, _trans in sheet_para['col_trans_dict'].items()
+        }
+        self._steps = None  # 每个输出列的(列索引, 显示值转换字典)
+
+        if len(self._col_filter) > 0:
+            self.cols = self._col_filter
+        elif self._col_end >= 0:
+            self.cols = list(range(self._col_start, self._col_end + 1))
+
+        if self.cols is not None:
+            # 输出列与行的列数无关, 直接编译
+            self._steps = [(_col, self._col_trans.get(_col, None)) for _col in self.cols]
+
+    #############################
+    # 公共函数
+    #############################
+    def convert_head(self, values):
+        """
+        转换表格头
+
+        @param {list} values - 表格头行的单元格原始值数组
+
+        @return {list} - 要显示的表格头字符串数组
+        """
+        _len = len(values)
+        _head = list()
+        for _col in (self.cols if self.cols is not None else range(self._col_start, _len)):
+            _str = self._to_str(values[_col]) if _col < _len else ''
+            _head.append(self._head_trans.get(_str, _str))
+        return _head
+
+    def convert_row(self, values):
+        """
+        转换数据行
+
+        @param {list} values - 数据行的单元格原始值数组
+
+        @return {list} - 要显示的字符串数组
+        """
+        _len = len(values)
+        _steps = self._steps
+        if _steps is None:
+            # 未指定结束列, 按本行自身的列数输出
+            _steps = [(_col, self._col_trans.get(_col, None)) for _col in range(self._col_start, _len)]
+
+        _row = list()
+        for _col, _trans in _steps:
+            _str = self._to_str(values[_col]) if _col < _len else ''
+            if _trans is not None:
+                _str = _trans.get(_str, _str)
+            _row.append(_str)
+        return _row
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
@@ -24,6 +24,7 @@ DEPENDENCIES = [
     'HiveNetLib>=0.7.5',
     'mwclient',
     'xlrd',
+    'openpyxl',
     'prompt-toolkit>=2.0.0'
 ]
 
@@ -53,10 +54,13 @@ setup(
     install_requires=DEPENDENCIES,
     tests_require=TEST_DEPENDENCIES,
     package_data={'': ['*.json', '*.xml']},  # 这里将打包所有的json文件
+    python_requires='>=3.7',  # 多进程转换使用的ProcessPoolExecutor(initializer=...)需要3.7以上版本
     classifiers=[
         'Operating System :: OS Independent',
         'License :: OSI Approved :: Mozilla Public License 2.0 (MPL 2.0)',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
         'Topic :: Software Development :: Libraries'
     ],
     entry_points={'console_scripts': [
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+import os
+import unittest
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from mediawikiTool.lib.md_converter import MdToWikiConverter
+
+
+class Test(unittest.TestCase):
+
+    def test_block(self):
+        print("test md_converter block")
+        _md_text = '\n'.join([
+            '# head1', '', 'line 1', 'line 2', '', 'head2', '---', '',
+            '- item 1', '- item 2', '    - sub item', '', '1. one', '2. two', '',
+            '```python', 'print(1)', '```', '', '> quote', '', '***'
+        ])
+        _wiki_text = MdToWikiConverter.convert(_md_text)
+        self.assertEqual(
+            _wiki_text,
+            '= head1 =\n\nline 1 line 2\n\n== head2 ==\n\n'
+            '* item 1\n* item 2\n** sub item\n\n# one\n# two\n\n'
+            '<syntaxhighlight lang="python">print(1)\n</syntaxhighlight>\n\n'
+            '<blockquote>quote\n</blockquote>\n\n-----\n'
+        )
+
+    def test_inline(self):
+        print("test md_converter inline")
+        _converter = MdToWikiConverter()
+        self.assertEqual(
+            _converter.convert_inline('*a* **b** ***c*** ~~d~~ `<e>` `**f**`'),
+            "''a'' '''b''' '''''c''''' <s>d</s> <code>&lt;e&gt;</code> <code>**f**</code>"
+        )
+        self.assertEqual(
+            _converter.convert_inline('[site](http://a.com) [page](help:page) <http://b.com>'),
+            '[http://a.com site] [[help:page|page]] http://b.com'
+        )
+        # 链接地址中成对的括号
+        self.assertEqual(
+            _converter.convert_inline('[Foo](https://en.wikipedia.org/wiki/Foo_(bar)) ([a](http://a.com))'),
+            '[https://en.wikipedia.org/wiki/Foo_(bar) Foo] ([http://a.com a])'
+        )
+        self.assertEqual(_converter.convert_inline('![i](pic/a_(1).png "t")'), '[[Image:pic/a_(1).png|i]]')
+
+    def test_escape(self):
+        print("test md_converter escape")
+        _converter = MdToWikiConverter()
+        self.assertEqual(
+            _converter.convert_inline("{{x}} [[y]] __TOC__ ~~~~ it''s *a*"),
+            '<nowiki>{{</nowiki>x<nowiki>}}</nowiki> <nowiki>[[</nowiki>y<nowiki>]]</nowiki> '
+            "<nowiki>__TOC__</nowiki> <nowiki>~~~~</nowiki> it<nowiki>''</nowiki>s ''a''"
+        )
+        # wiki允许的html标签原样输出, 其他标签按原样显示
+        self.assertEqual(
+            _converter.convert_inline('a<br>b <sub>2</sub> <span class="x_y_z">s</span> <ref>r</ref>'),
+            'a<br>b <sub>2</sub> <span class="x_y_z">s</span> <nowiki><ref></nowiki>r<nowiki></ref></nowiki>'
+        )
+        self.assertEqual(
+            MdToWikiConverter.convert('| a<br>b |\n|---|\n| <div>c</div> |\n'),
+            '{| class="wikitable"\n|-\n! a<br>b\n|-\n| <div>c</div>\n|}\n'
+        )
+        self.assertEqual(
+            MdToWikiConverter.convert('a  \n:b\n\n- item\n\n  para\n- next\n'),
+            'a<br />\n<nowiki>:</nowiki>b\n\n* item<br /><br />para\n* next\n'
+        )
+
+    def test_table(self):
+        print("test md_converter table")
+        _md_text = '| a | b |\n|---|:-:|\n| 1 | 2 |\n'
+        self.assertEqual(
+            MdToWikiConverter.convert(_md_text),
+            '{| class="wikitable"\n|-\n! a\n! b\n|-\n| 1\n| 2\n|}\n'
+        )
+
+    def test_pic(self):
+        print("test md_converter pic")
+        _pic_list = list()
+
+        def _pic_fun(src, alt):
+            _pic_list.append(src)
+            return '[[Image:pic_%d.png|%s]]' % (len(_pic_list), alt)
+
+        _wiki_text = MdToWikiConverter.convert(
+            'a![img1](pic/1.png)b\n\n<img src="http://a.com/2.png" alt="img2" style="zoom:33%;" />',
+            pic_fun=_pic_fun
+        )
+        self.assertEqual(_pic_list, ['pic/1.png', 'http://a.com/2.png'])
+        self.assertEqual(_wiki_text, 'a[[Image:pic_1.png|img1]]b\n\n[[Image:pic_2.png|img2]]\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
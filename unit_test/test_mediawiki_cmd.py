@@ -4,11 +4,18 @@
 import sys
 import os
 import unittest
+import json
+import shutil
+import time
+import threading
+import unittest.mock
 from HiveNetLib.simple_i18n import _, SimpleI18N, set_global_i18n
 from HiveNetLib.base_tools.run_tool import RunTool
+from HiveNetLib.base_tools.file_tool import FileTool
 # 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
-from mediawikiTool.lib.mediawiki_cmd import MediaWikiCmd
+from mediawikiTool.lib.mediawiki_cmd import MediaWikiCmd, MediaWikiSite, BufferPrompt
+from mediawikiTool.lib.md_converter import MdToWikiConverter
 
 
 _TEST_DATA_DIR = os.path.abspath(os.path.dirname(__file__) + '/' +
@@ -19,6 +26,70 @@ _I18N_File_DIR = os.path.abspath(os.path.dirname(__file__) + '/' +
                                  '../mediawikiTool/i18n/').replace('\\', '/')
 
 
+class FakeQuerySite(object):
+    """
+    模拟mwclient.Site的页面查询, 按请求的续传参数返回预置的结果
+    """
+
+    def __init__(self, responses):
+        """
+        构造函数
+
+        @param {dict} responses - 预置的结果, key为续传参数(没有续传时为None), value为返回的结果
+        """
+        self.version = (1, 35, 0)
+        self.rights = list()
+        self.responses = responses
+        self.requests = list()
+
+    def post(self, action, **kwargs):
+        self.requests.append(kwargs)
+        return self.responses[kwargs.get('plcontinue', kwargs.get('rvcontinue', None))]
+
+
+
+class FakeLinkSite(object):
+    """
+    模拟mwclient.Site的页面查询, 按预置的链接关系返回页面, 查询包含'Error'页面的批次时抛出异常
+    """
+
+    def __init__(self, links):
+        """
+        构造函数
+
+        @param {dict} links - 页面的链接关系, key为页面标题, value为链接的页面标题清单
+        """
+        self.version = (1, 35, 0)
+        self.rights = list()
+        self.links = links
+        self.titles = list()
+        self._lock = threading.Lock()
+
+    def post(self, action, **kwargs):
+        _titles = kwargs['titles'].split('|')
+        with self._lock:
+            self.titles.extend(_titles)
+        if 'Error' in _titles:
+            raise RuntimeError('query error')
+        _pages = dict()
+        for _index, _title in enumerate(_titles):
+            _pages[str(_index)] = {
+                'title': _title, 'revisions': [{'slots': {'main': {'*': 'text of %s' % _title}}}],
+                'links': [{'ns': 0, 'title': _link} for _link in self.links[_title]]
+            }
+        return {'query': {'pages': _pages}}
+
+
+class SlowPrompt(BufferPrompt):
+    """
+    每次打印都稍作等待的提示对象, 用于检查多线程输出是否交错
+    """
+
+    def prompt_print(self, *args, **kwargs):
+        time.sleep(0.01)
+        super().prompt_print(*args, **kwargs)
+
+
 def setUpModule():
     # print("test module start >>>>>>>>>>>>>>")
     _i18n_obj = SimpleI18N(
@@ -72,6 +143,332 @@ class Test(unittest.TestCase):
         for _ret_str in _result:
             print(_ret_str)
 
+    def test_mdtowiki_native(self):
+        # mdtowiki -in D:\opensource\mediawikiTool\test_data\mediawiki_cmd\mdtowiki_native.md -out D:\opensource\mediawikiTool\test_data\temp\mediawiki_cmd -stdpic -engine native
+        print("test mdtowiki native")
+        _mediawiki_cmd = MediaWikiCmd()
+        _result = None
+        for _result in _mediawiki_cmd.cmd_dealfun(
+            message='', cmd='mdtowiki',
+            cmd_para='-in %s/mediawiki_cmd/mdtowiki_native.md -out %s/mediawiki_cmd/ -stdpic -engine native' % (
+                _TEST_DATA_DIR, _TEMP_DIR
+            ),
+            prompt_obj=BufferPrompt()
+        ):
+            print(_result)
+        self.assertEqual(_result.code, '00000')
+
+        _out_file = '%s/mediawiki_cmd/mdtowiki_native.txt' % _TEMP_DIR
+        self.assertFalse(os.path.exists(_out_file + '.tmp'))
+        with open(_out_file, 'r', encoding='utf-8') as f:
+            _text = f.read()
+        _pic_name = 'mdtowiki_native_%s_00001.png' % _('embed')
+        self.assertIn('= native engine =', _text)
+        self.assertIn(
+            'Use <nowiki>{{</nowiki>x<nowiki>}}</nowiki> and <nowiki>[[</nowiki>y<nowiki>]]</nowiki> as text, '
+            '<div>raw</div> too.', _text
+        )
+        self.assertIn('[[Image:%s|pic one]]' % _pic_name, _text)
+        self.assertIn('* item one<br /><br />item one para\n* item two', _text)
+        self.assertTrue(os.path.exists('%s/mediawiki_cmd/mdtowiki_native_copy_pic/%s' % (_TEMP_DIR, _pic_name)))
+
+        # 转换失败时不保留临时文件
+        with unittest.mock.patch.object(MdToWikiConverter, 'close', side_effect=RuntimeError('convert error')):
+            for _result in _mediawiki_cmd.cmd_dealfun(
+                message='', cmd='mdtowiki',
+                cmd_para='-in %s/mediawiki_cmd/mdtowiki_native.md -out %s/mediawiki_cmd/ -stdpic -engine native' % (
+                    _TEST_DATA_DIR, _TEMP_DIR
+                ),
+                prompt_obj=BufferPrompt()
+            ):
+                print(_result)
+        self.assertNotEqual(_result.code, '00000')
+        self.assertFalse(os.path.exists(_out_file + '.tmp'))
+
+    def test_mdtowiki_concurrent(self):
+        # 同一个MediaWikiCmd对象在多个线程中同时转换
+        print("test mdtowiki concurrent")
+        _mediawiki_cmd = MediaWikiCmd()
+
+        _results = dict()
+
+        def _convert(name):
+            for _result in _mediawiki_cmd.cmd_dealfun(
+                message='', cmd='mdtowiki',
+                cmd_para='-in %s/mediawiki_cmd/help{ns}cmd{sub}mdtowiki.md -out %s/mediawiki_cmd/ -name %s -stdpic -engine native' % (
+                    _TEST_DATA_DIR, _TEMP_DIR, name
+                ),
+                prompt_obj=BufferPrompt()
+            ):
+                _results[name] = _result
+
+        _names = ['concurrent_%d' % _i for _i in range(4)]
+        _threads = [threading.Thread(target=_convert, args=(_name, )) for _name in _names]
+        for _thread in _threads:
+            _thread.start()
+        for _thread in _threads:
+            _thread.join()
+
+        for _name in _names:
+            self.assertEqual(_results[_name].code, '00000')
+            _text = open(
+                '%s/mediawiki_cmd/%s.txt' % (_TEMP_DIR, _name), 'r', encoding='utf-8'
+            ).read()
+            # 每个转换的图片名只使用自己的页面名, 图片放在自己的目录
+            self.assertTrue('%s_' % _name in _text)
+            _pics = os.listdir('%s/mediawiki_cmd/%s_copy_pic' % (_TEMP_DIR, _name))
+            self.assertTrue(len(_pics) > 0)
+            for _other in _names:
+                if _other != _name:
+                    self.assertFalse('%s_' % _other in _text)
+                    for _pic in _pics:
+                        self.assertFalse(_pic.startswith('%s_' % _other))
+
+    def test_filestowiki_filter(self):
+        # 并行转换时filter.mt按源文件顺序记录, Excel的子页面跟随所属文件
+        print("test filestowiki filter")
+        _in_dir = '%s/mediawiki_cmd/filestowiki_in' % _TEMP_DIR
+        _out_dir = '%s/mediawiki_cmd/filestowiki_out' % _TEMP_DIR
+        shutil.rmtree(_in_dir, ignore_errors=True)
+        shutil.rmtree(_out_dir, ignore_errors=True)
+        os.makedirs(_in_dir)
+        for _index in range(3):
+            with open('%s/md_%d.md' % (_in_dir, _index), 'w', encoding='utf-8') as f:
+                f.write('# md %d\n' % _index)
+            with open('%s/csv_%d.csv' % (_in_dir, _index), 'w', encoding='utf-8') as f:
+                f.write('a,b\n' + ''.join(['%d,%d\n' % (_index, _row) for _row in range(5)]))
+
+        # 并行转换的工作进程需要主进程的工作路径
+        RunTool.get_global_var('CONSOLE_GLOBAL_PARA')['work_path'] = _TEMP_DIR
+        _result = None
+        for _result in MediaWikiCmd().cmd_dealfun(
+            message='', cmd='filestowiki',
+            cmd_para='-in %s -out %s -engine native -add_filter -page_rows 2 -jobs 3' % (_in_dir, _out_dir),
+            prompt_obj=BufferPrompt()
+        ):
+            print(_result)
+        self.assertEqual(_result.code, '00000')
+
+        with open('%s/filter.mt' % _out_dir, 'r', encoding='utf-8') as f:
+            _files = [_line.split('|')[0] for _line in f.read().split('\n') if _line.strip() != '']
+        _sources = [os.path.splitext(_file)[0] for _file in FileTool.get_filelist(path=_in_dir, is_fullname=False)]
+        _expect = list()
+        for _name in _sources:
+            _expect.append(_name + '.txt')
+            _expect.extend(sorted(
+                [_file for _file in _files if _file.startswith(_name + '{sub}')],
+                key=lambda _file: _files.index(_file)
+            ))
+        self.assertEqual(_files, _expect)
+        self.assertEqual(len(_files), len(set(_files)))
+        self.assertTrue(len(_files) > len(_sources))
+
+    def test_filestowiki_incremental(self):
+        # 增量转换跳过没有变化的文件, 输出文件被部分删除时重新转换, 未指定-add_filter时不修改filter.mt
+        print("test filestowiki incremental")
+        _in_dir = '%s/mediawiki_cmd/incremental_in' % _TEMP_DIR
+        _out_dir = '%s/mediawiki_cmd/incremental_out' % _TEMP_DIR
+        shutil.rmtree(_in_dir, ignore_errors=True)
+        shutil.rmtree(_out_dir, ignore_errors=True)
+        shutil.copytree('%s/mediawiki_cmd/mdtowiki_pic' % _TEST_DATA_DIR, '%s/mdtowiki_pic' % _in_dir)
+        shutil.copyfile('%s/mediawiki_cmd/mdtowiki_native.md' % _TEST_DATA_DIR, '%s/native.md' % _in_dir)
+        with open('%s/data.csv' % _in_dir, 'w', encoding='utf-8') as f:
+            f.write(''.join(['%d,%d\n' % (_row, _row * 2) for _row in range(5)]))
+        os.makedirs(_out_dir)
+        with open('%s/filter.mt' % _out_dir, 'w', encoding='utf-8') as f:
+            f.write('my_page.txt|my_page|\n')
+
+        def _convert():
+            _prompt = BufferPrompt()
+            for _result in MediaWikiCmd().cmd_dealfun(
+                message='', cmd='filestowiki',
+                cmd_para='-in %s -out %s -engine native -page_rows 2 -incremental' % (_in_dir, _out_dir),
+                prompt_obj=_prompt
+            ):
+                self.assertEqual(_result.code, '00000')
+            return ''.join(_prompt.print_list).count(_('source file not change, skip convert'))
+
+        RunTool.get_global_var('CONSOLE_GLOBAL_PARA')['work_path'] = _TEMP_DIR
+        self.assertEqual(_convert(), 0)
+        self.assertEqual(_convert(), 2)
+        with open('%s/filter.mt' % _out_dir, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'my_page.txt|my_page|\n')
+
+        # 删除子页面及图片后重新转换
+        os.remove('%s/data{sub}data{sub}2.txt' % _out_dir)
+        shutil.rmtree('%s/native_copy_pic' % _out_dir)
+        self.assertEqual(_convert(), 0)
+        self.assertTrue(os.path.exists('%s/data{sub}data{sub}2.txt' % _out_dir))
+        self.assertTrue(len(os.listdir('%s/native_copy_pic' % _out_dir)) > 0)
+        self.assertEqual(_convert(), 2)
+
+    def test_dedup_converted_pics(self):
+        # 内容相同的图片使用图片库中的图片名, 命名空间不区分大小写, 图片名区分大小写
+        print("test dedup converted pics")
+        _out_dir = '%s/mediawiki_cmd/dedup_out' % _TEMP_DIR
+        shutil.rmtree(_out_dir, ignore_errors=True)
+        for _name, _pic in (('a', 'img.png'), ('b', 'pic.png')):
+            os.makedirs('%s/%s_copy_pic' % (_out_dir, _name))
+            with open('%s/%s_copy_pic/%s' % (_out_dir, _name, _pic), 'wb') as f:
+                f.write(b'same picture')
+        with open('%s/a.txt' % _out_dir, 'w', encoding='utf-8') as f:
+            f.write('[[File:img.png]]\n')
+        with open('%s/b.txt' % _out_dir, 'w', encoding='utf-8') as f:
+            f.write('[[image:pic.png|p]] [[File:PIC.PNG]]\n')
+
+        _mediawiki_cmd = MediaWikiCmd()
+        _pic_store = dict()
+        for _name in ('a', 'b'):
+            _mediawiki_cmd._dedup_converted_pics(
+                '%s.md' % _name, {'-out': _out_dir}, _pic_store, BufferPrompt()
+            )
+        with open('%s/b.txt' % _out_dir, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), '[[image:img.png|p]] [[File:PIC.PNG]]\n')
+        self.assertFalse(os.path.exists('%s/b_copy_pic' % _out_dir))
+        self.assertTrue(os.path.exists('%s/a_copy_pic/img.png' % _out_dir))
+
+    def test_xlstowiki_json_pages(self):
+        # JSON格式分页时每个子页面使用自己的数据页, filter.mt中模块及数据页在最前面
+        print("test xlstowiki json pages")
+        _out_dir = '%s/mediawiki_cmd/xlstowiki_json' % _TEMP_DIR
+        shutil.rmtree(_out_dir, ignore_errors=True)
+        os.makedirs(_out_dir)
+        _csv_file = '%s/json_data.csv' % _out_dir
+        with open(_csv_file, 'w', encoding='utf-8') as f:
+            f.write(''.join(['%d,%d\n' % (_row, _row * 2) for _row in range(5)]))
+
+        _result = None
+        for _result in MediaWikiCmd().cmd_dealfun(
+            message='', cmd='xlstowiki',
+            cmd_para='-in %s -out %s -format json -page_rows 2 -add_filter' % (_csv_file, _out_dir),
+            prompt_obj=BufferPrompt()
+        ):
+            print(_result)
+        self.assertEqual(_result.code, '00000')
+
+        with open('%s/filter.mt' % _out_dir, 'r', encoding='utf-8') as f:
+            _files = [_line.split('|')[0] for _line in f.read().split('\n') if _line.strip() != '']
+        self.assertEqual(_files, [
+            'Module{ns}XlsToWiki.txt', 'Module{ns}json_data{sub}json_data{sub}1.json.txt',
+            'Module{ns}json_data{sub}json_data{sub}2.json.txt', 'Module{ns}json_data{sub}json_data{sub}3.json.txt',
+            'json_data.txt', 'json_data{sub}json_data{sub}1.txt', 'json_data{sub}json_data{sub}2.txt',
+            'json_data{sub}json_data{sub}3.txt'
+        ])
+        with open('%s/Module{ns}json_data{sub}json_data{sub}3.json.txt' % _out_dir, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.loads(f.read())['rows'], [['4', '8']])
+        with open('%s/json_data{sub}json_data{sub}3.txt' % _out_dir, 'r', encoding='utf-8') as f:
+            self.assertIn('{{#invoke:XlsToWiki|table|data=Module:json_data/json_data/3.json|limit=500}}', f.read())
+
+        # 数据行数超过单次渲染行数时输出按offset显示的分页页面, 并删除多余的分页页面
+        for _limit in (2, 3):
+            for _result in MediaWikiCmd().cmd_dealfun(
+                message='', cmd='xlstowiki',
+                cmd_para='-in %s -out %s -format json -data_page_limit %d' % (_csv_file, _out_dir, _limit),
+                prompt_obj=BufferPrompt()
+            ):
+                print(_result)
+            self.assertEqual(_result.code, '00000')
+        self.assertEqual(_result.page_files, [
+            'Module{ns}XlsToWiki.txt', 'Module{ns}json_data{sub}json_data.json.txt', 'json_data.txt',
+            'json_data{sub}json_data{sub}offset{sub}3.txt'
+        ])
+        self.assertFalse(os.path.exists('%s/json_data{sub}json_data{sub}offset{sub}2.txt' % _out_dir))
+        with open('%s/json_data.txt' % _out_dir, 'r', encoding='utf-8') as f:
+            self.assertIn(
+                "'''1 - 3''' | [[json_data/json_data/offset/3|4 - 5]]\n"
+                '{{#invoke:XlsToWiki|table|data=Module:json_data/json_data.json|limit=3}}', f.read()
+            )
+        with open('%s/json_data{sub}json_data{sub}offset{sub}3.txt' % _out_dir, 'r', encoding='utf-8') as f:
+            self.assertEqual(
+                f.read(), "[[json_data#json_data|1 - 3]] | '''4 - 5'''\n"
+                '{{#invoke:XlsToWiki|table|data=Module:json_data/json_data.json|limit=3|offset=3}}\n'
+            )
+
+    def test_query_wiki_pages(self):
+        # 标题的标准化及繁简转换、不存在的页面及两步续传
+        print("test query wiki pages")
+        _site = MediaWikiSite()
+        _site._mwsite = FakeQuerySite({
+            None: {
+                'continue': {'rvcontinue': '2|20', 'continue': '||'},
+                'query': {
+                    'normalized': [{'from': 'main page', 'to': 'Main page'}, {'from': 'a_b', 'to': 'A b'}],
+                    'converted': [{'from': 'Main page', 'to': 'Main Page'}],
+                    'pages': {
+                        '1': {'pageid': 1, 'title': 'Main Page', 'revisions': [{'slots': {'main': {'*': 'main text'}}}],
+                              'links': [{'ns': 0, 'title': 'Link 1'}]},
+                        '-1': {'title': 'Missing', 'missing': ''},
+                        '-2': {'title': 'Bad[', 'invalid': ''},
+                        '2': {'pageid': 2, 'title': 'A b'}
+                    }
+                }
+            },
+            '2|20': {
+                'continue': {'plcontinue': '1|0|Link 2', 'continue': '||revisions'},
+                'query': {'pages': {
+                    '1': {'pageid': 1, 'title': 'Main Page'},
+                    '2': {'pageid': 2, 'title': 'A b', 'revisions': [{'slots': {'main': {'*': 'a b text'}}}]}
+                }}
+            },
+            '1|0|Link 2': {
+                'query': {'pages': {
+                    '1': {'pageid': 1, 'title': 'Main Page', 'links': [{'ns': 0, 'title': 'Link 2'}]},
+                    '2': {'pageid': 2, 'title': 'A b'}
+                }}
+            }
+        })
+        _infos = _site._query_wiki_pages(['main page', 'a_b', 'Missing', 'Bad['], get_links=True)
+        self.assertEqual(len(_site._mwsite.requests), 3)
+        self.assertEqual(_site._mwsite.requests[0]['rvslots'], 'main')
+        self.assertEqual(_site._mwsite.requests[2]['plcontinue'], '1|0|Link 2')
+        self.assertEqual(_infos['main page']['title'], 'Main Page')
+        self.assertEqual(_infos['main page']['text'], 'main text')
+        self.assertEqual(_infos['main page']['links'], ['Link 1', 'Link 2'])
+        self.assertEqual(_infos['a_b']['text'], 'a b text')
+        self.assertIsNone(_infos['Missing'])
+        self.assertIsNone(_infos['Bad['])
+
+    def test_get_wiki_pages(self):
+        # 按层级广度优先获取链接页面, 已获取的页面不重复获取
+        print("test get wiki pages")
+        _out_dir = '%s/mediawiki_cmd/get_wiki_pages' % _TEMP_DIR
+        shutil.rmtree(_out_dir, ignore_errors=True)
+        os.makedirs(_out_dir)
+        _links = {
+            'A': ['B', 'C'], 'B': ['C', 'D', 'A'], 'C': ['A', 'E'], 'D': ['F'], 'E': ['D'], 'F': [], 'Error': []
+        }
+        _site = MediaWikiSite()
+        _site._prompt_obj = BufferPrompt()
+        _site._mwsite = FakeLinkSite(_links)
+        _site._get_wiki_pages('A', _out_dir, get_links=True, max_level=2, jobs=4)
+        self.assertEqual(sorted(_site._mwsite.titles), ['A', 'B', 'C', 'D', 'E'])
+        self.assertEqual(sorted(os.listdir(_out_dir)), ['A.txt', 'B.txt', 'C.txt', 'D.txt', 'E.txt'])
+
+        # 并发获取时每个页面的输出信息连续, 不与其他页面交错
+        _site._prompt_obj = SlowPrompt()
+        _site._mwsite = FakeLinkSite(_links)
+        _site._get_wiki_pages('A', _out_dir, get_links=True, max_level=2, jobs=4)
+        _print_list = _site._prompt_obj.print_list
+        for _title in ('A', 'B', 'C', 'D', 'E'):
+            _index = _print_list.index('%s: %s =====================>\n' % (_('getting page'), _title))
+            self.assertIn('[%s]' % _title, _print_list[_index + 1])
+
+        # 限制最多获取的页面数
+        _site._mwsite = FakeLinkSite(_links)
+        _site._get_wiki_pages('A', _out_dir, get_links=True, max_level=5, jobs=4, max_pages=3)
+        self.assertEqual(sorted(_site._mwsite.titles), ['A', 'B', 'C'])
+
+        # 第一层页面的错误抛出异常, 下层页面的错误只打印
+        _site._mwsite = FakeLinkSite(_links)
+        self.assertRaises(RuntimeError, _site._get_wiki_pages, 'Error', _out_dir, get_links=True)
+
+        _links['F'] = ['Error']
+        _site._prompt_obj = BufferPrompt()
+        _site._mwsite = FakeLinkSite(_links)
+        _site._get_wiki_pages('D', _out_dir, get_links=True, max_level=3, jobs=4)
+        self.assertEqual(_site._mwsite.titles, ['D', 'F', 'Error'])
+        self.assertTrue(any(['query error' in _str for _str in _site._prompt_obj.print_list]))
+
     def test_docxtowiki(self):
         # docxtowiki -in D:\opensource\mediawikiTool\test_data\mediawiki_cmd\docxtowik.docx -out D:\opensource\mediawikiTool\test_data\temp\mediawiki_cmd
         print("test docxtowiki")
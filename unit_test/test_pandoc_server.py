@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+import os
+import time
+import json
+import threading
+import unittest
+import http.server
+import requests
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from mediawikiTool.lib.pandoc_server import PandocServer, PandocServerTimeout, PandocServerUnavailable
+
+
+class FakePandocHandler(http.server.BaseHTTPRequestHandler):
+    """
+    模拟pandoc server的转换接口, 按传入的文本返回结果
+    """
+
+    def do_POST(self):
+        _para = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if _para['text'] == 'slow':
+            time.sleep(1)
+        if _para['text'] == 'server timeout':
+            self.send_response(503)
+            self.end_headers()
+            self.wfile.write(b'Server timeout')
+            return
+
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(json.dumps({'output': _para['text'].upper()}).encode('utf-8'))
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeProcess(object):
+    """
+    模拟运行中的pandoc进程
+    """
+
+    def poll(self):
+        return None
+
+
+class Test(unittest.TestCase):
+
+    def test_convert(self):
+        print("test pandoc_server convert")
+        _http_server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), FakePandocHandler)
+        threading.Thread(target=_http_server.serve_forever, daemon=True).start()
+
+        _server = PandocServer()
+        _server.port = _http_server.server_address[1]
+        _server._process = FakeProcess()
+        _server._session = requests.Session()
+        _server._available = True
+        try:
+            self.assertEqual(_server.convert('text', 'markdown', 'mediawiki'), 'TEXT')
+
+            # 客户端及服务端超时
+            with self.assertRaises(PandocServerTimeout):
+                _server.convert('slow', 'markdown', 'mediawiki', timeout=0.2)
+            with self.assertRaises(PandocServerTimeout):
+                _server.convert('server timeout', 'markdown', 'mediawiki')
+        finally:
+            _http_server.shutdown()
+            _http_server.server_close()
+
+        # 连接失败
+        with self.assertRaises(PandocServerUnavailable):
+            _server.convert('text', 'markdown', 'mediawiki')
+
+    def test_server_timeout(self):
+        print("test pandoc_server server timeout")
+        self.assertEqual(PandocServer(convert_timeout=2.5)._get_server_timeout(), 3)
+        self.assertEqual(PandocServer(convert_timeout=None)._get_server_timeout(), 86400)
+
+
+if __name__ == '__main__':
+    unittest.main()
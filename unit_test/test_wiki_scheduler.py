@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+import os
+import io
+import time
+import unittest
+import unittest.mock
+import requests
+from requests.adapters import HTTPAdapter
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from mediawikiTool.lib.wiki_scheduler import TokenBucket, WikiRequestScheduler
+
+
+def _make_resp(status_code, headers=None):
+    """
+    生成测试用的响应对象
+    """
+    _resp = requests.Response()
+    _resp.status_code = status_code
+    _resp.headers.update(headers or {})
+    _resp.raw = io.BytesIO(b'')
+    return _resp
+
+
+class Test(unittest.TestCase):
+
+    def test_token_bucket(self):
+        print("test wiki_scheduler token bucket")
+        _bucket = TokenBucket(20, burst=1)
+        _start = time.monotonic()
+        for _i in range(5):
+            _bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - _start, 0.15)
+
+        # 降速及恢复
+        _bucket.slow_down()
+        self.assertEqual(_bucket.rate, 10)
+        for _i in range(30):
+            _bucket.speed_up()
+        self.assertEqual(_bucket.rate, 20)
+
+    def test_idempotent(self):
+        print("test wiki_scheduler idempotent request")
+        _scheduler = WikiRequestScheduler(rate=0)
+        _get = requests.Request('GET', 'http://wiki/api.php', params={'action': 'edit'}).prepare()
+        _query = requests.Request('POST', 'http://wiki/api.php', data={'action': 'query'}).prepare()
+        _edit = requests.Request('POST', 'http://wiki/api.php', data={'action': 'edit'}).prepare()
+        self.assertTrue(_scheduler._is_idempotent(_get))
+        self.assertTrue(_scheduler._is_idempotent(_query))
+        self.assertFalse(_scheduler._is_idempotent(_edit))
+
+    def test_retry(self):
+        print("test wiki_scheduler retry")
+        _scheduler = WikiRequestScheduler(rate=0, max_retries=3, backoff_base=0.01)
+        _edit = requests.Request('POST', 'http://wiki/api.php', data={'action': 'edit'}).prepare()
+        _query = requests.Request('POST', 'http://wiki/api.php', data={'action': 'query'}).prepare()
+
+        # 429及maxlag所有请求都重试, 使用Retry-After
+        with unittest.mock.patch.object(HTTPAdapter, 'send', side_effect=[
+            _make_resp(429, {'Retry-After': '0'}), _make_resp(200, {'X-Database-Lag': '6', 'Retry-After': '0'}),
+            _make_resp(200)
+        ]):
+            self.assertEqual(_scheduler.send(_edit).status_code, 200)
+        _stats = _scheduler.reset_stats()
+        self.assertEqual((_stats['requests'], _stats['retries'], _stats['throttled']), (3, 2, 2))
+
+        # 5xx只重试不修改数据的请求
+        with unittest.mock.patch.object(HTTPAdapter, 'send', side_effect=[_make_resp(503), _make_resp(200)]):
+            self.assertEqual(_scheduler.send(_edit).status_code, 503)
+        with unittest.mock.patch.object(HTTPAdapter, 'send', side_effect=[_make_resp(503), _make_resp(200)]):
+            self.assertEqual(_scheduler.send(_query).status_code, 200)
+
+        # 超过最大重试次数返回最后的响应
+        with unittest.mock.patch.object(HTTPAdapter, 'send', return_value=_make_resp(502)):
+            self.assertEqual(_scheduler.send(_query).status_code, 502)
+        self.assertEqual(_scheduler.get_stats()['retries'], 4)
+
+    def test_retry_after(self):
+        print("test wiki_scheduler retry after")
+        _scheduler = WikiRequestScheduler()
+        self.assertEqual(_scheduler._parse_retry_after('5'), 5)
+        self.assertIsNone(_scheduler._parse_retry_after('bad'))
+        self.assertEqual(_scheduler._parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
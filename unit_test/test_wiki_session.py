@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+import os
+import stat
+import time
+import tempfile
+import unittest
+from requests.cookies import RequestsCookieJar
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from mediawikiTool.lib.wiki_session import WikiSessionCache, WikiSiteMetaCache
+
+
+class Test(unittest.TestCase):
+
+    def test_session_cache(self):
+        print("test wiki_session cache")
+        _path = os.path.join(tempfile.mkdtemp(), 'session')
+        _cache = WikiSessionCache(_path, 'https://host/|user', ttl=60)
+        self.assertIsNone(_cache.load(RequestsCookieJar()))
+
+        # 保存并装载, 过期的cookie不装载
+        _jar = RequestsCookieJar()
+        _jar.set('wiki_session', 'abc', domain='host', path='/')
+        _jar.set('old', 'x', domain='host', path='/', expires=int(time.time()) - 10)
+        _cache.save(_jar, {'csrf': 'token+\\'})
+        if os.name == 'posix':
+            self.assertEqual(stat.S_IMODE(os.stat(_cache.file).st_mode), 0o600)
+
+        _new_jar = RequestsCookieJar()
+        self.assertEqual(_cache.load(_new_jar), {'csrf': 'token+\\'})
+        self.assertEqual(_new_jar.get('wiki_session'), 'abc')
+        self.assertIsNone(_new_jar.get('old'))
+
+        # 不同的标识使用不同的缓存
+        self.assertIsNone(WikiSessionCache(_path, 'https://host/|other').load(RequestsCookieJar()))
+
+        # 缓存过期
+        _cache.ttl = -1
+        self.assertIsNone(_cache.load(RequestsCookieJar()))
+
+        _cache.clear()
+        self.assertFalse(os.path.exists(_cache.file))
+
+    def test_site_meta_cache(self):
+        print("test wiki_session site meta cache")
+        _path = os.path.join(tempfile.mkdtemp(), 'meta')
+        _cache = WikiSiteMetaCache(_path, 'https://host/', ttl=60)
+        self.assertIsNone(_cache.load())
+
+        _meta = {
+            'general': {'generator': 'MediaWiki 1.31.0'},
+            'namespaces': {'0': '', '6': 'File'},
+            'interwiki': {'wikipedia': 'https://en.wikipedia.org/wiki/$1'}
+        }
+        _cache.save(_meta, user_key='no-auth|', userinfo={'name': '127.0.0.1', 'anon': True})
+        _cache.save(_meta, user_key='OAuth|', userinfo={'name': 'User', 'anon': False})
+        _cache.save(_meta)
+
+        # 保留各用户的用户信息
+        _data = _cache.load()
+        self.assertEqual(_data['namespaces'], _meta['namespaces'])
+        self.assertEqual(_data['interwiki'], _meta['interwiki'])
+        self.assertEqual(sorted(_data['users'].keys()), ['OAuth|', 'no-auth|'])
+        self.assertEqual(_data['users']['OAuth|']['name'], 'User')
+
+        # 缓存过期
+        _cache.ttl = -1
+        self.assertIsNone(_cache.load())
+
+        _cache.clear()
+        self.assertFalse(os.path.exists(_cache.file))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+import os
+import unittest
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import json
+from mediawikiTool.lib.wiki_table import WikiTableWriter, WikiJsonDataWriter
+
+
+class Test(unittest.TestCase):
+
+    def test_writer(self):
+        print("test wiki_table writer")
+        _writer = WikiTableWriter()
+        _writer.write('\n=sheet1=\n')
+        _writer.begin_table('sheet1', ['a', 'b'], css_class='wikitable sortable')
+        _writer.add_row(['1', '2'])
+        _writer.add_rows([['3', '4'], ['5', '6']])
+        _writer.end_table()
+        _text = '\n=sheet1=\n{| class="wikitable sortable"\n|+sheet1\n!a\n!b\n' \
+            '|-\n|1\n|2\n|-\n|3\n|4\n|-\n|5\n|6\n|}\n'
+        self.assertEqual(_writer.get_text(), _text)
+        self.assertEqual(_writer.get_text(), _text)
+
+        # 输出到函数
+        _out_list = list()
+        _writer = WikiTableWriter(out_fun=_out_list.append)
+        _writer.begin_table('t', [])
+        _writer.end_table()
+        self.assertEqual(''.join(_out_list), '{| class="wikitable"\n|+t\n!\n|}\n')
+        self.assertRaises(RuntimeError, _writer.get_text)
+
+    def test_json_writer(self):
+        print("test wiki_table json data writer")
+        _writer = WikiJsonDataWriter()
+        _writer.begin_table('sheet1', ['a', '名称'])
+        _writer.add_row(['1', '"x"'])
+        _writer.add_rows([['3', '4']])
+        _writer.end_table()
+        _text = _writer.get_text()
+        self.assertEqual(_text, '{"caption":"sheet1","head":["a","名称"],"rows":[\n["1","\\"x\\""],\n["3","4"]\n]}\n')
+        self.assertEqual(json.loads(_text)['rows'], [['1', '"x"'], ['3', '4']])
+
+        # 没有数据行
+        _writer = WikiJsonDataWriter()
+        _writer.begin_table('t', [])
+        _writer.end_table()
+        self.assertEqual(json.loads(_writer.get_text()), {'caption': 't', 'head': [], 'rows': []})
+
+        self.assertEqual(
+            WikiJsonDataWriter.get_invoke_text('Module:a/b.json', limit=10),
+            '{{#invoke:XlsToWiki|table|data=Module:a/b.json|limit=10}}\n'
+        )
+        self.assertEqual(
+            WikiJsonDataWriter.get_invoke_text('Module:a/b.json', limit=10, offset=20),
+            '{{#invoke:XlsToWiki|table|data=Module:a/b.json|limit=10|offset=20}}\n'
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
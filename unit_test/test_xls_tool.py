@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+import os
+import unittest
+import unittest.mock
+import tempfile
+import datetime
+import xlrd
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from mediawikiTool.lib import xls_tool
+from mediawikiTool.lib.xls_tool import XlsSheetPlan, XlsRowReader, CsvRowReader, open_row_reader
+
+
+class Test(unittest.TestCase):
+
+    def test_sheet_plan(self):
+        print("test xls_tool sheet plan")
+        _para = {
+            "has_head": True, "head_row": 0, "data_row_start": 1, "data_row_end": -1,
+            "data_col_start": 0, "data_cols_end": -1, "col_filter": [],
+            "head_trans_dict": {"a": "A"}, "col_trans_dict": {"1": {"1.0": "one"}}
+        }
+        _plan = XlsSheetPlan(_para)
+        self.assertEqual(_plan.convert_head(['a', 'b', 'c']), ['A', 'b', 'c'])
+        self.assertEqual(_plan.convert_row(['x', 1.0, 2.0]), ['x', 'one', '2.0'])
+        # 未指定列过滤及结束列时按每行自身的列数输出
+        self.assertEqual(_plan.cols, None)
+        self.assertEqual(_plan.convert_row(['y']), ['y'])
+        self.assertEqual(_plan.convert_row(['z', 1.0, 2.0, 3.0]), ['z', 'one', '2.0', '3.0'])
+
+        # 列过滤及顺序
+        _para['col_filter'] = [2, 1]
+        _plan = XlsSheetPlan(_para)
+        self.assertEqual(_plan.cols, [2, 1])
+        self.assertEqual(_plan.convert_row(['x', 1.0, 2.0]), ['2.0', 'one'])
+
+        # 开始及结束列
+        _para['col_filter'] = []
+        _para['data_col_start'] = 1
+        _plan = XlsSheetPlan(_para)
+        self.assertEqual(_plan.convert_row(['x', 1.0, 2.0, 3.0]), ['one', '2.0', '3.0'])
+        self.assertEqual(_plan.convert_row(['x', 1.0]), ['one'])
+        self.assertEqual(_para['data_cols_end'], -1)
+
+    def test_value_to_str(self):
+        print("test xls_tool value_to_str")
+        self.assertEqual(
+            [XlsRowReader.value_to_str(_v) for _v in (None, True, 3, 2.5, 'a')],
+            ['', '1', '3.0', '2.5', 'a']
+        )
+        # 日期时间转换为与xlrd一致的日期序列号
+        self.assertEqual(
+            [XlsRowReader.value_to_str(_v) for _v in (
+                datetime.datetime(2019, 12, 9), datetime.date(2019, 12, 9), datetime.datetime(2019, 12, 9, 12),
+                datetime.time(6), datetime.datetime(1900, 1, 1), datetime.datetime(1900, 3, 1)
+            )],
+            ['43808.0', '43808.0', '43808.5', '0.25', '1.0', '61.0']
+        )
+        self.assertEqual(XlsRowReader.value_to_str(datetime.date(2019, 12, 9), date_1904=True), '42346.0')
+        self.assertEqual(
+            XlsRowReader.value_to_str(datetime.datetime(2019, 12, 9, 12)),
+            str(xlrd.xldate.xldate_from_datetime_tuple((2019, 12, 9, 12, 0, 0), 0))
+        )
+
+    def test_xlsx_without_openpyxl(self):
+        print("test xls_tool xlsx without openpyxl")
+        _file = os.path.join(tempfile.mkdtemp(), 'data.xlsx')
+        with open(_file, 'wb') as f:
+            f.write(b'PK')
+        with unittest.mock.patch.object(xls_tool, 'openpyxl', None), \
+                unittest.mock.patch.object(xls_tool, 'XLRD_SUPPORT_XLSX', False):
+            with self.assertRaisesRegex(ImportError, 'openpyxl'):
+                open_row_reader(_file, stream=False)
+
+    def test_csv_reader(self):
+        print("test xls_tool csv reader")
+        _path = tempfile.mkdtemp()
+        _file = os.path.join(_path, 'data.tsv')
+        with open(_file, 'w', encoding='gbk', newline='') as f:
+            f.write('名称\t值\r\na\t1\r\n"b\tc"\t2\r\nd\r\n')
+
+        _reader = open_row_reader(_file)
+        self.assertTrue(isinstance(_reader, CsvRowReader))
+        self.assertEqual(_reader.sheet_names, ['data'])
+        self.assertEqual(_reader.read_values('data', 0), ['名称', '值'])
+        self.assertEqual(list(_reader.iter_values('data', start_row=1, end_row=2)), [['a', '1'], ['b\tc', '2']])
+        self.assertEqual(_reader.read_values('data', 9), [])
+
+        _para = {
+            "has_head": True, "head_row": 0, "data_row_start": 1, "data_row_end": -1,
+            "data_col_start": 0, "data_cols_end": -1, "col_filter": [1, 0],
+            "head_trans_dict": {"值": "value"}, "col_trans_dict": {"1": {"1": "one"}}
+        }
+        _plan = XlsSheetPlan(_para, to_str=_reader.to_str)
+        self.assertEqual(_plan.convert_head(_reader.read_values('data', 0)), ['value', '名称'])
+        self.assertEqual(
+            [_plan.convert_row(_values) for _values in _reader.iter_values('data', start_row=1)],
+            [['one', 'a'], ['2', 'b\tc'], ['', 'd']]
+        )
+
+        # utf-8文件
+        _file = os.path.join(_path, 'data.csv')
+        with open(_file, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write('名称,值\n')
+        self.assertEqual(CsvRowReader(_file).read_values('data', 0), ['名称', '值'])
+
+
+if __name__ == '__main__':
+    unittest.main()